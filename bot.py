@@ -4,17 +4,13 @@ Team Task Management Telegram Bot (v2.1 - Groups & Media Support)
 Hierarchical system: Super Admin > Group Admin > users
 Features: Group management, multi-assignee tasks, media attachments
 """
-import os
-import json
+import sys
+import asyncio
 import logging
 import warnings
-from datetime import datetime, timedelta
-from dotenv import load_dotenv
+from operator import methodcaller
 
-# Load environment variables first
-load_dotenv()
-
-# Import config module for environment settings
+# Import config module for environment settings (loads .env once)
 from config import Config
 
 # Suppress PTBUserWarning about per_message settings (we intentionally mix handler types)
@@ -22,6 +18,7 @@ warnings.filterwarnings("ignore", message=".*per_message.*")
 
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.error import BadRequest
+from telegram.request import HTTPXRequest
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -37,7 +34,7 @@ from database import (
 
 # Import utilities and handlers
 from handlers.notifications import (
-    send_deadline_reminder
+    schedule_deadline_reminder, retry_failed_notifications
 )
 from handlers.common import start, help_command, cancel, show_main_menu
 from handlers.super_admin import (
@@ -96,19 +93,46 @@ from handlers.tasks import (
 from handlers.group_admin import admin_view_tasks, super_manage_tasks, admin_manage_users
 from handlers.workers import user_my_tasks, user_stats
 from handlers.registration import start_registration
+from utils.helpers import is_message_not_modified
 
-# Enable logging
+# Enable logging (LOG_LEVEL=WARNING in production drops the per-click debug records before formatting)
 logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=Config.LOG_LEVEL.upper()
 )
 logger = logging.getLogger(__name__)
 
 # Use config for settings
 TOKEN = Config.TELEGRAM_BOT_TOKEN
-# Parse super admin IDs from comma-separated string
-SUPER_ADMIN_IDS = [
-    int(id.strip()) for id in Config.SUPER_ADMIN_ID.split(",") if id.strip()
-]
+SUPER_ADMIN_IDS = Config.SUPER_ADMIN_IDS
+
+# Shown when a routed callback handler raises
+CALLBACK_ERROR_TEXT = "❌ Возникла ошибка при обработке вашего действия. Ошибка была зафиксирована."
+
+# Only update kinds the bot has handlers for; Telegram doesn't deliver (and PTB doesn't parse) the rest
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+
+# Route super-admin-only text input at dispatch time instead of in the handlers
+SUPER_ADMIN_FILTER = filters.User(user_id=SUPER_ADMIN_IDS)
+
+
+def callback_exact(*values: str):
+    """
+    Build a CallbackQueryHandler pattern matching these exact callback_data values.
+    
+    PTB calls a callable pattern with the data, so this is one hashed lookup
+    instead of running a regex.
+    """
+    return frozenset(values).__contains__
+
+
+def callback_prefix(*prefixes: str):
+    """Build a CallbackQueryHandler pattern matching callback_data starting with any of the prefixes."""
+    return methodcaller("startswith", prefixes)
+
+
+# Patterns shared by several conversation states
+BACK_TO_EDIT_MENU = callback_prefix("back_to_edit_menu_")
+CANCEL_TASK_CREATION = callback_exact("cancel_task_creation")
 
 # Conversation states (only those NOT imported from handlers)
 # Note: TASK_STEP_* states are imported from handlers.tasks
@@ -118,198 +142,190 @@ SUPER_ADMIN_IDS = [
     SUPER_MANAGE_USERS_STATE, SUPER_MANAGE_TASKS_STATE
 ) = range(4)
 
-# Initialize database
-try:
-    init_db()
-except Exception as e:
-    logger.error(f"Failed to initialize database: {e}")
-    import sys
-    sys.exit(1)
-
 
 # ============================================================================
+# Callback routing
+# ============================================================================
+
+async def _show_start_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Go back to the main menu from an inline button."""
+    query = update.callback_query
+    # Acknowledge first so the spinner clears before the menu lookups run;
+    # cache_time lets the client absorb rapid repeat taps on pure navigation
+    await query.answer(cache_time=1)
+    await show_main_menu(query.from_user.id, query.from_user.first_name, update, is_callback=True)
+
+
+async def _answer_only(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Acknowledge a button that has no action yet."""
+    await update.callback_query.answer()
+
+
+async def _cal_ignore(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Acknowledge taps on calendar header/padding cells."""
+    await update.callback_query.answer(cache_time=1)
+
+
+async def _stay_in_state(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Swallow a button inside a conversation without changing its state."""
+    await update.callback_query.answer()
+
+
+# Exact callback_data -> (handler, returns_state).
+# returns_state marks handlers whose return value is a conversation state.
+CALLBACK_EXACT = {
+    # Registration / navigation
+    "start_registration": (start_registration, True),
+    "start_menu": (_show_start_menu, False),
+
+    # Super admin: groups
+    "super_add_group": (super_add_group, False),
+    "super_add_group_confirm": (super_add_group_confirm, False),
+    "super_manage_groups": (super_manage_groups, False),
+    "super_rename_group": (super_rename_group, True),
+    "super_delete_group": (super_delete_group, False),
+    "super_delete_group_confirm": (super_delete_group_confirm, False),
+    "super_admin_group_edit": (super_admin_group_edit, False),
+    "super_change_admin": (super_change_admin, True),
+    "super_back_to_group": (super_back_to_group, False),
+    "super_my_groups": (super_my_groups, False),
+    "super_manage_tasks": (super_manage_tasks, False),
+    "super_view_group_users": (super_view_group_users, False),
+
+    # Super admin: users
+    "super_manage_users": (super_manage_users, True),
+    "super_add_user": (super_add_user, True),
+    "super_confirm_user": (super_confirm_user, True),
+    "super_cancel_user": (super_cancel_user, True),
+    "super_users_no_group": (super_list_no_group_users, True),
+
+    # Registration requests
+    "super_view_registration_requests": (super_view_registration_requests, False),
+
+    # Admin handlers
+    "admin_create_task": (create_task, True),
+    "create_task": (create_task, True),
+    "admin_view_tasks": (admin_view_tasks, False),
+    "admin_manage_users": (admin_manage_users, False),
+    "admin_add_user": (_answer_only, False),  # TODO: Implement add user
+
+    # Unified tasks menu with filters
+    "view_tasks_menu": (view_tasks_menu, False),
+    "filter_tasks_created": (filter_tasks_created, False),
+    "filter_tasks_assigned": (filter_tasks_assigned, False),
+    "filter_tasks_select_group": (filter_tasks_select_group, False),
+    "filter_tasks_all": (filter_tasks_all, False),
+    "filter_tasks_archived": (filter_tasks_archived, False),
+
+    # User handlers
+    "user_my_tasks": (user_my_tasks, False),
+    "user_stats": (user_stats, False),
+}
+
+# callback_data prefix (everything up to an underscore) -> (handler, returns_state).
+# The longest matching prefix wins, so e.g. "view_task_media_" beats "view_task_".
+# Note: task_add_media, task_skip_media, task_toggle_user, task_confirm_users,
+# cancel_task_creation and edit_task_ are handled by ConversationHandlers.
+# Do not route them here to avoid conflicts with conversation state.
+CALLBACK_PREFIX = {
+    # Super admin: groups
+    "super_admin_select_": (super_admin_select, False),
+    "super_select_new_admin_": (super_select_new_admin, True),
+
+    # Super admin: users ("super_user_<id>" opens the user action menu)
+    "super_all_employees_page_": (super_all_employees_page, False),
+    "super_user_select_group_": (super_user_select_group, True),
+    "super_users_group_": (super_list_group_users, True),
+    "super_user_": (super_user_action_menu, True),
+    "super_user_set_name_": (super_user_set_name_start, True),
+    "super_user_edit_groups_": (super_user_edit_groups, True),
+    "super_user_toggle_group_": (super_user_toggle_group, True),
+    "super_user_groups_confirm_": (super_user_groups_confirm, True),
+    "super_user_groups_cancel_": (super_user_groups_cancel, True),
+    "super_user_ban_": (super_user_ban, True),
+    "super_user_unban_": (super_user_unban, True),
+    "super_user_delete_confirm_": (super_user_delete_confirm, True),
+    "super_user_delete_": (super_user_delete, True),
+
+    # Registration requests
+    "super_review_request_": (super_review_registration_request, False),
+    "super_approve_request_": (super_approve_registration_request_handler, False),
+    "super_reject_request_": (super_reject_registration_request_handler, False),
+
+    # Task filters
+    "filter_tasks_group_": (filter_tasks_group, False),
+    "filter_group_all_tasks_": (filter_group_all_tasks, False),
+    "filter_tasks_assignee_": (filter_tasks_by_assignee, False),
+    "filter_archived_created_": (filter_archived_created, False),
+    "filter_archived_assigned_": (filter_archived_assigned, False),
+
+    # Task viewing, deletion and status changes
+    "view_task_media_": (view_task_media, False),
+    "view_task_": (view_task_detail, False),
+    "delete_task_confirm_": (delete_task_confirm_handler, False),
+    "delete_task_": (delete_task_handler, False),
+    "set_task_status_": (set_task_status_handler, False),
+    "change_task_status_": (change_task_status_handler, False),
+}
+
+
+def _resolve_callback(data: str):
+    """
+    Find the (handler, returns_state) route for callback data.
+    
+    Exact matches are a single dict lookup. Otherwise every underscore-terminated
+    prefix is tried from longest to shortest, which is a handful of lookups
+    regardless of how many routes are registered.
+    """
+    route = CALLBACK_EXACT.get(data)
+    if route is not None:
+        return route
+    end = data.rfind("_")
+    while end > 0:
+        route = CALLBACK_PREFIX.get(data[:end + 1])
+        if route is not None:
+            return route
+        end = data.rfind("_", 0, end)
+    return None
+
+
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle inline button callbacks."""
-    import time
     query = update.callback_query
     data = query.data
-    start_time = time.time()
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
     user_id = query.from_user.id
     
     # Debug log to trace callback operations (helps diagnose unresponsive buttons)
-    logger.info(f"⏱️  START: Кнопка '{data}' від користувача {user_id}")
+    logger.debug("⏱️  START: Кнопка '%s' від користувача %s", data, user_id)
 
     try:
-        # Registration button
-        if data == "start_registration":
-            return await start_registration(update, context)
-
-        # Start menu (go back home)
-        if data == "start_menu":
-            user_id = query.from_user.id
-            user_name = query.from_user.first_name
-            await show_main_menu(user_id, user_name, update, is_callback=True)
-
-        # Super admin handlers
-        elif data == "super_add_group":
-            await super_add_group(update, context)
-        elif data == "super_add_group_confirm":
-            await super_add_group_confirm(update, context)
-        elif data == "super_manage_groups":
-            await super_manage_groups(update, context)
-        elif data == "super_rename_group":
-            return await super_rename_group(update, context)
-        elif data == "super_delete_group":
-            await super_delete_group(update, context)
-        elif data == "super_delete_group_confirm":
-            await super_delete_group_confirm(update, context)
-        elif data == "super_admin_group_edit":
-            await super_admin_group_edit(update, context)
-        elif data.startswith("super_admin_select_"):
-            await super_admin_select(update, context)
-        elif data == "super_change_admin":
-            return await super_change_admin(update, context)
-        elif data.startswith("super_select_new_admin_"):
-            return await super_select_new_admin(update, context)
-        elif data == "super_back_to_group":
-            await super_back_to_group(update, context)
-        elif data == "super_manage_users":
-            return await super_manage_users(update, context)
-        elif data == "super_my_groups":
-            await super_my_groups(update, context)
-        elif data.startswith("super_all_employees_page_"):
-            await super_all_employees_page(update, context)
-        elif data == "super_add_user":
-            return await super_add_user(update, context)
-        elif data.startswith("super_user_select_group_"):
-            return await super_user_select_group(update, context)
-        elif data == "super_confirm_user":
-            return await super_confirm_user(update, context)
-        elif data == "super_cancel_user":
-            return await super_cancel_user(update, context)
-        elif data == "super_manage_tasks":
-            await super_manage_tasks(update, context)
-        elif data == "super_view_group_users":
-            await super_view_group_users(update, context)
-        elif data.startswith("super_users_group_"):
-            return await super_list_group_users(update, context)
-        elif data == "super_users_no_group":
-            return await super_list_no_group_users(update, context)
-        elif data.startswith("super_user_") and data.count("_") == 2 and data.startswith("super_user_"):
-            return await super_user_action_menu(update, context)
-        elif data.startswith("super_user_set_name_"):
-            return await super_user_set_name_start(update, context)
-        elif data.startswith("super_user_edit_groups_"):
-            return await super_user_edit_groups(update, context)
-        elif data.startswith("super_user_toggle_group_"):
-            return await super_user_toggle_group(update, context)
-        elif data.startswith("super_user_groups_confirm_"):
-            return await super_user_groups_confirm(update, context)
-        elif data.startswith("super_user_groups_cancel_"):
-            return await super_user_groups_cancel(update, context)
-        elif data.startswith("super_user_ban_"):
-            return await super_user_ban(update, context)
-        elif data.startswith("super_user_unban_"):
-            return await super_user_unban(update, context)
-        elif data.startswith("super_user_delete_confirm_"):
-            return await super_user_delete_confirm(update, context)
-        elif data.startswith("super_user_delete_"):
-            return await super_user_delete(update, context)
-        
-        # Registration request handlers
-        elif data == "super_view_registration_requests":
-            await super_view_registration_requests(update, context)
-        elif data.startswith("super_review_request_"):
-            await super_review_registration_request(update, context)
-        elif data.startswith("super_approve_request_"):
-            await super_approve_registration_request_handler(update, context)
-        elif data.startswith("super_reject_request_"):
-            await super_reject_registration_request_handler(update, context)
-
-        # Admin handlers
-        elif data == "admin_create_task" or data == "create_task":
-            return await create_task(update, context)
-        elif data == "admin_view_tasks":
-            await admin_view_tasks(update, context)
-        elif data == "admin_manage_users":
-            await admin_manage_users(update, context)
-        elif data == "admin_add_user":
-            await query.answer()
-            # TODO: Implement add user
-
-        # Unified tasks menu with filters
-        elif data == "view_tasks_menu":
-            await view_tasks_menu(update, context)
-        elif data == "filter_tasks_created":
-            await filter_tasks_created(update, context)
-        elif data == "filter_tasks_assigned":
-            await filter_tasks_assigned(update, context)
-        elif data == "filter_tasks_select_group":
-            await filter_tasks_select_group(update, context)
-        elif data.startswith("filter_tasks_group_"):
-            await filter_tasks_group(update, context)
-        elif data.startswith("filter_group_all_tasks_"):
-            await filter_group_all_tasks(update, context)
-        elif data.startswith("filter_tasks_assignee_"):
-            await filter_tasks_by_assignee(update, context)
-        elif data == "filter_tasks_all":
-            await filter_tasks_all(update, context)
-        elif data == "filter_tasks_archived":
-            await filter_tasks_archived(update, context)
-        elif data.startswith("filter_archived_created_"):
-            await filter_archived_created(update, context)
-        elif data.startswith("filter_archived_assigned_"):
-            await filter_archived_assigned(update, context)
-
-        # Note: task_add_media, task_skip_media, task_toggle_user, task_confirm_users,
-        # and cancel_task_creation are handled by ConversationHandler for task creation.
-        # Do not route them here to avoid conflicts with conversation state.
-
-        # Task viewing handlers
-        elif data.startswith("view_task_media_"):
-            await view_task_media(update, context)
-        elif data.startswith("view_task_"):
-            await view_task_detail(update, context)
+        route = _resolve_callback(data)
+        if route is None:
+            # Stale or unknown button: acknowledge and let the client cache it
+            await query.answer(cache_time=5)
+            return None
         
-        # Task editing/deletion handlers
-        # Note: edit_task_ is handled by ConversationHandler
-        elif data.startswith("delete_task_confirm_"):
-            await delete_task_confirm_handler(update, context)
-        elif data.startswith("delete_task_"):
-            await delete_task_handler(update, context)
-        
-        # Task status change handlers
-        elif data.startswith("set_task_status_"):
-            await set_task_status_handler(update, context)
-        elif data.startswith("change_task_status_"):
-            await change_task_status_handler(update, context)
-        
-        # user handlers
-        elif data == "user_my_tasks":
-            await user_my_tasks(update, context)
-        elif data == "user_stats":
-            await user_stats(update, context)
-
-        else:
-            await query.answer()
+        handler, returns_state = route
+        result = await handler(update, context)
+        if returns_state:
+            return result
         
         # Log total time
-        elapsed = time.time() - start_time
+        elapsed = loop.time() - start_time
         if elapsed > 0.5:
-            logger.info(f"⏱️  SLOW: Кнопка '{data}' обробилась за {elapsed:.2f}s")
+            logger.info("⏱️  SLOW: Кнопка '%s' обробилась за %.2fs", data, elapsed)
         else:
-            logger.debug(f"⏱️  OK: Кнопка '{data}' обробилась за {elapsed:.2f}s")
+            logger.debug("⏱️  OK: Кнопка '%s' обробилась за %.2fs", data, elapsed)
 
     except BadRequest as e:
         # Handle Telegram API errors (e.g., "Message is not modified")
-        if "Message is not modified" in str(e):
-            logger.debug(f"Message not modified for callback '{data}' - user {query.from_user.id}")
-            try:
-                await query.answer()
-            except Exception:
-                pass
+        if is_message_not_modified(e):
+            # Routed handlers answer before editing, so the query is already acknowledged
+            logger.debug("Message not modified for callback '%s' - user %s", data, user_id)
         else:
-            logger.error(f"BadRequest while handling callback '{data}': {e}")
+            logger.error("BadRequest while handling callback '%s': %s", data, e)
             try:
                 await query.answer(f"❌ Помилка Telegram API: {str(e)[:50]}")
             except Exception:
@@ -318,60 +334,85 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     except Exception as e:
         logger.exception("Error while handling callback '%s': %s", data, e)
         try:
-            await query.answer("❌ Возникла ошибка при обработке вашего действия. Ошибка была зафиксирована.")
+            await query.answer(CALLBACK_ERROR_TEXT)
         except Exception:
             pass
         return None
 
 
 # ============================================================================
+async def _post_init(application: Application) -> None:
+    """Create/upgrade the schema once, off the event loop, before updates are processed."""
+    try:
+        await asyncio.to_thread(init_db)
+    except Exception as e:
+        logger.error(f"Failed to initialize database: {e}")
+        raise
+
+
 def start_bot():
     """Start the bot."""
     # Enable concurrent updates for faster webhook processing
-    application = Application.builder().token(TOKEN).concurrent_updates(True).build()
+    # Bot API client: with concurrent updates and notification fan-outs, many
+    # answer/edit/send calls are in flight at once; size the pool for that
+    request = HTTPXRequest(
+        connection_pool_size=Config.HTTP_POOL_SIZE,
+        pool_timeout=Config.HTTP_POOL_TIMEOUT,
+        connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+        read_timeout=Config.HTTP_READ_TIMEOUT,
+        http_version=Config.HTTP_VERSION,
+    )
+    application = (
+        Application.builder()
+        .token(TOKEN)
+        .request(request)
+        .concurrent_updates(Config.CONCURRENT_UPDATES)
+        .post_init(_post_init)
+        .build()
+    )
     
-    # Command handlers
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("help", help_command))
+    # Command handlers (stateless, so they don't need to block the update pipeline)
+    application.add_handler(CommandHandler("start", start, block=False))
+    application.add_handler(CommandHandler("help", help_command, block=False))
     
     # Task creation conversation
     task_conv_handler = ConversationHandler(
-        entry_points=[CallbackQueryHandler(create_task, pattern="^(create_task|admin_create_task)$")],
+        entry_points=[CallbackQueryHandler(create_task, pattern=callback_exact("create_task", "admin_create_task"))],
         per_message=False,
         states={
             TASK_STEP_TITLE: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, task_title_input),
-                CallbackQueryHandler(task_forward_to_description, pattern="^task_forward_to_description$"),
-                CallbackQueryHandler(cancel_task_creation, pattern="^cancel_task_creation$"),
+                CallbackQueryHandler(task_forward_to_description, pattern=callback_exact("task_forward_to_description")),
+                CallbackQueryHandler(cancel_task_creation, pattern=CANCEL_TASK_CREATION),
             ],
             TASK_STEP_DATE: [
-                CallbackQueryHandler(task_calendar_navigation, pattern="^cal_(prev|next)_.*"),
-                CallbackQueryHandler(task_date_selected, pattern="^cal_select_.*"),
-                CallbackQueryHandler(task_back_to_description, pattern="^task_back_to_description$"),
-                CallbackQueryHandler(task_forward_to_time, pattern="^task_forward_to_time$"),
-                CallbackQueryHandler(cancel_task_creation, pattern="^cancel_task_creation$"),
-                CallbackQueryHandler(lambda u, c: u.callback_query.answer(), pattern="^cal_ignore$"),
+                CallbackQueryHandler(task_calendar_navigation, pattern=callback_prefix("cal_prev_", "cal_next_")),
+                CallbackQueryHandler(task_date_selected, pattern=callback_prefix("cal_select_")),
+                CallbackQueryHandler(task_back_to_description, pattern=callback_exact("task_back_to_description")),
+                CallbackQueryHandler(task_forward_to_time, pattern=callback_exact("task_forward_to_time")),
+                CallbackQueryHandler(cancel_task_creation, pattern=CANCEL_TASK_CREATION),
+                CallbackQueryHandler(_cal_ignore, pattern=callback_exact("cal_ignore")),
             ],
             TASK_STEP_TIME: [
-                CallbackQueryHandler(task_time_selected, pattern="^time_select_.*$"),
-                CallbackQueryHandler(task_back_to_date, pattern="^task_back_to_date$"),
-                CallbackQueryHandler(task_forward_to_users, pattern="^task_forward_to_users$"),
-                CallbackQueryHandler(cancel_task_creation, pattern="^cancel_task_creation$"),
+                CallbackQueryHandler(task_time_selected, pattern=callback_prefix("time_select_")),
+                CallbackQueryHandler(task_back_to_date, pattern=callback_exact("task_back_to_date")),
+                CallbackQueryHandler(task_forward_to_users, pattern=callback_exact("task_forward_to_users")),
+                CallbackQueryHandler(cancel_task_creation, pattern=CANCEL_TASK_CREATION),
                 MessageHandler(filters.TEXT & ~filters.COMMAND, task_time_manual_input),
             ],
             TASK_STEP_DESCRIPTION: [
                 MessageHandler(filters.PHOTO, task_description_input),
                 MessageHandler(filters.TEXT & ~filters.COMMAND, task_description_input),
-                CallbackQueryHandler(task_skip_description, pattern="^task_skip_description$"),
-                CallbackQueryHandler(task_back_to_title, pattern="^task_back_to_title$"),
-                CallbackQueryHandler(task_forward_to_date, pattern="^task_forward_to_date$"),
-                CallbackQueryHandler(cancel_task_creation, pattern="^cancel_task_creation$"),
+                CallbackQueryHandler(task_skip_description, pattern=callback_exact("task_skip_description")),
+                CallbackQueryHandler(task_back_to_title, pattern=callback_exact("task_back_to_title")),
+                CallbackQueryHandler(task_forward_to_date, pattern=callback_exact("task_forward_to_date")),
+                CallbackQueryHandler(cancel_task_creation, pattern=CANCEL_TASK_CREATION),
             ],
             TASK_STEP_USERS: [
-                CallbackQueryHandler(task_toggle_user, pattern="^task_toggle_user_.*"),
-                CallbackQueryHandler(task_confirm_users, pattern="^task_confirm_users$"),
-                CallbackQueryHandler(task_back_to_time, pattern="^task_back_to_time$"),
-                CallbackQueryHandler(cancel_task_creation, pattern="^cancel_task_creation$"),
+                CallbackQueryHandler(task_toggle_user, pattern=callback_prefix("task_toggle_user_")),
+                CallbackQueryHandler(task_confirm_users, pattern=callback_exact("task_confirm_users")),
+                CallbackQueryHandler(task_back_to_time, pattern=callback_exact("task_back_to_time")),
+                CallbackQueryHandler(cancel_task_creation, pattern=CANCEL_TASK_CREATION),
             ],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
@@ -380,12 +421,12 @@ def start_bot():
     
     # Super admin change admin conversation
     change_admin_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(super_change_admin, pattern="^super_change_admin$")],
+        entry_points=[CallbackQueryHandler(super_change_admin, pattern=callback_exact("super_change_admin"))],
         per_message=False,
         states={
             WAITING_ADMIN_SELECT: [
-                CallbackQueryHandler(super_select_new_admin, pattern="^super_select_new_admin_.*"),
-                CallbackQueryHandler(super_back_to_group, pattern="^super_back_to_group$"),
+                CallbackQueryHandler(super_select_new_admin, pattern=callback_prefix("super_select_new_admin_")),
+                CallbackQueryHandler(super_back_to_group, pattern=callback_exact("super_back_to_group")),
             ],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
@@ -394,16 +435,16 @@ def start_bot():
 
     # Super admin edit group members conversation
     edit_members_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(super_edit_group_members, pattern="^super_edit_group_members$")],
+        entry_points=[CallbackQueryHandler(super_edit_group_members, pattern=callback_exact("super_edit_group_members"))],
         per_message=False,
         states={
             SUPER_EDIT_GROUP_MEMBERS: [
-                CallbackQueryHandler(super_edit_member_toggle, pattern="^super_edit_member_toggle_.*"),
-                CallbackQueryHandler(super_edit_members_confirm, pattern="^super_edit_members_confirm$"),
-                CallbackQueryHandler(super_edit_members_cancel, pattern="^super_edit_members_cancel$"),
-                CallbackQueryHandler(super_edit_members_back, pattern="^super_edit_members_back$"),
-                CallbackQueryHandler(super_edit_members_apply, pattern="^super_edit_members_apply$"),
-                CallbackQueryHandler(super_edit_members_page, pattern="^super_edit_members_page_.*$"),
+                CallbackQueryHandler(super_edit_member_toggle, pattern=callback_prefix("super_edit_member_toggle_")),
+                CallbackQueryHandler(super_edit_members_confirm, pattern=callback_exact("super_edit_members_confirm")),
+                CallbackQueryHandler(super_edit_members_cancel, pattern=callback_exact("super_edit_members_cancel")),
+                CallbackQueryHandler(super_edit_members_back, pattern=callback_exact("super_edit_members_back")),
+                CallbackQueryHandler(super_edit_members_apply, pattern=callback_exact("super_edit_members_apply")),
+                CallbackQueryHandler(super_edit_members_page, pattern=callback_prefix("super_edit_members_page_")),
             ],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
@@ -412,120 +453,110 @@ def start_bot():
     
     # Super admin add user conversation
     super_add_user_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(super_add_user, pattern="^super_add_user$")],
+        entry_points=[CallbackQueryHandler(super_add_user, pattern=callback_exact("super_add_user"))],
         per_message=False,
         states={
             WAITING_GROUP_SELECT: [
-                CallbackQueryHandler(super_user_select_group, pattern="^super_user_select_group_.*"),
-                CallbackQueryHandler(lambda u, c: None, pattern="^super_manage_users$"),
+                CallbackQueryHandler(super_user_select_group, pattern=callback_prefix("super_user_select_group_")),
+                CallbackQueryHandler(_stay_in_state, pattern=callback_exact("super_manage_users")),
             ],
-            USER_ID_INPUT: [MessageHandler(filters.TEXT & ~filters.COMMAND, super_user_id_input)],
-            USER_NAME_INPUT: [MessageHandler(filters.TEXT & ~filters.COMMAND, super_user_name_input)],
+            USER_ID_INPUT: [MessageHandler(filters.TEXT & ~filters.COMMAND & SUPER_ADMIN_FILTER, super_user_id_input)],
+            USER_NAME_INPUT: [MessageHandler(filters.TEXT & ~filters.COMMAND & SUPER_ADMIN_FILTER, super_user_name_input)],
             USER_CONFIRM: [
-                CallbackQueryHandler(super_confirm_user, pattern="^super_confirm_user$"),
-                CallbackQueryHandler(super_cancel_user, pattern="^super_cancel_user$"),
+                CallbackQueryHandler(super_confirm_user, pattern=callback_exact("super_confirm_user")),
+                CallbackQueryHandler(super_cancel_user, pattern=callback_exact("super_cancel_user")),
             ],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     application.add_handler(super_add_user_conv)
 
-    # Super admin add group conversation
-    super_add_group_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(super_add_group, pattern="^super_add_group$")],
-        per_message=False,
-        states={
-            SUPER_ADD_GROUP_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, super_add_group_name_input)],
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
-    )
-    application.add_handler(super_add_group_conv)
-
-    # Super admin rename group conversation
-    super_rename_group_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(super_rename_group, pattern="^super_rename_group$")],
-        per_message=False,
-        states={
-            SUPER_RENAME_GROUP_INPUT: [MessageHandler(filters.TEXT & ~filters.COMMAND, super_rename_group_input)],
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
-    )
-    application.add_handler(super_rename_group_conv)
-
-    # Super admin change user name conversation
-    super_user_set_name_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(super_user_set_name_start, pattern="^super_user_set_name_.*")],
+    # Super admin single-text-input flows (add group, rename group, change user name) share one
+    # conversation: their states are disjoint, so one matcher serves all three entry points.
+    # allow_reentry lets tapping another flow's button mid-flow switch to that flow's state
+    super_text_input_conv = ConversationHandler(
+        entry_points=[
+            CallbackQueryHandler(super_add_group, pattern=callback_exact("super_add_group")),
+            CallbackQueryHandler(super_rename_group, pattern=callback_exact("super_rename_group")),
+            CallbackQueryHandler(super_user_set_name_start, pattern=callback_prefix("super_user_set_name_")),
+        ],
         per_message=False,
+        allow_reentry=True,
         states={
-            USER_NAME_INPUT: [MessageHandler(filters.TEXT & ~filters.COMMAND, super_user_set_name_input)],
+            SUPER_ADD_GROUP_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND & SUPER_ADMIN_FILTER, super_add_group_name_input)],
+            SUPER_RENAME_GROUP_INPUT: [MessageHandler(filters.TEXT & ~filters.COMMAND & SUPER_ADMIN_FILTER, super_rename_group_input)],
+            USER_NAME_INPUT: [MessageHandler(filters.TEXT & ~filters.COMMAND & SUPER_ADMIN_FILTER, super_user_set_name_input)],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
     )
-    application.add_handler(super_user_set_name_conv)
+    application.add_handler(super_text_input_conv)
 
     # Task editing conversation
     edit_task_conv_handler = ConversationHandler(
-        entry_points=[CallbackQueryHandler(edit_task_handler, pattern="^edit_task_.*")],
+        entry_points=[CallbackQueryHandler(edit_task_handler, pattern=callback_prefix("edit_task_"))],
         per_message=False,
         states={
             EDIT_TASK_MENU: [
-                CallbackQueryHandler(exit_task_editing, pattern="^exit_task_editing_.*"),
-                CallbackQueryHandler(edit_task_field_handler, pattern="^edit_task_field_.*"),
-                CallbackQueryHandler(back_to_edit_menu, pattern="^back_to_edit_menu_.*"),
+                CallbackQueryHandler(exit_task_editing, pattern=callback_prefix("exit_task_editing_")),
+                CallbackQueryHandler(edit_task_field_handler, pattern=callback_prefix("edit_task_field_")),
+                CallbackQueryHandler(back_to_edit_menu, pattern=BACK_TO_EDIT_MENU),
             ],
             EDIT_TASK_TITLE: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, edit_title_input),
-                CallbackQueryHandler(back_to_edit_menu, pattern="^back_to_edit_menu_.*"),
+                CallbackQueryHandler(back_to_edit_menu, pattern=BACK_TO_EDIT_MENU),
             ],
             EDIT_TASK_DESCRIPTION: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, edit_description_input),
-                CallbackQueryHandler(back_to_edit_menu, pattern="^back_to_edit_menu_.*"),
+                CallbackQueryHandler(back_to_edit_menu, pattern=BACK_TO_EDIT_MENU),
             ],
             EDIT_TASK_STATUS: [
-                CallbackQueryHandler(edit_status_select, pattern="^edit_status_select_.*"),
-                CallbackQueryHandler(back_to_edit_menu, pattern="^back_to_edit_menu_.*"),
+                CallbackQueryHandler(edit_status_select, pattern=callback_prefix("edit_status_select_")),
+                CallbackQueryHandler(back_to_edit_menu, pattern=BACK_TO_EDIT_MENU),
             ],
             EDIT_TASK_MEDIA: [
-                CallbackQueryHandler(edit_media_delete, pattern="^edit_media_delete_.*"),
-                CallbackQueryHandler(delete_media_file, pattern="^delete_media_file_.*"),
-                CallbackQueryHandler(edit_media_add, pattern="^edit_media_add_.*"),
+                CallbackQueryHandler(edit_media_delete, pattern=callback_prefix("edit_media_delete_")),
+                CallbackQueryHandler(delete_media_file, pattern=callback_prefix("delete_media_file_")),
+                CallbackQueryHandler(edit_media_add, pattern=callback_prefix("edit_media_add_")),
                 MessageHandler(filters.PHOTO | filters.VIDEO, handle_edit_media_file),
-                CallbackQueryHandler(back_to_edit_menu, pattern="^back_to_edit_menu_.*"),
+                CallbackQueryHandler(back_to_edit_menu, pattern=BACK_TO_EDIT_MENU),
             ],
             EDIT_TASK_USERS: [
-                CallbackQueryHandler(edit_toggle_user, pattern="^edit_toggle_user_.*"),
-                CallbackQueryHandler(edit_users_done, pattern="^edit_users_done_.*"),
-                CallbackQueryHandler(back_to_edit_menu, pattern="^back_to_edit_menu_.*"),
+                CallbackQueryHandler(edit_toggle_user, pattern=callback_prefix("edit_toggle_user_")),
+                CallbackQueryHandler(edit_users_done, pattern=callback_prefix("edit_users_done_")),
+                CallbackQueryHandler(back_to_edit_menu, pattern=BACK_TO_EDIT_MENU),
             ],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
     )
     application.add_handler(edit_task_conv_handler)
     
-    # Callback query handler for buttons
-    application.add_handler(CallbackQueryHandler(button_callback))
+    # Callback query handler for buttons (catch-all, outside any conversation, so non-blocking)
+    application.add_handler(CallbackQueryHandler(button_callback, block=False))
+    
+    # Schedule deadline reminders (each run sleeps until the next deadline, at most 30 minutes)
+    schedule_deadline_reminder(application.job_queue, when=10)
     
-    # Schedule deadline reminders (check every 30 minutes)
-    job_queue = application.job_queue
-    job_queue.run_repeating(send_deadline_reminder, interval=1800, first=10)  # 1800 seconds = 30 minutes
+    # Resend notifications that failed transiently (queued in the DB, so they survive restarts)
+    application.job_queue.run_repeating(retry_failed_notifications, interval=60, first=30,
+                                        name="notification_retries")
     
-    # Start in debug or production mode
+    # Receive updates by webhook when USE_WEBHOOK is set, otherwise by polling
     config_info = Config.get_info()
     logger.info(f"Bot configuration: {config_info}")
     
-    if Config.DEBUG:
-        # Debug mode: use polling for local development
-        logger.info("[BOT] Running in DEBUG mode (polling)")
-        print("[BOT] Bot started in DEBUG mode. Press Ctrl+C to stop.")
-        print("[BOT] Deadline reminder job scheduled (checks every 30 minutes)")
-        application.run_polling(allowed_updates=Update.ALL_TYPES, timeout=Config.POLLING_TIMEOUT)
+    if not Config.USE_WEBHOOK:
+        # Polling: local development, or hosts without a public URL
+        logger.info("[BOT] Running in polling mode")
+        print("[BOT] Bot started in polling mode. Press Ctrl+C to stop.")
+        print("[BOT] Deadline reminder job scheduled (wakes at the next deadline, at least every 30 minutes)")
+        application.run_polling(allowed_updates=ALLOWED_UPDATES, timeout=Config.POLLING_TIMEOUT)
     else:
-        # Production mode: use webhook for Railway
-        logger.info(f"[BOT] Running in PRODUCTION mode (webhook)")
+        # Webhook: Telegram pushes updates, no long-poll requests while idle
+        logger.info(f"[BOT] Running in webhook mode")
         # Use python-telegram-bot's built-in webhook support
         webhook_url = f"{Config.RAILWAY_URL}/webhook"
         
-        print(f"[BOT] Bot started in PRODUCTION mode")
+        print(f"[BOT] Bot started in webhook mode")
         print(f"[BOT] Webhook URL: {webhook_url}")
         print(f"[BOT] Listening on 0.0.0.0:{Config.PORT}")
         
@@ -537,16 +568,33 @@ def start_bot():
             port=Config.PORT,
             url_path="/webhook",
             webhook_url=webhook_url,
-            allowed_updates=Update.ALL_TYPES
+            allowed_updates=ALLOWED_UPDATES
         )
     
     return application
 
 
 
+def install_uvloop():
+    """Use uvloop's event loop when it is installed (Linux/macOS); otherwise keep asyncio's default."""
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not installed, using the default asyncio event loop")
+        return False
+    uvloop.install()
+    logger.info("Using uvloop event loop")
+    return True
+
+
 def main():
-    """Main entry point."""
+    """Main entry point. `python bot.py --migrate` only creates/upgrades the schema."""
+    if "--migrate" in sys.argv[1:]:
+        init_db()
+        logger.info("Database schema is up to date")
+        return
     try:
+        install_uvloop()
         start_bot()
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
@@ -27,6 +27,10 @@ class Config:
     # Telegram settings
     TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
     SUPER_ADMIN_ID = os.getenv("SUPER_ADMIN_ID")
+    # Parsed once from the comma-separated SUPER_ADMIN_ID (frozenset for O(1) membership checks)
+    SUPER_ADMIN_IDS = frozenset(
+        int(id.strip()) for id in (SUPER_ADMIN_ID or "0").split(",") if id.strip()
+    )
     
     # Database settings (PostgreSQL only)
     DATABASE_URL = os.getenv("DATABASE_URL")
@@ -38,10 +42,23 @@ class Config:
     RAILWAY_URL = os.getenv("RAILWAY_URL")
     PORT = int(os.getenv("PORT", 5000))
     
-    # Polling settings (for DEBUG mode)
+    # Polling settings (when USE_WEBHOOK is off)
     POLLING_TIMEOUT = 30  # seconds
     POLLING_INTERVAL = 0.5  # seconds between polling checks
     
+    # Bot API HTTP client settings
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 256))
+    HTTP_POOL_TIMEOUT = 5.0  # seconds to wait for a free connection
+    HTTP_CONNECT_TIMEOUT = 5.0  # seconds
+    HTTP_READ_TIMEOUT = 10.0  # seconds
+    HTTP_VERSION = os.getenv("HTTP_VERSION", "2")  # "2" multiplexes sends over one connection, "1.1" to opt out
+    
+    # Max updates processed at once (concurrent_updates(True) would mean 256)
+    CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", 32))
+    
+    # Notification fan-out settings
+    NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", 5))  # max in-flight notification sends
+    
     # Task check settings
     TASKS_CHECK_TIME = os.getenv("TASKS_CHECK_TIME", "20:00")
     TIMEZONE = os.getenv("TIMEZONE", "Europe/Kyiv")
@@ -6,223 +6,234 @@ and tracking performance metrics.
 Uses PostgreSQL exclusively (local or Railway) with connection pooling.
 """
 import logging
+import threading
+import weakref
 from datetime import datetime
 from contextlib import contextmanager
+from psycopg2.extras import execute_values
 from db_postgres import get_db_connection
 
-# Track pool instance for connection management
-_db_pool_instance = None
-
-# Set up logging
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
-)
+# Hot-path queries (run on nearly every update), prepared server-side once per pooled
+# connection so PostgreSQL skips parsing and planning them on every later call
+SQL_GET_USER_BY_ID = "SELECT user_id, name, banned, bot_blocked FROM users WHERE user_id = $1"
+SQL_GET_ADMIN_GROUP_IDS = "SELECT group_id FROM group_admins WHERE admin_id = $1"
+SQL_GET_GROUP = "SELECT group_id, name, admin_id FROM groups WHERE group_id = $1"
+SQL_GET_TASK_BY_ID = """SELECT task_id, title, date, time, description, group_id,
+                               assigned_to_list, status, has_media, created_by, created_at
+                        FROM tasks WHERE task_id = $1"""
+
+PREPARED_STATEMENTS = {
+    "get_user_by_id": SQL_GET_USER_BY_ID,
+    "get_admin_group_ids": SQL_GET_ADMIN_GROUP_IDS,
+    "get_group": SQL_GET_GROUP,
+    "get_task_by_id": SQL_GET_TASK_BY_ID,
+}
+
+# Raw pooled connection -> names already prepared on it (dropped with the connection)
+_prepared_names = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+# Logging is configured by the entry point (bot.py), not by this module
 logger = logging.getLogger(__name__)
 
 
+# Schema, sent to PostgreSQL as one script (a single round trip at startup)
+_INIT_DDL = """
+-- Users table first (no dependencies)
+CREATE TABLE IF NOT EXISTS users (
+    user_id BIGINT PRIMARY KEY,
+    name TEXT NOT NULL,
+    username TEXT,
+    group_id INTEGER,
+    registered INTEGER DEFAULT 0,
+    banned INTEGER DEFAULT 0,
+    deleted INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Groups table (after users exists)
+CREATE TABLE IF NOT EXISTS groups (
+    group_id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    admin_id BIGINT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (admin_id) REFERENCES users(user_id)
+);
+
+-- group_id foreign key on users (after groups exists; skipped if already there)
+DO $$
+BEGIN
+    ALTER TABLE users
+    ADD CONSTRAINT fk_user_group FOREIGN KEY (group_id) REFERENCES groups(group_id);
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+-- Set when a notification fails with Forbidden (user blocked the bot), cleared on /start
+ALTER TABLE users ADD COLUMN IF NOT EXISTS bot_blocked INTEGER DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id SERIAL PRIMARY KEY,
+    title TEXT,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    description TEXT NOT NULL,
+    group_id INTEGER NOT NULL,
+    assigned_to_list TEXT,
+    has_media INTEGER DEFAULT 0,
+    status TEXT DEFAULT 'pending',
+    created_by BIGINT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (group_id) REFERENCES groups(group_id),
+    FOREIGN KEY (created_by) REFERENCES users(user_id)
+);
+
+CREATE TABLE IF NOT EXISTS task_media (
+    media_id SERIAL PRIMARY KEY,
+    task_id INTEGER NOT NULL,
+    file_id TEXT NOT NULL,
+    file_type TEXT NOT NULL,
+    file_name TEXT,
+    file_size INTEGER,
+    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (task_id) REFERENCES tasks(task_id)
+);
+
+CREATE TABLE IF NOT EXISTS task_history (
+    history_id SERIAL PRIMARY KEY,
+    task_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    old_value TEXT,
+    new_value TEXT,
+    changed_by BIGINT,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (task_id) REFERENCES tasks(task_id),
+    FOREIGN KEY (changed_by) REFERENCES users(user_id)
+);
+
+CREATE TABLE IF NOT EXISTS registration_requests (
+    request_id SERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    username TEXT,
+    status TEXT DEFAULT 'pending',
+    requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    reviewed_by BIGINT,
+    reviewed_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS group_admins (
+    id SERIAL PRIMARY KEY,
+    group_id INTEGER NOT NULL,
+    admin_id BIGINT NOT NULL,
+    assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (group_id) REFERENCES groups(group_id) ON DELETE CASCADE,
+    FOREIGN KEY (admin_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    UNIQUE(group_id, admin_id)
+);
+
+CREATE TABLE IF NOT EXISTS user_groups (
+    id SERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    group_id INTEGER NOT NULL,
+    assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (group_id) REFERENCES groups(group_id) ON DELETE CASCADE,
+    UNIQUE(user_id, group_id)
+);
+
+CREATE TABLE IF NOT EXISTS task_assignees (
+    id SERIAL PRIMARY KEY,
+    task_id INTEGER NOT NULL,
+    user_id BIGINT NOT NULL,
+    status TEXT DEFAULT 'pending',
+    assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status_updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (task_id) REFERENCES tasks(task_id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    UNIQUE(task_id, user_id)
+);
+
+-- Assignee lookups on the JSON list (used by get_user_tasks)
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_to_list
+ON tasks USING GIN ((assigned_to_list::jsonb));
+
+-- The other hot lookup columns that no primary key or UNIQUE constraint leads with
+CREATE INDEX IF NOT EXISTS idx_tasks_group_id ON tasks (group_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_by ON tasks (created_by);
+CREATE INDEX IF NOT EXISTS idx_task_media_task_id ON task_media (task_id);
+CREATE INDEX IF NOT EXISTS idx_group_admins_admin_id ON group_admins (admin_id);
+CREATE INDEX IF NOT EXISTS idx_user_groups_group_id ON user_groups (group_id);
+
+-- User lists (get_all_users, get_users_without_group) read live users in name order
+CREATE INDEX IF NOT EXISTS idx_users_active_name ON users (name) WHERE deleted = 0;
+-- Task lists are returned newest first
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at DESC);
+
+-- Notifications whose send failed transiently, retried by a background job
+CREATE TABLE IF NOT EXISTS notification_retries (
+    retry_id SERIAL PRIMARY KEY,
+    chat_id BIGINT NOT NULL,
+    text TEXT NOT NULL,
+    reply_markup TEXT,
+    attempts INTEGER DEFAULT 0,
+    next_try TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_notification_retries_next_try ON notification_retries (next_try);
+"""
+
+
 def init_db():
     """Initialize database tables if they don't exist."""
     try:
-        db_conn = get_db_connection()
-        conn = db_conn.get_connection()
-        cursor = conn.cursor()
-        logger.info("Database connection established successfully")
-        
-        # Note: init_db doesn't use context manager as it's special initialization
-        # We'll return the connection manually at the end
+        with _cursor(commit=True) as cursor:
+            cursor.execute(_INIT_DDL)
     except Exception as e:
-        logger.error(f"Failed to connect to database during initialization: {e}")
+        logger.error(f"Failed to initialize database: {e}")
         raise
-    
-    # Create users table first (no dependencies)
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        user_id BIGINT PRIMARY KEY,
-        name TEXT NOT NULL,
-        username TEXT,
-        group_id INTEGER,
-        registered INTEGER DEFAULT 0,
-        banned INTEGER DEFAULT 0,
-        deleted INTEGER DEFAULT 0,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    # Create groups table (after users exists)
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS groups (
-        group_id SERIAL PRIMARY KEY,
-        name TEXT NOT NULL UNIQUE,
-        admin_id BIGINT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (admin_id) REFERENCES users(user_id)
-    )
-    ''')
-    
-    # Add group_id foreign key to users (after groups exists)
-    try:
-        cursor.execute('''
-        ALTER TABLE users
-        ADD CONSTRAINT fk_user_group FOREIGN KEY (group_id) REFERENCES groups(group_id)
-        ''')
-    except Exception:
-        pass  # Constraint might already exist
-    
-    # Create tasks table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS tasks (
-        task_id SERIAL PRIMARY KEY,
-        title TEXT,
-        date TEXT NOT NULL,
-        time TEXT NOT NULL,
-        description TEXT NOT NULL,
-        group_id INTEGER NOT NULL,
-        assigned_to_list TEXT,
-        has_media INTEGER DEFAULT 0,
-        status TEXT DEFAULT 'pending',
-        created_by BIGINT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (group_id) REFERENCES groups(group_id),
-        FOREIGN KEY (created_by) REFERENCES users(user_id)
-    )
-    ''')
-    
-    # Create task_media table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS task_media (
-        media_id SERIAL PRIMARY KEY,
-        task_id INTEGER NOT NULL,
-        file_id TEXT NOT NULL,
-        file_type TEXT NOT NULL,
-        file_name TEXT,
-        file_size INTEGER,
-        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (task_id) REFERENCES tasks(task_id)
-    )
-    ''')
-    
-    # Create task_history table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS task_history (
-        history_id SERIAL PRIMARY KEY,
-        task_id INTEGER NOT NULL,
-        action TEXT NOT NULL,
-        old_value TEXT,
-        new_value TEXT,
-        changed_by BIGINT,
-        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (task_id) REFERENCES tasks(task_id),
-        FOREIGN KEY (changed_by) REFERENCES users(user_id)
-    )
-    ''')
-    
-    # Create registration_requests table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS registration_requests (
-        request_id SERIAL PRIMARY KEY,
-        user_id BIGINT NOT NULL UNIQUE,
-        name TEXT NOT NULL,
-        username TEXT,
-        status TEXT DEFAULT 'pending',
-        requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        reviewed_by BIGINT,
-        reviewed_at TIMESTAMP
-    )
-    ''')
-    
-    # Create group_admins table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS group_admins (
-        id SERIAL PRIMARY KEY,
-        group_id INTEGER NOT NULL,
-        admin_id BIGINT NOT NULL,
-        assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (group_id) REFERENCES groups(group_id) ON DELETE CASCADE,
-        FOREIGN KEY (admin_id) REFERENCES users(user_id) ON DELETE CASCADE,
-        UNIQUE(group_id, admin_id)
-    )
-    ''')
-    
-    # Create user_groups table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS user_groups (
-        id SERIAL PRIMARY KEY,
-        user_id BIGINT NOT NULL,
-        group_id INTEGER NOT NULL,
-        assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
-        FOREIGN KEY (group_id) REFERENCES groups(group_id) ON DELETE CASCADE,
-        UNIQUE(user_id, group_id)
-    )
-    ''')
-    
-    # Create task_assignees table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS task_assignees (
-        id SERIAL PRIMARY KEY,
-        task_id INTEGER NOT NULL,
-        user_id BIGINT NOT NULL,
-        status TEXT DEFAULT 'pending',
-        assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        status_updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (task_id) REFERENCES tasks(task_id) ON DELETE CASCADE,
-        FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
-        UNIQUE(task_id, user_id)
-    )
-    ''')
-    
-    conn.commit()
-    conn.close()  # Will automatically return to pool
     logger.info("Database initialized")
 
 
-class _PoolAwareConnection:
-    """Wrapper around psycopg2 connection that returns to pool on close()"""
-    def __init__(self, conn, pool_instance):
-        self._conn = conn
-        self._pool_instance = pool_instance
-        self._returned = False
-    
-    def close(self):
-        """Close connection by returning it to the pool"""
-        if not self._returned:
-            try:
-                self._pool_instance.return_connection(self._conn)
-                self._returned = True
-            except Exception:
-                # If return fails, close for real as fallback
-                try:
-                    self._conn.close()
-                except Exception:
-                    pass
-    
-    def __getattr__(self, name):
-        """Proxy all other attributes to the wrapped connection"""
-        return getattr(self._conn, name)
-    
-    def __enter__(self):
-        return self
-    
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
-
-
-def _get_db_connection():
+@contextmanager
+def _cursor(commit=False):
     """
-    Get database connection from pool.
-    Automatically returns to pool when conn.close() is called.
-    """
-    global _db_pool_instance
+    Borrow a pooled connection for one DAL call and yield a cursor on it.
     
+    Pooled connections run in autocommit mode, so without commit=True every statement
+    commits on its own (fine for reads). With commit=True the block runs as a single
+    transaction: committed on success, rolled back if the block raises. The connection
+    is always put back in autocommit mode and returned to the pool.
+    """
     db_conn = get_db_connection()
     conn = db_conn.get_connection()
-    
-    # Store pool reference for later cleanup
-    _db_pool_instance = db_conn
-    
-    # Wrap connection to return to pool on close()
-    return _PoolAwareConnection(conn, db_conn)
+    if commit:
+        conn.autocommit = False
+    try:
+        yield conn.cursor()
+        if commit:
+            conn.commit()
+    except Exception:
+        if commit and not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        try:
+            if commit and not conn.closed:
+                conn.autocommit = True
+        finally:
+            db_conn.return_connection(conn)
+
+
+def _execute_prepared(cursor, name, params):
+    """Run one of PREPARED_STATEMENTS, preparing it on the cursor's connection first if needed."""
+    with _prepared_lock:
+        prepared = _prepared_names.setdefault(cursor.connection, set())
+    if name not in prepared:
+        cursor.execute(f"PREPARE {name} AS {PREPARED_STATEMENTS[name]}")
+        prepared.add(name)
+    placeholders = ", ".join(["%s"] * len(params))
+    cursor.execute(f"EXECUTE {name} ({placeholders})", params)
 
 
 def add_user(user_id, name, username=None):
@@ -237,27 +248,26 @@ def add_user(user_id, name, username=None):
     Returns:
         bool: True if user was added, False if user already exists
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute("SELECT user_id FROM users WHERE user_id = %s", (user_id,))
-        if cursor.fetchone():
-            # user already exists
-            conn.close()
-            return False
-        
-        cursor.execute(
-            "INSERT INTO users (user_id, name, username) VALUES (%s, %s, %s)",
-            (user_id, name, username)
-        )
-        conn.commit()
-        conn.close()
-        logger.info(f"Added user {name} (ID: {user_id}, username: {username})")
-        return True
+        with _cursor(commit=True) as cursor:
+            # One round trip: no row comes back if the user already exists
+            cursor.execute(
+                """INSERT INTO users (user_id, name, username) VALUES (%s, %s, %s)
+                   ON CONFLICT (user_id) DO NOTHING RETURNING user_id""",
+                (user_id, name, username)
+            )
+            if cursor.fetchone() is None:
+                # user already exists
+                return False
+        
+            # Invalidate cache
+            from simple_cache import get_cache
+            get_cache().invalidate("all_users")
+            get_cache().invalidate(f"user_{user_id}")
+            logger.debug("Added user %s (ID: %s, username: %s)", name, user_id, username)
+            return True
     except Exception as e:
         logger.error(f"Error adding user: {e}")
-        conn.close()
         return False
 
 def remove_user(user_id):
@@ -270,128 +280,187 @@ def remove_user(user_id):
     Returns:
         bool: True if user was removed, False if user doesn't exist
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute("SELECT user_id FROM users WHERE user_id = %s", (user_id,))
-        if not cursor.fetchone():
-            # user doesn't exist
-            conn.close()
-            return False
+        with _cursor(commit=True) as cursor:
+            cursor.execute("DELETE FROM users WHERE user_id = %s RETURNING user_id", (user_id,))
+            if cursor.fetchone() is None:
+                # user doesn't exist
+                return False
         
-        cursor.execute("DELETE FROM users WHERE user_id = %s", (user_id,))
-        conn.commit()
-        conn.close()
-        logger.info(f"Removed user with ID: {user_id}")
-        return True
+            # Invalidate cache
+            from simple_cache import get_cache
+            get_cache().invalidate("all_users")
+            get_cache().invalidate(f"user_{user_id}")
+            logger.info("Removed user with ID: %s", user_id)
+            return True
     except Exception as e:
         logger.error(f"Error removing user: {e}")
-        conn.close()
         return False
 
 def get_all_users():
     """
     Get all registered users (excluding deleted users, including banned status).
     Includes group admins even if they're not in user_groups.
+    Results are cached for 30 seconds and invalidated on user/membership changes.
     
     Returns:
         list: List of dictionaries containing user information with group_name and all_groups
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
+    from simple_cache import get_cache
+    
+    # Try cache first (TTL 30 seconds)
+    cache_key = "all_users"
+    cached_result = get_cache().get(cache_key)
+    if cached_result is not None:
+        return cached_result
     
     try:
-        cursor.execute("""
-            SELECT DISTINCT u.user_id, u.name, u.username, u.banned,
-                   STRING_AGG(DISTINCT g.group_id::text, ',') as group_ids,
-                   STRING_AGG(DISTINCT g.name, ',') as group_names
-            FROM users u
-            LEFT JOIN user_groups ug ON u.user_id = ug.user_id
-            LEFT JOIN groups g ON ug.group_id = g.group_id
-            WHERE u.deleted = 0
-            GROUP BY u.user_id, u.name, u.username, u.banned
-            ORDER BY u.name
-        """)
-        rows = cursor.fetchall()
-        users = []
-        for row in rows:
-            # Parse group_ids and group_names (convert tuple to dict)
-            user_id = row[0]
-            name = row[1]
-            username = row[2]
-            banned = row[3]
-            group_ids_str = row[4] if row[4] else ""
-            group_names_str = row[5] if row[5] else ""
+        with _cursor() as cursor:
+            cursor.execute("""
+                SELECT DISTINCT u.user_id, u.name, u.username, u.banned,
+                       array_agg(DISTINCT g.group_id) FILTER (WHERE g.group_id IS NOT NULL) as group_ids,
+                       array_agg(DISTINCT g.name) FILTER (WHERE g.name IS NOT NULL) as group_names
+                FROM users u
+                LEFT JOIN user_groups ug ON u.user_id = ug.user_id
+                LEFT JOIN groups g ON ug.group_id = g.group_id
+                WHERE u.deleted = 0
+                GROUP BY u.user_id, u.name, u.username, u.banned
+                ORDER BY u.name
+            """)
+            rows = cursor.fetchall()
+            users = []
+            for row in rows:
+                # Parse group_ids and group_names (convert tuple to dict)
+                user_id = row[0]
+                name = row[1]
+                username = row[2]
+                banned = row[3]
+                # psycopg2 returns the aggregated arrays as lists (None when no groups)
+                group_ids = row[4] or []
+                group_names = row[5] or []
             
-            # Get first group (for backwards compatibility)
-            group_id = int(group_ids_str.split(',')[0]) if group_ids_str else None
-            group_name = group_names_str.split(',')[0] if group_names_str else None
+                # Get first group (for backwards compatibility)
+                group_id = group_ids[0] if group_ids else None
+                group_name = group_names[0] if group_names else None
             
-            users.append({
-                "user_id": user_id,
-                "name": name,
-                "username": username,
-                "group_id": group_id,
-                "group_name": group_name,
-                "all_groups": group_names_str,  # All groups comma-separated
-                "banned": banned
-            })
-        conn.close()
-        return users
+                users.append({
+                    "user_id": user_id,
+                    "name": name,
+                    "username": username,
+                    "group_id": group_id,
+                    "group_name": group_name,
+                    "all_groups": ",".join(group_names),  # All groups comma-separated
+                    "banned": banned
+                })
+        
+            # Cache result for 30 seconds
+            get_cache().set(cache_key, users, ttl=30)
+            return users
     except Exception as e:
         logger.error(f"Error getting users: {e}")
-        conn.close()
         return []
 
 
 def get_users_without_group():
     """Get all users without any group assigned (using user_groups table)."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
     try:
-        # Get users who are NOT in user_groups table and NOT deleted
-        cursor.execute("""
-            SELECT u.user_id, u.name 
-            FROM users u
-            WHERE u.deleted = 0
-            AND u.user_id NOT IN (SELECT DISTINCT user_id FROM user_groups)
-            ORDER BY u.name
-        """)
-        users = [{"user_id": row[0], "name": row[1]} for row in cursor.fetchall()]
-        conn.close()
-        return users
+        with _cursor() as cursor:
+            # Get users who are NOT in user_groups table and NOT deleted
+            # (NOT EXISTS plans as a hash anti-join; NOT IN can't, because of its NULL semantics)
+            cursor.execute("""
+                SELECT u.user_id, u.name 
+                FROM users u
+                WHERE u.deleted = 0
+                AND NOT EXISTS (SELECT 1 FROM user_groups ug WHERE ug.user_id = u.user_id)
+                ORDER BY u.name
+            """)
+            users = [{"user_id": row[0], "name": row[1]} for row in cursor.fetchall()]
+            return users
     except Exception as e:
         logger.error(f"Error getting users without group: {e}")
-        conn.close()
         return []
 
+def _fetch_user_by_id(user_id):
+    """Load a user row by ID (uncached). Returns None if not found or on error."""
+    try:
+        with _cursor() as cursor:
+            _execute_prepared(cursor, "get_user_by_id", (user_id,))
+            row = cursor.fetchone()
+        
+            if row:
+                return {"user_id": row[0], "name": row[1], "banned": row[2], "bot_blocked": row[3]}
+            return None
+    except Exception as e:
+        logger.error(f"Error getting user: {e}")
+        return None
+
+
 def get_user_by_id(user_id):
     """
     Get user information by ID (including banned status).
     
+    Cached for 60 seconds (looked up on nearly every update) and invalidated
+    by every function that writes these columns.
+    
     Args:
         user_id (int): Telegram user ID of the user
         
     Returns:
         dict: user information or None if not found
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
+    from simple_cache import get_cache
     
+    return get_cache().get_or_fetch(f"user_{user_id}", lambda: _fetch_user_by_id(user_id), ttl=60)
+
+def _get_bot_blocked_ids():
+    """Load IDs of users who blocked the bot (uncached). Returns None on error."""
     try:
-        cursor.execute("SELECT user_id, name, banned FROM users WHERE user_id = %s", (user_id,))
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return {"user_id": row[0], "name": row[1], "banned": row[2]}
-        return None
+        with _cursor() as cursor:
+            cursor.execute("SELECT user_id FROM users WHERE bot_blocked = 1")
+            user_ids = frozenset(row[0] for row in cursor.fetchall())
+            return user_ids
     except Exception as e:
-        logger.error(f"Error getting user: {e}")
-        conn.close()
+        logger.error(f"Error getting users who blocked the bot: {e}")
         return None
 
+
+def get_bot_blocked_ids():
+    """
+    Get IDs of users who blocked the bot, so broadcasts can skip them.
+    
+    Cached for 5 minutes and invalidated by set_bot_blocked().
+    
+    Returns:
+        frozenset: user IDs (empty on error)
+    """
+    from simple_cache import get_cache
+    
+    return get_cache().get_or_fetch("bot_blocked_ids", _get_bot_blocked_ids) or frozenset()
+
+
+def set_bot_blocked(user_id, blocked):
+    """
+    Mark or unmark a user as having blocked the bot.
+    
+    Args:
+        user_id (int): Telegram user ID
+        blocked (bool): True when sending failed with Forbidden, False once they use the bot again
+        
+    Returns:
+        bool: True if successful
+    """
+    try:
+        with _cursor(commit=True) as cursor:
+            cursor.execute("UPDATE users SET bot_blocked = %s WHERE user_id = %s", (1 if blocked else 0, user_id))
+            from simple_cache import get_cache
+            get_cache().invalidate("bot_blocked_ids")
+            get_cache().invalidate(f"user_{user_id}")
+            return True
+    except Exception as e:
+        logger.error(f"Error updating bot_blocked for user {user_id}: {e}")
+        return False
+
+
 def user_exists(user_id):
     """
     Check if a user exists in the database.
@@ -402,18 +471,8 @@ def user_exists(user_id):
     Returns:
         bool: True if user exists, False otherwise
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute("SELECT user_id FROM users WHERE user_id = %s", (user_id,))
-        result = cursor.fetchone() is not None
-        conn.close()
-        return result
-    except Exception as e:
-        logger.error(f"Error checking user existence: {e}")
-        conn.close()
-        return False
+    # Served from the cached user row
+    return get_user_by_id(user_id) is not None
 
 def create_task(date, time, description):
     """
@@ -427,57 +486,17 @@ def create_task(date, time, description):
     Returns:
         int: ID of the created task, or None if creation failed
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            "INSERT INTO tasks (date, time, description) VALUES (%s, %s, %s) RETURNING task_id",
-            (date, time, description)
-        )
-        task_id = cursor.fetchone()[0]
-        conn.commit()
-        conn.close()
-        logger.info(f"Created task with ID: {task_id}")
-        return task_id
+        with _cursor(commit=True) as cursor:
+            cursor.execute(
+                "INSERT INTO tasks (date, time, description) VALUES (%s, %s, %s) RETURNING task_id",
+                (date, time, description)
+            )
+            task_id = cursor.fetchone()[0]
+            logger.info("Created task with ID: %s", task_id)
+            return task_id
     except Exception as e:
         logger.error(f"Error creating task: {e}")
-        conn.close()
-        return None
-
-def get_task_by_id(task_id):
-    """
-    Get task information by ID.
-    
-    Args:
-        task_id (int): ID of the task
-        
-    Returns:
-        dict: Task information or None if not found
-    """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute(
-            "SELECT task_id, date, time, description, assigned_to FROM tasks WHERE task_id = %s", 
-            (task_id,)
-        )
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return {
-                "task_id": row[0],
-                "date": row[1],
-                "time": row[2],
-                "description": row[3],
-                "assigned_to": row[4]
-            }
-        return None
-    except Exception as e:
-        logger.error(f"Error getting task: {e}")
-        conn.close()
         return None
 
 """ def update_task_status(task_id, user_id, response):
@@ -522,42 +541,6 @@ def get_task_by_id(task_id):
         conn.close()
         return False """
 
-def get_all_tasks():
-    """
-    Get all tasks.
-    
-    Returns:
-        list: List of dictionaries containing task information
-    """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute(
-            "SELECT t.task_id, t.date, t.time, t.description, t.assigned_to, u.name as user_name "
-            "FROM tasks t LEFT JOIN users u ON t.assigned_to = u.user_id "
-            "ORDER BY t.created_at DESC"
-        )
-        tasks = []
-        for row in cursor.fetchall():
-            task = {
-                'task_id': row[0],
-                'date': row[1],
-                'time': row[2],
-                'description': row[3],
-                'assigned_to': row[4],
-                'user_name': row[5]
-            }
-            if task["user_name"]:
-                task["assigned_to_name"] = task["user_name"]
-            tasks.append(task)
-        conn.close()
-        return tasks
-    except Exception as e:
-        logger.error(f"Error getting tasks: {e}")
-        conn.close()
-        return []
-
 """ def get_user_stats(user_id):
 
     #Get performance statistics for a user.
@@ -625,48 +608,49 @@ def create_group(name, admin_id = None):
     Returns:
         int: ID of the created group, or None if creation failed
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        if admin_id is None:
-            cursor.execute(
-                "INSERT INTO groups (name) VALUES (%s) RETURNING group_id",
-                (name,)
-            )
-        else:
-            cursor.execute(
-                "INSERT INTO groups (name, admin_id) VALUES (%s, %s) RETURNING group_id",
-                (name, admin_id)
-            )
+        with _cursor(commit=True) as cursor:
+            if admin_id is None:
+                cursor.execute(
+                    "INSERT INTO groups (name) VALUES (%s) RETURNING group_id",
+                    (name,)
+                )
+            else:
+                cursor.execute(
+                    "INSERT INTO groups (name, admin_id) VALUES (%s, %s) RETURNING group_id",
+                    (name, admin_id)
+                )
 
-        group_id = cursor.fetchone()[0]
-        conn.commit()
-        conn.close()
-        logger.info(f"Created group '{name}' (ID: {group_id})")
-        return group_id
+            group_id = cursor.fetchone()[0]
+            logger.info("Created group '%s' (ID: %s)", name, group_id)
+            return group_id
     except Exception as e:
         logger.error(f"Error creating group (likely duplicate name): {e}")
-        conn.close()
         return None
     
 
 def get_group(group_id):
-    """Get group information by ID."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
+    """Get group information by ID. Results are cached for 5 minutes."""
+    from simple_cache import get_cache
+    
+    # Try cache first (hit on every task card and group menu)
+    cache_key = f"group_{group_id}"
+    cached_result = get_cache().get(cache_key)
+    if cached_result is not None:
+        return cached_result
     
     try:
-        cursor.execute("SELECT group_id, name, admin_id FROM groups WHERE group_id = %s", (group_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with _cursor() as cursor:
+            _execute_prepared(cursor, "get_group", (group_id,))
+            row = cursor.fetchone()
         
-        if row:
-            return {"group_id": row[0], "name": row[1], "admin_id": row[2]}
-        return None
+            if row:
+                group = {"group_id": row[0], "name": row[1], "admin_id": row[2]}
+                get_cache().set(cache_key, group, ttl=300)
+                return group
+            return None
     except Exception as e:
         logger.error(f"Error getting group: {e}")
-        conn.close()
         return None
 
 
@@ -680,22 +664,18 @@ def get_all_groups():
     if cached_result is not None:
         return cached_result
     
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            "SELECT group_id, name, admin_id FROM groups ORDER BY name"
-        )
-        groups = [{"group_id": row[0], "name": row[1], "admin_id": row[2]} for row in cursor.fetchall()]
-        conn.close()
+        with _cursor() as cursor:
+            cursor.execute(
+                "SELECT group_id, name, admin_id FROM groups ORDER BY name"
+            )
+            groups = [{"group_id": row[0], "name": row[1], "admin_id": row[2]} for row in cursor.fetchall()]
         
-        # Cache result for 5 minutes
-        get_cache().set(cache_key, groups, ttl=300)
-        return groups
+            # Cache result for 5 minutes
+            get_cache().set(cache_key, groups, ttl=300)
+            return groups
     except Exception as e:
         logger.error(f"Error getting groups: {e}")
-        conn.close()
         return []
 
 
@@ -710,34 +690,31 @@ def update_group_admin(group_id, new_admin_id):
     Returns:
         bool: True if update was successful
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        # Check if new admin exists as a user (users table uses column 'user_id')
-        cursor.execute("SELECT user_id FROM users WHERE user_id = %s", (new_admin_id,))
-        if not cursor.fetchone():
-            logger.error(f"New admin user {new_admin_id} does not exist")
-            conn.close()
-            return False
-        
-        cursor.execute(
-            "UPDATE groups SET admin_id = %s WHERE group_id = %s",
-            (new_admin_id, group_id)
-        )
-        conn.commit()
-        conn.close()
-        
-        # Invalidate caches
-        from simple_cache import get_cache
-        get_cache().invalidate("all_groups")
-        get_cache().invalidate_pattern("user_groups_*")
-        
-        logger.info(f"Updated group {group_id} admin to {new_admin_id}")
-        return True
+        with _cursor(commit=True) as cursor:
+            # Join on users so the existence check and the update are one statement
+            cursor.execute(
+                """UPDATE groups g SET admin_id = u.user_id
+                   FROM users u
+                   WHERE u.user_id = %s AND g.group_id = %s
+                   RETURNING g.group_id""",
+                (new_admin_id, group_id)
+            )
+            if cursor.fetchone() is None:
+                logger.error(f"New admin user {new_admin_id} or group {group_id} does not exist")
+                return False
+        
+            # Invalidate caches
+            from simple_cache import get_cache
+            get_cache().invalidate("all_groups")
+            get_cache().invalidate_pattern("group_*")
+            get_cache().invalidate("all_users")
+            get_cache().invalidate_pattern("user_groups_*")
+        
+            logger.info("Updated group %s admin to %s", group_id, new_admin_id)
+            return True
     except Exception as e:
         logger.error(f"Error updating group admin: {e}")
-        conn.close()
         return False
 
 
@@ -760,56 +737,45 @@ def add_group_admin(group_id, admin_id):
     if not user_exists(admin_id):
         add_user(admin_id, f"User_{admin_id}", None)
     
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        # Check if group exists
-        cursor.execute("SELECT group_id FROM groups WHERE group_id = %s", (group_id,))
-        if not cursor.fetchone():
-            logger.error(f"Group {group_id} does not exist")
-            conn.close()
-            return False
+        with _cursor(commit=True) as cursor:
+            # Check if group exists
+            cursor.execute("SELECT group_id FROM groups WHERE group_id = %s", (group_id,))
+            if not cursor.fetchone():
+                logger.error(f"Group {group_id} does not exist")
+                return False
         
-        # Add to group_admins (will do nothing if already exists due to UNIQUE constraint)
-        try:
+            # Add to group_admins (does nothing if already there; a failed INSERT would abort the transaction)
             cursor.execute(
-                "INSERT INTO group_admins (group_id, admin_id) VALUES (%s, %s)",
+                "INSERT INTO group_admins (group_id, admin_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
                 (group_id, admin_id)
             )
-        except Exception:
-            # Already exists due to UNIQUE constraint
-            pass
         
-        # Also add to user_groups so admin can be seen as a member of the group
-        try:
+            # Also add to user_groups so admin can be seen as a member of the group
             cursor.execute(
-                "INSERT INTO user_groups (user_id, group_id) VALUES (%s, %s)",
+                "INSERT INTO user_groups (user_id, group_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
                 (admin_id, group_id)
             )
-        except Exception:
-            # Already exists due to UNIQUE constraint
-            pass
         
-        # Also update legacy admin_id field in groups table for backward compatibility
-        cursor.execute("SELECT admin_id FROM groups WHERE group_id = %s", (group_id,))
-        current_admin = cursor.fetchone()[0]
-        if current_admin is None:
-            cursor.execute("UPDATE groups SET admin_id = %s WHERE group_id = %s", (admin_id, group_id))
+            # Also update legacy admin_id field in groups table for backward compatibility
+            cursor.execute("SELECT admin_id FROM groups WHERE group_id = %s", (group_id,))
+            current_admin = cursor.fetchone()[0]
+            if current_admin is None:
+                cursor.execute("UPDATE groups SET admin_id = %s WHERE group_id = %s", (admin_id, group_id))
         
-        conn.commit()
-        conn.close()
         
-        # Invalidate caches
-        from simple_cache import get_cache
-        get_cache().invalidate("all_groups")
-        get_cache().invalidate_pattern("user_groups_*")
+            # Invalidate caches
+            from simple_cache import get_cache
+            get_cache().invalidate("all_groups")
+            get_cache().invalidate_pattern("group_*")
+            get_cache().invalidate("all_users")
+            get_cache().invalidate_pattern("user_groups_*")
+            get_cache().invalidate(f"admin_group_ids_{admin_id}")
         
-        logger.info(f"Added admin {admin_id} to group {group_id}")
-        return True
+            logger.info("Added admin %s to group %s", admin_id, group_id)
+            return True
     except Exception as e:
         logger.error(f"Error adding group admin: {e}")
-        conn.close()
         return False
 
 
@@ -824,37 +790,35 @@ def remove_group_admin(group_id, admin_id):
     Returns:
         bool: True if admin was removed successfully
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            "DELETE FROM group_admins WHERE group_id = %s AND admin_id = %s",
-            (group_id, admin_id)
-        )
-        
-        # Update legacy admin_id if this was the primary admin
-        cursor.execute("SELECT admin_id FROM groups WHERE group_id = %s AND admin_id = %s", (group_id, admin_id))
-        if cursor.fetchone():
-            # Find another admin to set as primary, or set to NULL
-            cursor.execute("SELECT admin_id FROM group_admins WHERE group_id = %s LIMIT 1", (group_id,))
-            new_primary = cursor.fetchone()
-            new_admin_id = new_primary[0] if new_primary else None
-            cursor.execute("UPDATE groups SET admin_id = %s WHERE group_id = %s", (new_admin_id, group_id))
-        
-        conn.commit()
-        conn.close()
-        
-        # Invalidate caches
-        from simple_cache import get_cache
-        get_cache().invalidate("all_groups")
-        get_cache().invalidate_pattern("user_groups_*")
+        with _cursor(commit=True) as cursor:
+            cursor.execute(
+                "DELETE FROM group_admins WHERE group_id = %s AND admin_id = %s",
+                (group_id, admin_id)
+            )
         
-        logger.info(f"Removed admin {admin_id} from group {group_id}")
-        return True
+            # Update legacy admin_id if this was the primary admin
+            cursor.execute("SELECT admin_id FROM groups WHERE group_id = %s AND admin_id = %s", (group_id, admin_id))
+            if cursor.fetchone():
+                # Find another admin to set as primary, or set to NULL
+                cursor.execute("SELECT admin_id FROM group_admins WHERE group_id = %s LIMIT 1", (group_id,))
+                new_primary = cursor.fetchone()
+                new_admin_id = new_primary[0] if new_primary else None
+                cursor.execute("UPDATE groups SET admin_id = %s WHERE group_id = %s", (new_admin_id, group_id))
+        
+        
+            # Invalidate caches
+            from simple_cache import get_cache
+            get_cache().invalidate("all_groups")
+            get_cache().invalidate_pattern("group_*")
+            get_cache().invalidate("all_users")
+            get_cache().invalidate_pattern("user_groups_*")
+            get_cache().invalidate(f"admin_group_ids_{admin_id}")
+        
+            logger.info("Removed admin %s from group %s", admin_id, group_id)
+            return True
     except Exception as e:
         logger.error(f"Error removing group admin: {e}")
-        conn.close()
         return False
 
 
@@ -868,20 +832,16 @@ def get_group_admins(group_id):
     Returns:
         list: List of user IDs who are admins of this group
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            "SELECT admin_id FROM group_admins WHERE group_id = %s",
-            (group_id,)
-        )
-        admins = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        return admins
+        with _cursor() as cursor:
+            cursor.execute(
+                "SELECT admin_id FROM group_admins WHERE group_id = %s",
+                (group_id,)
+            )
+            admins = [row[0] for row in cursor.fetchall()]
+            return admins
     except Exception as e:
         logger.error(f"Error getting group admins: {e}")
-        conn.close()
         return []
 
 
@@ -895,38 +855,49 @@ def get_admin_groups(admin_id):
     Returns:
         list: List of group dictionaries
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute('''
-            SELECT g.group_id, g.name, g.admin_id
-            FROM groups g
-            INNER JOIN group_admins ga ON g.group_id = ga.group_id
-            WHERE ga.admin_id = %s
-            ORDER BY g.name
-        ''', (admin_id,))
-        
-        groups = []
-        for row in cursor.fetchall():
-            groups.append({
-                "group_id": row[0],
-                "name": row[1],
-                "admin_id": row[2]
-            })
-        
-        conn.close()
-        return groups
+        with _cursor() as cursor:
+            cursor.execute('''
+                SELECT g.group_id, g.name, g.admin_id
+                FROM groups g
+                INNER JOIN group_admins ga ON g.group_id = ga.group_id
+                WHERE ga.admin_id = %s
+                ORDER BY g.name
+            ''', (admin_id,))
+        
+            groups = []
+            for row in cursor.fetchall():
+                groups.append({
+                    "group_id": row[0],
+                    "name": row[1],
+                    "admin_id": row[2]
+                })
+        
+            return groups
     except Exception as e:
         logger.error(f"Error getting admin groups: {e}")
-        conn.close()
         return []
 
 
+def _get_admin_group_ids(user_id):
+    """Return the set of group IDs the user administers (uncached)."""
+    try:
+        with _cursor() as cursor:
+            _execute_prepared(cursor, "get_admin_group_ids", (user_id,))
+            group_ids = frozenset(row[0] for row in cursor.fetchall())
+            return group_ids
+    except Exception as e:
+        logger.error(f"Error checking group admin: {e}")
+        return None
+
+
 def is_group_admin(user_id, group_id=None):
     """
     Check if user is a group admin.
     
+    The user's admin group IDs are cached for 60 seconds (checked on nearly every update)
+    and invalidated whenever group_admins changes.
+    
     Args:
         user_id (int): Telegram user ID
         group_id (int, optional): Specific group ID to check. If None, checks if admin of any group.
@@ -934,27 +905,17 @@ def is_group_admin(user_id, group_id=None):
     Returns:
         bool: True if user is an admin
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
+    from simple_cache import get_cache
     
-    try:
-        if group_id is None:
-            # Check if admin of any group
-            cursor.execute("SELECT COUNT(*) FROM group_admins WHERE admin_id = %s", (user_id,))
-        else:
-            # Check if admin of specific group
-            cursor.execute(
-                "SELECT COUNT(*) FROM group_admins WHERE admin_id = %s AND group_id = %s",
-                (user_id, group_id)
-            )
-        
-        count = cursor.fetchone()[0]
-        conn.close()
-        return count > 0
-    except Exception as e:
-        logger.error(f"Error checking group admin: {e}")
-        conn.close()
+    group_ids = get_cache().get_or_fetch(
+        f"admin_group_ids_{user_id}", lambda: _get_admin_group_ids(user_id), ttl=60
+    )
+    if not group_ids:
         return False
+    if group_id is None:
+        # Admin of any group
+        return True
+    return group_id in group_ids
 
 
 def get_group_by_admin_id(admin_id):
@@ -977,31 +938,27 @@ def update_group_name(group_id, new_name):
     Returns:
         bool: True if update was successful, False otherwise
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            "UPDATE groups SET name = %s WHERE group_id = %s",
-            (new_name, group_id)
-        )
-        conn.commit()
+        with _cursor(commit=True) as cursor:
+            cursor.execute(
+                "UPDATE groups SET name = %s WHERE group_id = %s",
+                (new_name, group_id)
+            )
         
-        # Invalidate caches
-        from simple_cache import get_cache
-        get_cache().invalidate("all_groups")
-        get_cache().invalidate_pattern("user_groups_*")
+            # Invalidate caches
+            from simple_cache import get_cache
+            get_cache().invalidate("all_groups")
+            get_cache().invalidate_pattern("group_*")
+            get_cache().invalidate("all_users")
+            get_cache().invalidate_pattern("user_groups_*")
         
-        conn.close()
-        logger.info(f"Updated group {group_id} name to '{new_name}'")
-        return True
+            logger.info("Updated group %s name to '%s'", group_id, new_name)
+            return True
     except Exception as e:
         logger.error(f"Error updating group name (likely duplicate): {e}")
-        conn.close()
         return False
     except Exception as e:
         logger.error(f"Error updating group name: {e}")
-        conn.close()
         return False
 
 
@@ -1015,58 +972,50 @@ def delete_task(task_id):
     Returns:
         bool: True if deletion was successful, False otherwise
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        # Delete in correct order to respect FK constraints
-        # 1. Delete task history (references tasks)
-        cursor.execute(
-            "DELETE FROM task_history WHERE task_id = %s",
-            (task_id,)
-        )
-        
-        # 2. Delete assignee statuses for this task (if table exists)
-        try:
+        with _cursor(commit=True) as cursor:
+            # Delete in correct order to respect FK constraints
+            # 1. Delete task history (references tasks)
             cursor.execute(
-                "DELETE FROM assignee_status WHERE task_id = %s",
+                "DELETE FROM task_history WHERE task_id = %s",
                 (task_id,)
             )
-        except Exception:
-            # Table might not exist, ignore
-            pass
         
-        # 3. Delete all media files associated with this task
-        cursor.execute(
-            "DELETE FROM task_media WHERE task_id = %s",
-            (task_id,)
-        )
+            # 2. Delete assignee statuses for this task (legacy table, only if it exists;
+            #    a failed DELETE would abort the transaction)
+            cursor.execute("SELECT to_regclass('assignee_status')")
+            if cursor.fetchone()[0] is not None:
+                cursor.execute(
+                    "DELETE FROM assignee_status WHERE task_id = %s",
+                    (task_id,)
+                )
         
-        # 4. Delete the task
-        cursor.execute(
-            "DELETE FROM tasks WHERE task_id = %s",
-            (task_id,)
-        )
+            # 3. Delete all media files associated with this task
+            cursor.execute(
+                "DELETE FROM task_media WHERE task_id = %s",
+                (task_id,)
+            )
         
-        # Check rows_deleted BEFORE commit and close
-        rows_deleted = cursor.rowcount
-        conn.commit()
+            # 4. Delete the task
+            cursor.execute(
+                "DELETE FROM tasks WHERE task_id = %s",
+                (task_id,)
+            )
         
-        logger.info(f"Delete attempt for task {task_id}: {rows_deleted} rows affected")
+            # Check rows_deleted BEFORE commit and close
+            rows_deleted = cursor.rowcount
         
-        if rows_deleted > 0:
-            logger.info(f"Successfully deleted task {task_id} and its media files")
-            return True
-        else:
-            logger.warning(f"Task {task_id} not found for deletion")
-            return False
+            logger.debug("Delete attempt for task %s: %s rows affected", task_id, rows_deleted)
+        
+            if rows_deleted > 0:
+                logger.info("Successfully deleted task %s and its media files", task_id)
+                return True
+            else:
+                logger.warning(f"Task {task_id} not found for deletion")
+                return False
     except Exception as e:
         logger.error(f"Error deleting task {task_id}: {e}", exc_info=True)
-        conn.commit()  # Rollback by not committing, but close connection properly
         return False
-    finally:
-        # Always close the connection to return it to the pool
-        conn.close()
 
 
 def delete_group(group_id):
@@ -1080,43 +1029,40 @@ def delete_group(group_id):
     Returns:
         bool: True if deletion was successful, False otherwise
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        # First, unassign all users from this group
-        cursor.execute(
-            "UPDATE users SET group_id = NULL WHERE group_id = %s",
-            (group_id,)
-        )
+        with _cursor(commit=True) as cursor:
+            # First, unassign all users from this group
+            cursor.execute(
+                "UPDATE users SET group_id = NULL WHERE group_id = %s",
+                (group_id,)
+            )
         
-        # Cancel all tasks associated with this group
-        cursor.execute(
-            "UPDATE tasks SET status = 'cancelled' WHERE group_id = %s",
-            (group_id,)
-        )
+            # Cancel all tasks associated with this group
+            cursor.execute(
+                "UPDATE tasks SET status = 'cancelled' WHERE group_id = %s",
+                (group_id,)
+            )
         
-        # Delete the group
-        cursor.execute(
-            "DELETE FROM groups WHERE group_id = %s",
-            (group_id,)
-        )
+            # Delete the group
+            cursor.execute(
+                "DELETE FROM groups WHERE group_id = %s",
+                (group_id,)
+            )
         
-        conn.commit()
         
-        # Invalidate caches
-        from simple_cache import get_cache
-        get_cache().invalidate("all_groups")
-        get_cache().invalidate_pattern("user_groups_*")
+            # Invalidate caches
+            from simple_cache import get_cache
+            get_cache().invalidate("all_groups")
+            get_cache().invalidate_pattern("group_*")
+            get_cache().invalidate("all_users")
+            get_cache().invalidate_pattern("user_groups_*")
+            get_cache().invalidate_pattern("admin_group_ids_*")
         
-        logger.info(f"Successfully deleted group {group_id} and cancelled its tasks")
-        return True
+            logger.info("Successfully deleted group %s and cancelled its tasks", group_id)
+            return True
     except Exception as e:
         logger.error(f"Error deleting group {group_id}: {e}", exc_info=True)
         return False
-    finally:
-        # Always close the connection to return it to the pool
-        conn.close()
 
 
 def get_group_users(group_id):
@@ -1124,42 +1070,38 @@ def get_group_users(group_id):
     import time
     start = time.time()
     
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        # Get users assigned to this group via user_groups table
-        q_start = time.time()
-        cursor.execute(
-            "SELECT u.user_id, u.name FROM users u INNER JOIN user_groups ug ON u.user_id = ug.user_id WHERE ug.group_id = %s",
-            (group_id,)
-        )
-        q_elapsed = time.time() - q_start
-        if q_elapsed > 0.1:
-            logger.debug(f"🐌 get_group_users query 1 took {q_elapsed:.3f}s")
-        users_rows = cursor.fetchall()
+        with _cursor() as cursor:
+            # Get users assigned to this group via user_groups table
+            q_start = time.time()
+            cursor.execute(
+                "SELECT u.user_id, u.name FROM users u INNER JOIN user_groups ug ON u.user_id = ug.user_id WHERE ug.group_id = %s",
+                (group_id,)
+            )
+            q_elapsed = time.time() - q_start
+            if q_elapsed > 0.1:
+                logger.debug(f"🐌 get_group_users query 1 took {q_elapsed:.3f}s")
+            users_rows = cursor.fetchall()
 
-        # Get admins for this group from group_admins (may include users without group_id set)
-        cursor.execute(
-            "SELECT u.user_id, u.name FROM users u INNER JOIN group_admins ga ON u.user_id = ga.admin_id WHERE ga.group_id = %s",
-            (group_id,)
-        )
-        admin_rows = cursor.fetchall()
+            # Get admins for this group from group_admins (may include users without group_id set)
+            cursor.execute(
+                "SELECT u.user_id, u.name FROM users u INNER JOIN group_admins ga ON u.user_id = ga.admin_id WHERE ga.group_id = %s",
+                (group_id,)
+            )
+            admin_rows = cursor.fetchall()
 
-        # Merge and deduplicate by user_id
-        combined = {}
-        for row in users_rows + admin_rows:
-            uid, name = row[0], row[1]
-            combined[uid] = name
+            # Merge and deduplicate by user_id
+            combined = {}
+            for row in users_rows + admin_rows:
+                uid, name = row[0], row[1]
+                combined[uid] = name
 
-        # Build sorted list by name
-        users = [{"user_id": uid, "name": combined[uid]} for uid in combined]
-        users.sort(key=lambda x: (x.get('name') or '').lower())
-        conn.close()
-        return users
+            # Build sorted list by name
+            users = [{"user_id": uid, "name": combined[uid]} for uid in combined]
+            users.sort(key=lambda x: (x.get('name') or '').lower())
+            return users
     except Exception as e:
         logger.error(f"Error getting group users: {e}")
-        conn.close()
         return []
 
 
@@ -1176,113 +1118,100 @@ def register_user(user_id, name, username=None):
     Returns:
         bool: True if registered, False if already exists
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        # Check if user already exists
-        cursor.execute("SELECT user_id FROM users WHERE user_id = %s", (user_id,))
-        if cursor.fetchone():
-            logger.warning(f"user {user_id} already exists")
-            conn.close()
-            return False
+        with _cursor(commit=True) as cursor:
+            # Check if user already exists
+            cursor.execute("SELECT user_id FROM users WHERE user_id = %s", (user_id,))
+            if cursor.fetchone():
+                logger.warning(f"user {user_id} already exists")
+                return False
         
-        # Create new user without group
-        cursor.execute(
-            "INSERT INTO users (user_id, name, username, group_id, registered) VALUES (%s, %s, %s, NULL, 1)",
-            (user_id, name, username)
-        )
-        conn.commit()
-        conn.close()
-        logger.info(f"Registered new user {name} (ID: {user_id}, username: {username})")
-        return True
+            # Create new user without group
+            cursor.execute(
+                "INSERT INTO users (user_id, name, username, group_id, registered) VALUES (%s, %s, %s, NULL, 1)",
+                (user_id, name, username)
+            )
+            # Invalidate cache
+            from simple_cache import get_cache
+            get_cache().invalidate("all_users")
+            get_cache().invalidate(f"user_{user_id}")
+            logger.info("Registered new user %s (ID: %s, username: %s)", name, user_id, username)
+            return True
     except Exception as e:
         logger.error(f"Error registering user: {e}")
-        conn.close()
         return False
 
 
 def is_user_registered(user_id):
     """Check if a user has registered (via password)."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute("SELECT registered FROM users WHERE user_id = %s", (user_id,))
-        row = cursor.fetchone()
-        conn.close()
-        return row[0] == 1 if row else False
+        with _cursor() as cursor:
+            cursor.execute("SELECT registered FROM users WHERE user_id = %s", (user_id,))
+            row = cursor.fetchone()
+            return row[0] == 1 if row else False
     except Exception as e:
         logger.error(f"Error checking user registration: {e}")
-        conn.close()
         return False
 
 
 def has_user_group(user_id):
     """Check if user is assigned to any group (using user_groups table)."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute("SELECT COUNT(*) FROM user_groups WHERE user_id = %s", (user_id,))
-        count = cursor.fetchone()[0]
-        conn.close()
-        return count > 0
+        with _cursor() as cursor:
+            # EXISTS stops at the first membership row instead of counting them all
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM user_groups WHERE user_id = %s)", (user_id,))
+            exists = cursor.fetchone()[0]
+            return exists
     except Exception as e:
         logger.error(f"Error checking user groups: {e}")
-        conn.close()
         return False
 
 
 def add_user_to_group(user_id, group_id):
     """Add a user to a group (many-to-many relationship)."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
     try:
-        # Ensure user exists in users table (required for FK constraint)
-        if not user_exists(user_id):
-            logger.warning(f"User {user_id} does not exist, creating user entry")
-            add_user(user_id, f"User_{user_id}", None)
-        
-        cursor.execute(
-            "INSERT INTO user_groups (user_id, group_id) VALUES (%s, %s)",
-            (user_id, group_id)
-        )
-        # Invalidate caches
-        from simple_cache import get_cache
-        get_cache().invalidate(f"user_groups_{user_id}")
-        get_cache().invalidate("all_groups")
+        with _cursor(commit=True) as cursor:
+            # Ensure user exists in users table (required for FK constraint)
+            _ensure_users(cursor, [user_id])
         
-        logger.info(f"Added user {user_id} to group {group_id}")
-        conn.close()
-        return True
+            cursor.execute(
+                "INSERT INTO user_groups (user_id, group_id) VALUES (%s, %s)",
+                (user_id, group_id)
+            )
+            # Invalidate caches
+            from simple_cache import get_cache
+            get_cache().invalidate(f"user_groups_{user_id}")
+            get_cache().invalidate("all_groups")
+            get_cache().invalidate_pattern("group_*")
+            get_cache().invalidate("all_users")
+        
+            logger.debug("Added user %s to group %s", user_id, group_id)
+            return True
     except Exception as e:
         logger.error(f"Error adding user to group: {e}")
-        conn.close()
         return False
 
 
 def remove_user_from_group(user_id, group_id):
     """Remove a user from a group (many-to-many relationship)."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute(
-            "DELETE FROM user_groups WHERE user_id = %s AND group_id = %s",
-            (user_id, group_id)
-        )
-        conn.commit()
+        with _cursor(commit=True) as cursor:
+            cursor.execute(
+                "DELETE FROM user_groups WHERE user_id = %s AND group_id = %s",
+                (user_id, group_id)
+            )
         
-        # Invalidate caches
-        from simple_cache import get_cache
-        get_cache().invalidate(f"user_groups_{user_id}")
-        get_cache().invalidate("all_groups")
+            # Invalidate caches
+            from simple_cache import get_cache
+            get_cache().invalidate(f"user_groups_{user_id}")
+            get_cache().invalidate("all_groups")
+            get_cache().invalidate_pattern("group_*")
+            get_cache().invalidate("all_users")
         
-        conn.close()
-        logger.info(f"Removed user {user_id} from group {group_id}")
-        return True
+            logger.debug("Removed user %s from group %s", user_id, group_id)
+            return True
     except Exception as e:
         logger.error(f"Error removing user from group: {e}")
-        conn.close()
         return False
 
 
@@ -1296,23 +1225,20 @@ def get_user_groups(user_id):
     if cached_result is not None:
         return cached_result
     
-    conn = _get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute(
-            "SELECT g.group_id, g.name FROM groups g INNER JOIN user_groups ug ON g.group_id = ug.group_id WHERE ug.user_id = %s",
-            (user_id,)
-        )
-        rows = cursor.fetchall()
-        groups = [{"group_id": row[0], "name": row[1]} for row in rows]
-        conn.close()
+        with _cursor() as cursor:
+            cursor.execute(
+                "SELECT g.group_id, g.name FROM groups g INNER JOIN user_groups ug ON g.group_id = ug.group_id WHERE ug.user_id = %s",
+                (user_id,)
+            )
+            rows = cursor.fetchall()
+            groups = [{"group_id": row[0], "name": row[1]} for row in rows]
         
-        # Cache result for 5 minutes
-        get_cache().set(cache_key, groups, ttl=300)
-        return groups
+            # Cache result for 5 minutes
+            get_cache().set(cache_key, groups, ttl=300)
+            return groups
     except Exception as e:
         logger.error(f"Error getting user groups: {e}")
-        conn.close()
         return []
 
 
@@ -1328,110 +1254,106 @@ def get_users_for_task_assignment(creator_id, creator_is_super_admin, creator_is
     Returns:
         List of users with user_id, name, group_id, group_name, username
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        if creator_is_super_admin:
-            # Super admin can assign to anyone including group admins - get ALL groups user belongs to
-            cursor.execute("""
-                SELECT DISTINCT u.user_id, u.name, u.username,
-                       STRING_AGG(DISTINCT g.group_id::text, ',') as group_ids,
-                       STRING_AGG(DISTINCT g.name, ',') as group_names
-                FROM users u
-                LEFT JOIN user_groups ug ON u.user_id = ug.user_id
-                LEFT JOIN groups g ON ug.group_id = g.group_id
-                WHERE u.banned = 0 AND u.deleted = 0
-                GROUP BY u.user_id, u.name, u.username
-                ORDER BY u.name
-            """)
-        elif creator_is_group_admin and creator_admin_groups:
-            # Group admin can assign to users in their managed groups + themselves
-            group_ids_str = ','.join(str(gid) for gid in creator_admin_groups)
-            query = f"""
-                SELECT DISTINCT u.user_id, u.name, u.username,
-                       STRING_AGG(DISTINCT g.group_id::text, ',') as group_ids,
-                       STRING_AGG(DISTINCT g.name, ',') as group_names
-                FROM users u
-                LEFT JOIN user_groups ug ON u.user_id = ug.user_id
-                LEFT JOIN groups g ON ug.group_id = g.group_id
-                WHERE u.banned = 0 AND u.deleted = 0 AND (
-                    ug.group_id IN ({group_ids_str})
-                    OR u.user_id = %s
-                )
-                GROUP BY u.user_id, u.name, u.username
-                ORDER BY u.name
-            """
-            cursor.execute(query, (creator_id,))
-        else:
-            # Regular worker: users from worker's OWN groups + admins of those groups + ALWAYS include self
-            # First get worker's groups
-            cursor.execute("""
-                SELECT DISTINCT group_id FROM user_groups WHERE user_id = %s
-            """, (creator_id,))
-            worker_groups = [row[0] for row in cursor.fetchall()]
-            
-            if worker_groups:
-                # Worker has groups - include users from those groups and admins
-                group_ids_str = ','.join(str(gid) for gid in worker_groups)
+        with _cursor() as cursor:
+            if creator_is_super_admin:
+                # Super admin can assign to anyone including group admins - get ALL groups user belongs to
+                cursor.execute("""
+                    SELECT DISTINCT u.user_id, u.name, u.username,
+                           array_agg(DISTINCT g.group_id) FILTER (WHERE g.group_id IS NOT NULL) as group_ids,
+                           array_agg(DISTINCT g.name) FILTER (WHERE g.name IS NOT NULL) as group_names
+                    FROM users u
+                    LEFT JOIN user_groups ug ON u.user_id = ug.user_id
+                    LEFT JOIN groups g ON ug.group_id = g.group_id
+                    WHERE u.banned = 0 AND u.deleted = 0
+                    GROUP BY u.user_id, u.name, u.username
+                    ORDER BY u.name
+                """)
+            elif creator_is_group_admin and creator_admin_groups:
+                # Group admin can assign to users in their managed groups + themselves
+                group_ids_str = ','.join(str(gid) for gid in creator_admin_groups)
                 query = f"""
                     SELECT DISTINCT u.user_id, u.name, u.username,
-                           STRING_AGG(DISTINCT g.group_id::text, ',') as group_ids,
-                           STRING_AGG(DISTINCT g.name, ',') as group_names
+                           array_agg(DISTINCT g.group_id) FILTER (WHERE g.group_id IS NOT NULL) as group_ids,
+                           array_agg(DISTINCT g.name) FILTER (WHERE g.name IS NOT NULL) as group_names
                     FROM users u
                     LEFT JOIN user_groups ug ON u.user_id = ug.user_id
                     LEFT JOIN groups g ON ug.group_id = g.group_id
                     WHERE u.banned = 0 AND u.deleted = 0 AND (
-                        u.user_id = %s
-                        OR ug.group_id IN ({group_ids_str})
-                        OR u.user_id IN (
-                            SELECT ga.admin_id FROM group_admins ga
-                            WHERE ga.group_id IN ({group_ids_str})
-                        )
+                        ug.group_id IN ({group_ids_str})
+                        OR u.user_id = %s
                     )
                     GROUP BY u.user_id, u.name, u.username
                     ORDER BY u.name
                 """
                 cursor.execute(query, (creator_id,))
             else:
-                # Worker has no groups - can only assign to themselves
+                # Regular worker: users from worker's OWN groups + admins of those groups + ALWAYS include self
+                # First get worker's groups
                 cursor.execute("""
-                    SELECT DISTINCT u.user_id, u.name, u.username,
-                           STRING_AGG(DISTINCT g.group_id::text, ',') as group_ids,
-                           STRING_AGG(DISTINCT g.name, ',') as group_names
-                    FROM users u
-                    LEFT JOIN user_groups ug ON u.user_id = ug.user_id
-                    LEFT JOIN groups g ON ug.group_id = g.group_id
-                    WHERE u.banned = 0 AND u.deleted = 0 AND u.user_id = %s
-                    GROUP BY u.user_id, u.name, u.username
-                    ORDER BY u.name
+                    SELECT DISTINCT group_id FROM user_groups WHERE user_id = %s
                 """, (creator_id,))
-        
-        rows = cursor.fetchall()
-        users = []
-        for row in rows:
-            # Parse group_ids and group_names
-            group_ids_str = row[3] if row[3] else ""
-            group_names_str = row[4] if row[4] else ""
+                worker_groups = [row[0] for row in cursor.fetchall()]
+            
+                if worker_groups:
+                    # Worker has groups - include users from those groups and admins
+                    group_ids_str = ','.join(str(gid) for gid in worker_groups)
+                    query = f"""
+                        SELECT DISTINCT u.user_id, u.name, u.username,
+                               array_agg(DISTINCT g.group_id) FILTER (WHERE g.group_id IS NOT NULL) as group_ids,
+                               array_agg(DISTINCT g.name) FILTER (WHERE g.name IS NOT NULL) as group_names
+                        FROM users u
+                        LEFT JOIN user_groups ug ON u.user_id = ug.user_id
+                        LEFT JOIN groups g ON ug.group_id = g.group_id
+                        WHERE u.banned = 0 AND u.deleted = 0 AND (
+                            u.user_id = %s
+                            OR ug.group_id IN ({group_ids_str})
+                            OR u.user_id IN (
+                                SELECT ga.admin_id FROM group_admins ga
+                                WHERE ga.group_id IN ({group_ids_str})
+                            )
+                        )
+                        GROUP BY u.user_id, u.name, u.username
+                        ORDER BY u.name
+                    """
+                    cursor.execute(query, (creator_id,))
+                else:
+                    # Worker has no groups - can only assign to themselves
+                    cursor.execute("""
+                        SELECT DISTINCT u.user_id, u.name, u.username,
+                               array_agg(DISTINCT g.group_id) FILTER (WHERE g.group_id IS NOT NULL) as group_ids,
+                               array_agg(DISTINCT g.name) FILTER (WHERE g.name IS NOT NULL) as group_names
+                        FROM users u
+                        LEFT JOIN user_groups ug ON u.user_id = ug.user_id
+                        LEFT JOIN groups g ON ug.group_id = g.group_id
+                        WHERE u.banned = 0 AND u.deleted = 0 AND u.user_id = %s
+                        GROUP BY u.user_id, u.name, u.username
+                        ORDER BY u.name
+                    """, (creator_id,))
+        
+            rows = cursor.fetchall()
+            users = []
+            for row in rows:
+                # psycopg2 returns the aggregated arrays as lists (None when no groups)
+                group_ids = row[3] or []
+                group_names = row[4] or []
             
-            # Get first group (for backwards compatibility)
-            group_id = int(group_ids_str.split(',')[0]) if group_ids_str else None
-            group_name = group_names_str.split(',')[0] if group_names_str else None
+                # Get first group (for backwards compatibility)
+                group_id = group_ids[0] if group_ids else None
+                group_name = group_names[0] if group_names else None
             
-            users.append({
-                "user_id": row[0],
-                "name": row[1],
-                "username": row[2],
-                "group_id": group_id,
-                "group_name": group_name,
-                "all_groups": group_names_str  # All groups comma-separated
-            })
+                users.append({
+                    "user_id": row[0],
+                    "name": row[1],
+                    "username": row[2],
+                    "group_id": group_id,
+                    "group_name": group_name,
+                    "all_groups": ",".join(group_names)  # All groups comma-separated
+                })
         
-        conn.close()
-        return users
+            return users
     except Exception as e:
         logger.error(f"Error getting users for task assignment: {e}")
-        conn.close()
         return []
 
 
@@ -1447,122 +1369,117 @@ def reassign_user_tasks_to_group(user_id, new_group_id):
         int: number of tasks updated
     """
     import json
-    conn = _get_db_connection()
-    cursor = conn.cursor()
     try:
-        # Find tasks where assigned_to_list contains this user
-        cursor.execute("SELECT task_id, assigned_to_list FROM tasks WHERE assigned_to_list IS NOT NULL")
-        rows = cursor.fetchall()
-        updated = 0
-        for row in rows:
-            assigned_json = row[1]
-            try:
-                assigned = json.loads(assigned_json or '[]')
-            except Exception:
-                assigned = []
-            if user_id in assigned:
-                cursor.execute("UPDATE tasks SET group_id = %s WHERE task_id = %s", (new_group_id, row[0]))
-                updated += 1
+        with _cursor(commit=True) as cursor:
+            # Match tasks whose assigned_to_list contains this user in SQL (GIN index) instead of
+            # decoding every task's list in Python
+            cursor.execute(
+                "UPDATE tasks SET group_id = %s WHERE assigned_to_list::jsonb @> %s::jsonb",
+                (new_group_id, json.dumps([user_id]))
+            )
+            updated = cursor.rowcount
 
-        conn.commit()
-        conn.close()
-        logger.info(f"Reassigned {updated} tasks for user {user_id} to group {new_group_id}")
-        return updated
+            logger.info("Reassigned %s tasks for user %s to group %s", updated, user_id, new_group_id)
+            return updated
     except Exception as e:
         logger.error(f"Error reassigning tasks for user {user_id}: {e}")
-        conn.close()
         return 0
 
 
 def set_user_name(user_id, new_name):
     """Set a user's display name (name)."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute("UPDATE users SET name = %s WHERE user_id = %s", (new_name, user_id))
-        conn.commit()
-        conn.close()
-        logger.info(f"Set user {user_id} name -> {new_name}")
-        return True
+        with _cursor(commit=True) as cursor:
+            cursor.execute("UPDATE users SET name = %s WHERE user_id = %s", (new_name, user_id))
+            # Invalidate cache
+            from simple_cache import get_cache
+            get_cache().invalidate("all_users")
+            get_cache().invalidate(f"user_{user_id}")
+            logger.info("Set user %s name -> %s", user_id, new_name)
+            return True
     except Exception as e:
         logger.error(f"Error setting user name: {e}")
-        conn.close()
         return False
 
 
 def ban_user(user_id):
     """Ban a user (set banned flag and remove from admin positions)."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
     try:
-        # Set user as banned
-        cursor.execute("UPDATE users SET banned = 1 WHERE user_id = %s", (user_id,))
-        # Remove from group_admins (many-to-many admin table)
-        cursor.execute("DELETE FROM group_admins WHERE admin_id = %s", (user_id,))
-        # Update groups.admin_id to NULL if this user is primary admin
-        cursor.execute("UPDATE groups SET admin_id = NULL WHERE admin_id = %s", (user_id,))
-        conn.commit()
-        conn.close()
-        logger.info(f"Banned user {user_id} and removed from admin positions")
-        return True
+        with _cursor(commit=True) as cursor:
+            # Set user as banned
+            cursor.execute("UPDATE users SET banned = 1 WHERE user_id = %s", (user_id,))
+            # Remove from group_admins (many-to-many admin table)
+            cursor.execute("DELETE FROM group_admins WHERE admin_id = %s", (user_id,))
+            # Update groups.admin_id to NULL if this user is primary admin
+            cursor.execute("UPDATE groups SET admin_id = NULL WHERE admin_id = %s", (user_id,))
+            # Invalidate cache
+            from simple_cache import get_cache
+            get_cache().invalidate("all_users")
+            get_cache().invalidate(f"user_{user_id}")
+            get_cache().invalidate("all_groups")
+            get_cache().invalidate_pattern("group_*")
+            get_cache().invalidate(f"admin_group_ids_{user_id}")
+            logger.info("Banned user %s and removed from admin positions", user_id)
+            return True
     except Exception as e:
         logger.error(f"Error banning user: {e}")
-        conn.close()
         return False
 
 
 def unban_user(user_id):
     """Unban a user (remove banned flag)."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute("UPDATE users SET banned = 0 WHERE user_id = %s", (user_id,))
-        conn.commit()
-        conn.close()
-        logger.info(f"Unbanned user {user_id}")
-        return True
+        with _cursor(commit=True) as cursor:
+            cursor.execute("UPDATE users SET banned = 0 WHERE user_id = %s", (user_id,))
+            # Invalidate cache
+            from simple_cache import get_cache
+            get_cache().invalidate("all_users")
+            get_cache().invalidate(f"user_{user_id}")
+            logger.info("Unbanned user %s", user_id)
+            return True
     except Exception as e:
         logger.error(f"Error unbanning user: {e}")
-        conn.close()
         return False
 
 
 def remove_user_from_all_groups(user_id):
     """Remove user from all groups (when banning)."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute("DELETE FROM user_groups WHERE user_id = %s", (user_id,))
-        conn.commit()
-        conn.close()
-        logger.info(f"Removed user {user_id} from all groups")
-        return True
+        with _cursor(commit=True) as cursor:
+            cursor.execute("DELETE FROM user_groups WHERE user_id = %s", (user_id,))
+            # Invalidate cache
+            from simple_cache import get_cache
+            get_cache().invalidate("all_users")
+            logger.info("Removed user %s from all groups", user_id)
+            return True
     except Exception as e:
         logger.error(f"Error removing user from groups: {e}")
-        conn.close()
         return False
 
 
 def delete_user(user_id):
     """Delete a user from the system (bans them and hides from lists)."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
     try:
-        # Set user as banned and deleted (deleted users don't show in lists)
-        cursor.execute("UPDATE users SET banned = 1, deleted = 1 WHERE user_id = %s", (user_id,))
-        # Remove from all groups
-        cursor.execute("DELETE FROM user_groups WHERE user_id = %s", (user_id,))
-        # Remove from group_admins (many-to-many admin table)
-        cursor.execute("DELETE FROM group_admins WHERE admin_id = %s", (user_id,))
-        # Update groups.admin_id to NULL if this user is primary admin
-        cursor.execute("UPDATE groups SET admin_id = NULL WHERE admin_id = %s", (user_id,))
-        conn.commit()
-        conn.close()
-        logger.info(f"Deleted user {user_id} and removed from admin positions")
-        return True
+        with _cursor(commit=True) as cursor:
+            # Set user as banned and deleted (deleted users don't show in lists)
+            cursor.execute("UPDATE users SET banned = 1, deleted = 1 WHERE user_id = %s", (user_id,))
+            # Remove from all groups
+            cursor.execute("DELETE FROM user_groups WHERE user_id = %s", (user_id,))
+            # Remove from group_admins (many-to-many admin table)
+            cursor.execute("DELETE FROM group_admins WHERE admin_id = %s", (user_id,))
+            # Update groups.admin_id to NULL if this user is primary admin
+            cursor.execute("UPDATE groups SET admin_id = NULL WHERE admin_id = %s", (user_id,))
+            # Invalidate cache
+            from simple_cache import get_cache
+            get_cache().invalidate("all_users")
+            get_cache().invalidate(f"user_{user_id}")
+            get_cache().invalidate("all_groups")
+            get_cache().invalidate_pattern("group_*")
+            get_cache().invalidate(f"admin_group_ids_{user_id}")
+            logger.info("Deleted user %s and removed from admin positions", user_id)
+            return True
     except Exception as e:
         logger.error(f"Error deleting user: {e}")
-        conn.close()
         return False
 
 
@@ -1577,52 +1494,50 @@ def cancel_user_tasks(user_id):
         dict with counts of cancelled and updated tasks
     """
     import json
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cancelled_count = 0
-        updated_count = 0
+        with _cursor(commit=True) as cursor:
+            cancelled_count = 0
+            updated_count = 0
         
-        # Get all tasks where user is creator
-        cursor.execute("SELECT task_id FROM tasks WHERE created_by = %s AND status != 'cancelled'", (user_id,))
-        creator_tasks = [row[0] for row in cursor.fetchall()]
+            # Get all tasks where user is creator
+            cursor.execute("SELECT task_id FROM tasks WHERE created_by = %s AND status != 'cancelled'", (user_id,))
+            creator_tasks = [row[0] for row in cursor.fetchall()]
         
-        # Cancel tasks where user is creator
-        if creator_tasks:
-            placeholders = ','.join('%s' * len(creator_tasks))
-            cursor.execute(f"UPDATE tasks SET status = 'cancelled' WHERE task_id IN ({placeholders})", creator_tasks)
-            cancelled_count += len(creator_tasks)
+            # Cancel tasks where user is creator
+            if creator_tasks:
+                placeholders = ','.join('%s' * len(creator_tasks))
+                cursor.execute(f"UPDATE tasks SET status = 'cancelled' WHERE task_id IN ({placeholders})", creator_tasks)
+                cancelled_count += len(creator_tasks)
         
-        # Get all tasks where user is in assigned_to_list
-        cursor.execute("SELECT task_id, assigned_to_list FROM tasks WHERE assigned_to_list IS NOT NULL AND status != 'cancelled'")
-        all_tasks = cursor.fetchall()
+            # Get only the tasks where user is in assigned_to_list (GIN index on assigned_to_list)
+            cursor.execute(
+                """SELECT task_id, assigned_to_list FROM tasks
+                   WHERE status != 'cancelled' AND assigned_to_list::jsonb @> %s::jsonb""",
+                (json.dumps([user_id]),)
+            )
+            assigned_tasks = cursor.fetchall()
         
-        for task in all_tasks:
-            try:
-                assigned = json.loads(task['assigned_to_list'] or '[]')
-                if user_id in assigned:
+            for task_id, assigned_json in assigned_tasks:
+                try:
+                    assigned = json.loads(assigned_json)
                     if len(assigned) == 1:
                         # User is sole assignee - cancel task
-                        cursor.execute("UPDATE tasks SET status = 'cancelled' WHERE task_id = %s", (task['task_id'],))
+                        cursor.execute("UPDATE tasks SET status = 'cancelled' WHERE task_id = %s", (task_id,))
                         cancelled_count += 1
                     else:
                         # User is co-assignee - remove from list
                         assigned.remove(user_id)
                         cursor.execute("UPDATE tasks SET assigned_to_list = %s WHERE task_id = %s", 
-                                     (json.dumps(assigned), task['task_id']))
+                                     (json.dumps(assigned), task_id))
                         updated_count += 1
-            except Exception as e:
-                logger.error(f"Error processing task {task['task_id']}: {e}")
-                continue
+                except Exception as e:
+                    logger.error(f"Error processing task {task_id}: {e}")
+                    continue
         
-        conn.commit()
-        conn.close()
-        logger.info(f"Cancelled {cancelled_count} tasks, updated {updated_count} tasks for user {user_id}")
-        return {'cancelled': cancelled_count, 'updated': updated_count}
+            logger.info("Cancelled %s tasks, updated %s tasks for user %s", cancelled_count, updated_count, user_id)
+            return {'cancelled': cancelled_count, 'updated': updated_count}
     except Exception as e:
         logger.error(f"Error cancelling user tasks: {e}")
-        conn.close()
         return {'cancelled': 0, 'updated': 0}
 
 
@@ -1648,152 +1563,164 @@ def create_task(date, time, description, group_id, admin_id, assigned_to_list=No
     """
     import json
     
-    # Ensure admin_id exists in users table (for super admins who may not be registered)
-    if not user_exists(admin_id):
-        add_user(admin_id, f"User_{admin_id}", None)
-    
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        assigned_to_json = json.dumps(assigned_to_list) if assigned_to_list else None
-        
-        cursor.execute(
-            """INSERT INTO tasks (title, date, time, description, group_id, 
-               assigned_to_list, created_by, status) 
-               VALUES (%s, %s, %s, %s, %s, %s, %s, 'pending') RETURNING task_id""",
-            (title, date, time, description, group_id, assigned_to_json, admin_id)
-        )
-        task_id = cursor.fetchone()[0]
+        # One transaction: if any insert fails, neither the task nor its history or assignees are kept
+        with _cursor(commit=True) as cursor:
+            # Ensure admin_id (super admins may not be registered) and assignees exist in users
+            _ensure_users(cursor, [admin_id] + list(assigned_to_list or []))
+            
+            assigned_to_json = json.dumps(assigned_to_list) if assigned_to_list else None
         
-        # Log task creation
-        cursor.execute(
-            """INSERT INTO task_history (task_id, action, new_value, changed_by) 
-               VALUES (%s, 'created', %s, %s)""",
-            (task_id, f"Task created: {description}", admin_id)
-        )
+            cursor.execute(
+                """INSERT INTO tasks (title, date, time, description, group_id, 
+                   assigned_to_list, created_by, status) 
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, 'pending') RETURNING task_id""",
+                (title, date, time, description, group_id, assigned_to_json, admin_id)
+            )
+            task_id = cursor.fetchone()[0]
         
-        conn.commit()
-        conn.close()
-        logger.info(f"Created task {task_id} for group {group_id}")
+            # Log task creation
+            cursor.execute(
+                """INSERT INTO task_history (task_id, action, new_value, changed_by) 
+                   VALUES (%s, 'created', %s, %s)""",
+                (task_id, f"Task created: {description}", admin_id)
+            )
         
-        # Add assignees to task_assignees table with 'pending' status
-        if assigned_to_list:
-            add_task_assignees(task_id, assigned_to_list, initial_status='pending')
+            # Add assignees to task_assignees table with 'pending' status
+            if assigned_to_list:
+                _insert_task_assignees(cursor, task_id, assigned_to_list, 'pending')
         
-        return task_id
+            logger.debug("Created task %s for group %s", task_id, group_id)
+            return task_id
     except Exception as e:
         logger.error(f"Error creating task: {e}")
-        conn.close()
         return None
 
 
 def get_group_tasks(group_id):
     """Get all tasks for a group."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            """SELECT task_id, date, time, description, title, group_id, assigned_to_list, 
-                      status, has_media, created_at 
-               FROM tasks WHERE group_id = %s ORDER BY created_at DESC""",
-            (group_id,)
-        )
-        tasks = []
-        for row in cursor.fetchall():
-            tasks.append({
-                "task_id": row[0],
-                "date": row[1],
-                "time": row[2],
-                "description": row[3],
-                "title": row[4],
-                "group_id": row[5],
-                "assigned_to_list": row[6],
-                "status": row[7],
-                "has_media": row[8],
-                "created_at": row[9]
-            })
-        conn.close()
-        return tasks
+        with _cursor() as cursor:
+            cursor.execute(
+                """SELECT task_id, date, time, description, title, group_id, assigned_to_list, 
+                          status, has_media, created_at 
+                   FROM tasks WHERE group_id = %s ORDER BY created_at DESC""",
+                (group_id,)
+            )
+            tasks = []
+            for row in cursor.fetchall():
+                tasks.append({
+                    "task_id": row[0],
+                    "date": row[1],
+                    "time": row[2],
+                    "description": row[3],
+                    "title": row[4],
+                    "group_id": row[5],
+                    "assigned_to_list": row[6],
+                    "status": row[7],
+                    "has_media": row[8],
+                    "created_at": row[9]
+                })
+            return tasks
     except Exception as e:
         logger.error(f"Error getting group tasks: {e}")
-        conn.close()
         return []
 
 
+def get_group_assignee_task_counts(group_id):
+    """
+    Count active tasks per assignee within a group in a single query.
+    
+    Equivalent to len([t for t in get_user_tasks(uid) if t['group_id'] == group_id])
+    for every assignee, without issuing one query per user.
+    
+    Returns:
+        dict: {user_id: active_task_count}
+    """
+    try:
+        with _cursor() as cursor:
+            cursor.execute(
+                """SELECT assignee::bigint, COUNT(*)
+                   FROM tasks, jsonb_array_elements_text(tasks.assigned_to_list::jsonb) AS assignee
+                   WHERE group_id = %s
+                     AND assigned_to_list IS NOT NULL
+                     AND status NOT IN ('cancelled', 'completed')
+                   GROUP BY assignee""",
+                (group_id,)
+            )
+            counts = {row[0]: row[1] for row in cursor.fetchall()}
+            return counts
+    except Exception as e:
+        logger.error(f"Error counting group assignee tasks: {e}")
+        return {}
+
+
 def get_user_tasks(user_id):
     """Get all active tasks assigned to a user (as executor), excluding completed."""
     import json
     
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            """SELECT task_id, date, time, description, title, group_id, assigned_to_list, 
-                      status, has_media, created_at, created_by
-               FROM tasks WHERE status NOT IN ('cancelled', 'completed') ORDER BY created_at DESC"""
-        )
-        tasks = []
-        for row in cursor.fetchall():
-            task = {
-                "task_id": row[0],
-                "date": row[1],
-                "time": row[2],
-                "description": row[3],
-                "title": row[4],
-                "group_id": row[5],
-                "assigned_to_list": row[6],
-                "status": row[7],
-                "has_media": row[8],
-                "created_at": row[9],
-                "created_by": row[10]
-            }
-            assigned_list = json.loads(task.get('assigned_to_list') or '[]')
-            if user_id in assigned_list:
-                tasks.append(task)
-        conn.close()
-        return tasks
+        with _cursor() as cursor:
+            # Filter by assignee in SQL (GIN index on assigned_to_list) instead of scanning all tasks
+            cursor.execute(
+                """SELECT task_id, date, time, description, title, group_id, assigned_to_list, 
+                          status, has_media, created_at, created_by
+                   FROM tasks 
+                   WHERE status NOT IN ('cancelled', 'completed')
+                     AND assigned_to_list::jsonb @> %s::jsonb
+                   ORDER BY created_at DESC""",
+                (json.dumps([user_id]),)
+            )
+            tasks = []
+            for row in cursor.fetchall():
+                tasks.append({
+                    "task_id": row[0],
+                    "date": row[1],
+                    "time": row[2],
+                    "description": row[3],
+                    "title": row[4],
+                    "group_id": row[5],
+                    "assigned_to_list": row[6],
+                    "status": row[7],
+                    "has_media": row[8],
+                    "created_at": row[9],
+                    "created_by": row[10]
+                })
+            return tasks
     except Exception as e:
         logger.error(f"Error getting user tasks: {e}")
-        conn.close()
         return []
 
 
 def get_tasks_created_by_user(user_id):
     """Get all active tasks created by a user (as постановник), excluding completed."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            """SELECT task_id, date, time, description, title, group_id, assigned_to_list, 
-                      status, has_media, created_at, created_by
-               FROM tasks WHERE created_by = %s AND status NOT IN ('cancelled', 'completed') 
-               ORDER BY created_at DESC""",
-            (user_id,)
-        )
-        tasks = []
-        for row in cursor.fetchall():
-            tasks.append({
-                "task_id": row[0],
-                "date": row[1],
-                "time": row[2],
-                "description": row[3],
-                "title": row[4],
-                "group_id": row[5],
-                "assigned_to_list": row[6],
-                "status": row[7],
-                "has_media": row[8],
-                "created_at": row[9],
-                "created_by": row[10]
-            })
-        conn.close()
-        return tasks
+        with _cursor() as cursor:
+            cursor.execute(
+                """SELECT task_id, date, time, description, title, group_id, assigned_to_list, 
+                          status, has_media, created_at, created_by
+                   FROM tasks WHERE created_by = %s AND status NOT IN ('cancelled', 'completed') 
+                   ORDER BY created_at DESC""",
+                (user_id,)
+            )
+            tasks = []
+            for row in cursor.fetchall():
+                tasks.append({
+                    "task_id": row[0],
+                    "date": row[1],
+                    "time": row[2],
+                    "description": row[3],
+                    "title": row[4],
+                    "group_id": row[5],
+                    "assigned_to_list": row[6],
+                    "status": row[7],
+                    "has_media": row[8],
+                    "created_at": row[9],
+                    "created_by": row[10]
+                })
+            return tasks
     except Exception as e:
         logger.error(f"Error getting tasks created by user: {e}")
-        conn.close()
         return []
 
 
@@ -1801,147 +1728,278 @@ def get_user_archived_tasks(user_id):
     """Get all completed tasks assigned to a user (archived)."""
     import json
     
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            """SELECT task_id, date, time, description, group_id, assigned_to_list, 
-                      status, has_media, created_at, created_by, updated_at
-               FROM tasks WHERE status = 'completed' ORDER BY updated_at DESC"""
-        )
-        tasks = []
-        for row in cursor.fetchall():
-            task = {
-                'task_id': row[0],
-                'date': row[1],
-                'time': row[2],
-                'description': row[3],
-                'group_id': row[4],
-                'assigned_to_list': row[5],
-                'status': row[6],
-                'has_media': row[7],
-                'created_at': row[8],
-                'created_by': row[9],
-                'updated_at': row[10]
-            }
-            assigned_list = json.loads(task.get('assigned_to_list') or '[]')
-            if user_id in assigned_list:
-                tasks.append(task)
-        conn.close()
-        return tasks
+        with _cursor() as cursor:
+            cursor.execute(
+                """SELECT task_id, date, time, description, group_id, assigned_to_list, 
+                          status, has_media, created_at, created_by, updated_at
+                   FROM tasks 
+                   WHERE status = 'completed'
+                     AND assigned_to_list::jsonb @> %s::jsonb
+                   ORDER BY updated_at DESC""",
+                (json.dumps([user_id]),)
+            )
+            tasks = []
+            for row in cursor.fetchall():
+                tasks.append({
+                    'task_id': row[0],
+                    'date': row[1],
+                    'time': row[2],
+                    'description': row[3],
+                    'group_id': row[4],
+                    'assigned_to_list': row[5],
+                    'status': row[6],
+                    'has_media': row[7],
+                    'created_at': row[8],
+                    'created_by': row[9],
+                    'updated_at': row[10]
+                })
+            return tasks
     except Exception as e:
         logger.error(f"Error getting user archived tasks: {e}")
-        conn.close()
         return []
 
 
 def get_archived_tasks_created_by_user(user_id):
     """Get all completed tasks created by a user (archived)."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            """SELECT task_id, date, time, description, title, group_id, assigned_to_list, 
-                      status, has_media, created_at, created_by, updated_at
-               FROM tasks WHERE created_by = %s AND status = 'completed' 
-               ORDER BY updated_at DESC""",
-            (user_id,)
-        )
-        tasks = []
-        for row in cursor.fetchall():
-            tasks.append({
-                'task_id': row[0],
-                'date': row[1],
-                'time': row[2],
-                'description': row[3],
-                'title': row[4],
-                'group_id': row[5],
-                'assigned_to_list': row[6],
-                'status': row[7],
-                'has_media': row[8],
-                'created_at': row[9],
-                'created_by': row[10],
-                'updated_at': row[11]
-            })
-        conn.close()
-        return tasks
+        with _cursor() as cursor:
+            cursor.execute(
+                """SELECT task_id, date, time, description, title, group_id, assigned_to_list, 
+                          status, has_media, created_at, created_by, updated_at
+                   FROM tasks WHERE created_by = %s AND status = 'completed' 
+                   ORDER BY updated_at DESC""",
+                (user_id,)
+            )
+            tasks = []
+            for row in cursor.fetchall():
+                tasks.append({
+                    'task_id': row[0],
+                    'date': row[1],
+                    'time': row[2],
+                    'description': row[3],
+                    'title': row[4],
+                    'group_id': row[5],
+                    'assigned_to_list': row[6],
+                    'status': row[7],
+                    'has_media': row[8],
+                    'created_at': row[9],
+                    'created_by': row[10],
+                    'updated_at': row[11]
+                })
+            return tasks
     except Exception as e:
         logger.error(f"Error getting archived tasks created by user: {e}")
-        conn.close()
         return []
 
 
+def _get_archived_tasks_page(where, params, page, page_size):
+    """
+    Fetch one page of completed tasks matching `where`, newest first.
+    
+    Only the requested page is read, so archive views stay cheap as the archive grows.
+    
+    Returns:
+        tuple: (tasks, total, page) with page clamped to the last page
+    """
+    try:
+        with _cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM tasks WHERE status = 'completed' AND {where}", params)
+            total = cursor.fetchone()[0]
+            page = max(0, min(page, (total - 1) // page_size)) if total else 0
+        
+            cursor.execute(
+                f"""SELECT task_id, date, time, description, title, group_id, assigned_to_list,
+                           status, has_media, created_at, created_by, updated_at
+                    FROM tasks WHERE status = 'completed' AND {where}
+                    ORDER BY updated_at DESC
+                    LIMIT %s OFFSET %s""",
+                params + (page_size, page * page_size)
+            )
+            tasks = []
+            for row in cursor.fetchall():
+                tasks.append({
+                    'task_id': row[0],
+                    'date': row[1],
+                    'time': row[2],
+                    'description': row[3],
+                    'title': row[4],
+                    'group_id': row[5],
+                    'assigned_to_list': row[6],
+                    'status': row[7],
+                    'has_media': row[8],
+                    'created_at': row[9],
+                    'created_by': row[10],
+                    'updated_at': row[11]
+                })
+            return tasks, total, page
+    except Exception as e:
+        logger.error(f"Error getting archived tasks page: {e}")
+        return [], 0, 0
+
+
+def get_archived_tasks_created_by_user_page(user_id, page=0, page_size=10):
+    """Get one page of completed tasks created by a user. Returns (tasks, total, page)."""
+    return _get_archived_tasks_page("created_by = %s", (user_id,), page, page_size)
+
+
+def get_user_archived_tasks_page(user_id, page=0, page_size=10):
+    """Get one page of completed tasks assigned to a user. Returns (tasks, total, page)."""
+    import json
+    return _get_archived_tasks_page(
+        "assigned_to_list::jsonb @> %s::jsonb", (json.dumps([user_id]),), page, page_size
+    )
+
+
 def get_all_tasks():
     """Get all tasks (for super admin)."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            """SELECT task_id, date, time, description, title, group_id, assigned_to_list, 
-                      status, has_media, created_at, created_by
-               FROM tasks WHERE status != 'cancelled' ORDER BY created_at DESC"""
-        )
-        tasks = []
-        for row in cursor.fetchall():
-            tasks.append({
-                'task_id': row[0],
-                'date': row[1],
-                'time': row[2],
-                'description': row[3],
-                'title': row[4],
-                'group_id': row[5],
-                'assigned_to_list': row[6],
-                'status': row[7],
-                'has_media': row[8],
-                'created_at': row[9],
-                'created_by': row[10]
-            })
-        conn.close()
-        return tasks
+        with _cursor() as cursor:
+            cursor.execute(
+                """SELECT task_id, date, time, description, title, group_id, assigned_to_list, 
+                          status, has_media, created_at, created_by
+                   FROM tasks WHERE status != 'cancelled' ORDER BY created_at DESC"""
+            )
+            return [
+                {
+                    'task_id': row[0],
+                    'date': row[1],
+                    'time': row[2],
+                    'description': row[3],
+                    'title': row[4],
+                    'group_id': row[5],
+                    'assigned_to_list': row[6],
+                    'status': row[7],
+                    'has_media': row[8],
+                    'created_at': row[9],
+                    'created_by': row[10]
+                }
+                for row in cursor.fetchall()
+            ]
     except Exception as e:
         logger.error(f"Error getting all tasks: {e}")
-        conn.close()
         return []
 
 
+def get_overdue_tasks(now):
+    """
+    Get all active tasks whose deadline is before `now`, in one query.
+    
+    The deadline is computed in SQL from the date/time text columns
+    ('24:00' becomes midnight of the next day).
+    
+    Args:
+        now (datetime): Reference time (naive, bot-local)
+    
+    Returns:
+        list: Task dicts with an extra 'deadline' datetime, the group's 'admins' and the
+              'pending_assignees' (see get_pending_assignees), oldest first
+    """
+    try:
+        with _cursor() as cursor:
+            # Reminder recipients come back with each task, so the reminder job doesn't
+            # run two more queries per overdue task
+            cursor.execute(
+                """SELECT t.task_id, t.date, t.time, t.description, t.title, t.group_id, t.assigned_to_list,
+                          t.status, t.created_by, (t.date::date + t.time::interval) AS deadline,
+                          ARRAY(SELECT ga.admin_id FROM group_admins ga WHERE ga.group_id = t.group_id),
+                          ARRAY(
+                              SELECT assignee.user_id::bigint
+                              FROM jsonb_array_elements_text(t.assigned_to_list::jsonb)
+                                  WITH ORDINALITY AS assignee(user_id, position)
+                              LEFT JOIN task_assignees ta
+                                  ON ta.task_id = t.task_id AND ta.user_id = assignee.user_id::bigint
+                              WHERE ta.status IS NULL OR ta.status NOT IN ('completed', 'cancelled')
+                              ORDER BY assignee.position
+                          )
+                   FROM tasks t
+                   WHERE t.status NOT IN ('completed', 'cancelled')
+                     AND (t.date::date + t.time::interval) < %s
+                   ORDER BY deadline""",
+                (now,)
+            )
+            tasks = []
+            for row in cursor.fetchall():
+                tasks.append({
+                    'task_id': row[0],
+                    'date': row[1],
+                    'time': row[2],
+                    'description': row[3],
+                    'title': row[4],
+                    'group_id': row[5],
+                    'assigned_to_list': row[6],
+                    'status': row[7],
+                    'created_by': row[8],
+                    'deadline': row[9],
+                    'admins': row[10],
+                    'pending_assignees': row[11]
+                })
+            return tasks
+    except Exception as e:
+        logger.error(f"Error getting overdue tasks: {e}")
+        return []
+
+
+def get_next_reminder_time(now):
+    """
+    Get the next moment an active task reaches its deadline or another full day overdue.
+    
+    Args:
+        now (datetime): Reference time (naive, bot-local)
+    
+    Returns:
+        datetime: Earliest upcoming reminder time, or None if no active tasks
+    """
+    try:
+        with _cursor() as cursor:
+            cursor.execute(
+                """SELECT MIN(CASE WHEN deadline > %s THEN deadline
+                                   ELSE deadline + (FLOOR(EXTRACT(EPOCH FROM (%s - deadline)) / 86400) + 1)
+                                                   * INTERVAL '1 day'
+                              END)
+                   FROM (SELECT (date::date + time::interval) AS deadline
+                         FROM tasks
+                         WHERE status NOT IN ('completed', 'cancelled')) active""",
+                (now, now)
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
+    except Exception as e:
+        logger.error(f"Error getting next reminder time: {e}")
+        return None
+
+
 def get_multiple_groups_tasks(group_ids):
     """Get all tasks for multiple groups (for admins with multiple groups)."""
     if not group_ids:
         return []
         
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        placeholders = ','.join('%s' * len(group_ids))
-        query = f"""SELECT task_id, date, time, description, title, group_id, assigned_to_list, 
-                           status, has_media, created_at, created_by
-                    FROM tasks WHERE group_id IN ({placeholders}) AND status != 'cancelled' 
-                    ORDER BY created_at DESC"""
-        cursor.execute(query, group_ids)
-        tasks = []
-        for row in cursor.fetchall():
-            tasks.append({
-                'task_id': row[0],
-                'date': row[1],
-                'time': row[2],
-                'description': row[3],
-                'title': row[4],
-                'group_id': row[5],
-                'assigned_to_list': row[6],
-                'status': row[7],
-                'has_media': row[8],
-                'created_at': row[9],
-                'created_by': row[10]
-            })
-        conn.close()
-        return tasks
+        with _cursor() as cursor:
+            placeholders = ','.join('%s' * len(group_ids))
+            query = f"""SELECT task_id, date, time, description, title, group_id, assigned_to_list, 
+                               status, has_media, created_at, created_by
+                        FROM tasks WHERE group_id IN ({placeholders}) AND status != 'cancelled' 
+                        ORDER BY created_at DESC"""
+            cursor.execute(query, group_ids)
+            tasks = []
+            for row in cursor.fetchall():
+                tasks.append({
+                    'task_id': row[0],
+                    'date': row[1],
+                    'time': row[2],
+                    'description': row[3],
+                    'title': row[4],
+                    'group_id': row[5],
+                    'assigned_to_list': row[6],
+                    'status': row[7],
+                    'has_media': row[8],
+                    'created_at': row[9],
+                    'created_by': row[10]
+                })
+            return tasks
     except Exception as e:
         logger.error(f"Error getting multiple groups tasks: {e}")
-        conn.close()
         return []
 
 
@@ -1956,22 +2014,17 @@ def update_task_status(task_id, new_status):
     Returns:
         bool: True if successful
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            "UPDATE tasks SET status = %s WHERE task_id = %s",
-            (new_status, task_id)
-        )
+        with _cursor(commit=True) as cursor:
+            cursor.execute(
+                "UPDATE tasks SET status = %s WHERE task_id = %s",
+                (new_status, task_id)
+            )
         
-        conn.commit()
-        conn.close()
-        logger.info(f"Updated task {task_id} status to {new_status}")
-        return True
+            logger.debug("Updated task %s status to %s", task_id, new_status)
+            return True
     except Exception as e:
         logger.error(f"Error updating task status: {e}")
-        conn.close()
         return False
 
 
@@ -1988,29 +2041,24 @@ def update_task_assignment(task_id, assigned_to_list):
     """
     import json
     
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        assigned_to_json = json.dumps(assigned_to_list)
-        cursor.execute(
-            """UPDATE tasks SET assigned_to_list = %s, updated_at = CURRENT_TIMESTAMP 
-               WHERE task_id = %s""",
-            (assigned_to_json, task_id)
-        )
-        rows_updated = cursor.rowcount
-        conn.commit()
-        conn.close()
+        with _cursor(commit=True) as cursor:
+            assigned_to_json = json.dumps(assigned_to_list)
+            cursor.execute(
+                """UPDATE tasks SET assigned_to_list = %s, updated_at = CURRENT_TIMESTAMP 
+                   WHERE task_id = %s""",
+                (assigned_to_json, task_id)
+            )
+            rows_updated = cursor.rowcount
         
-        if rows_updated > 0:
-            logger.info(f"Updated task {task_id} assignments")
-            return True
-        else:
-            logger.warning(f"Task {task_id} not found for assignment update")
-            return False
+            if rows_updated > 0:
+                logger.debug("Updated task %s assignments", task_id)
+                return True
+            else:
+                logger.warning(f"Task {task_id} not found for assignment update")
+                return False
     except Exception as e:
         logger.error(f"Error updating task assignment: {e}")
-        conn.close()
         return False
 
 
@@ -2026,69 +2074,54 @@ def update_task_field(task_id, field_name, value):
     Returns:
         bool: True if successful
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        # Allowed fields to prevent SQL injection
-        allowed_fields = ['title', 'description', 'assigned_to_list', 'date', 'time', 'has_media', 'group_id']
+        with _cursor(commit=True) as cursor:
+            # Allowed fields to prevent SQL injection
+            allowed_fields = ['title', 'description', 'assigned_to_list', 'date', 'time', 'has_media', 'group_id']
         
-        if field_name not in allowed_fields:
-            logger.warning(f"Attempted to update disallowed field: {field_name}")
-            conn.close()
-            return False
+            if field_name not in allowed_fields:
+                logger.warning(f"Attempted to update disallowed field: {field_name}")
+                return False
         
-        query = f"UPDATE tasks SET {field_name} = %s, updated_at = CURRENT_TIMESTAMP WHERE task_id = %s"
-        cursor.execute(query, (value, task_id))
+            query = f"UPDATE tasks SET {field_name} = %s, updated_at = CURRENT_TIMESTAMP WHERE task_id = %s"
+            cursor.execute(query, (value, task_id))
         
-        rows_updated = cursor.rowcount
-        conn.commit()
-        conn.close()
+            rows_updated = cursor.rowcount
         
-        if rows_updated > 0:
-            logger.info(f"Updated task {task_id} field {field_name}")
-            return True
-        else:
-            logger.warning(f"Task {task_id} not found for field update")
-            return False
+            if rows_updated > 0:
+                logger.debug("Updated task %s field %s", task_id, field_name)
+                return True
+            else:
+                logger.warning(f"Task {task_id} not found for field update")
+                return False
     except Exception as e:
         logger.error(f"Error updating task field {field_name}: {e}")
-        conn.close()
         return False
 
 
 def get_task_by_id(task_id):
     """Get task information by ID."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            """SELECT task_id, title, date, time, description, group_id, 
-                      assigned_to_list, status, has_media, created_by, created_at 
-               FROM tasks WHERE task_id = %s""",
-            (task_id,)
-        )
-        row = cursor.fetchone()
-        conn.close()
-        if row:
-            return {
-                "task_id": row[0],
-                "title": row[1],
-                "date": row[2],
-                "time": row[3],
-                "description": row[4],
-                "group_id": row[5],
-                "assigned_to_list": row[6],
-                "status": row[7],
-                "has_media": row[8],
-                "created_by": row[9],
-                "created_at": row[10]
-            }
-        return None
+        with _cursor() as cursor:
+            _execute_prepared(cursor, "get_task_by_id", (task_id,))
+            row = cursor.fetchone()
+            if row:
+                return {
+                    "task_id": row[0],
+                    "title": row[1],
+                    "date": row[2],
+                    "time": row[3],
+                    "description": row[4],
+                    "group_id": row[5],
+                    "assigned_to_list": row[6],
+                    "status": row[7],
+                    "has_media": row[8],
+                    "created_by": row[9],
+                    "created_at": row[10]
+                }
+            return None
     except Exception as e:
         logger.error(f"Error getting task: {e}")
-        conn.close()
         return None
 
 
@@ -2110,116 +2143,99 @@ def add_task_media(task_id, file_id, file_type, file_name=None, file_size=None):
     Returns:
         int: ID of media record, or None if failed
     """
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        # Check media count for this task (max 20)
-        cursor.execute("SELECT COUNT(*) FROM task_media WHERE task_id = %s", (task_id,))
-        media_count = cursor.fetchone()[0]
+        with _cursor(commit=True) as cursor:
+            # Check media count for this task (max 20)
+            cursor.execute("SELECT COUNT(*) FROM task_media WHERE task_id = %s", (task_id,))
+            media_count = cursor.fetchone()[0]
         
-        if media_count >= 20:
-            logger.warning(f"Task {task_id} already has maximum 20 media files")
-            conn.close()
-            return None
+            if media_count >= 20:
+                logger.warning(f"Task {task_id} already has maximum 20 media files")
+                return None
         
-        cursor.execute(
-            """INSERT INTO task_media (task_id, file_id, file_type, file_name, file_size) 
-               VALUES (%s, %s, %s, %s, %s) RETURNING media_id""",
-            (task_id, file_id, file_type, file_name, file_size)
-        )
-        media_id = cursor.fetchone()[0]
+            cursor.execute(
+                """INSERT INTO task_media (task_id, file_id, file_type, file_name, file_size) 
+                   VALUES (%s, %s, %s, %s, %s) RETURNING media_id""",
+                (task_id, file_id, file_type, file_name, file_size)
+            )
+            media_id = cursor.fetchone()[0]
         
-        # Update task has_media flag
-        cursor.execute(
-            "UPDATE tasks SET has_media = 1 WHERE task_id = %s",
-            (task_id,)
-        )
+            # Update task has_media flag
+            cursor.execute(
+                "UPDATE tasks SET has_media = 1 WHERE task_id = %s",
+                (task_id,)
+            )
         
-        conn.commit()
-        conn.close()
-        logger.info(f"Added media {media_id} to task {task_id}")
-        return media_id
+            logger.debug("Added media %s to task %s", media_id, task_id)
+            return media_id
     except Exception as e:
         logger.error(f"Error adding task media: {e}")
-        conn.close()
         return None
 
 
 def get_task_media(task_id):
     """Get all media files for a task."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            """SELECT media_id, file_id, file_type, file_name, file_size, added_at 
-               FROM task_media WHERE task_id = %s ORDER BY added_at""",
-            (task_id,)
-        )
-        media = []
-        for row in cursor.fetchall():
-            media.append({
-                'media_id': row[0],
-                'file_id': row[1],
-                'file_type': row[2],
-                'file_name': row[3],
-                'file_size': row[4],
-                'added_at': row[5]
-            })
-        conn.close()
-        return media
+        with _cursor() as cursor:
+            cursor.execute(
+                """SELECT media_id, file_id, file_type, file_name, file_size, added_at 
+                   FROM task_media WHERE task_id = %s ORDER BY added_at""",
+                (task_id,)
+            )
+            media = []
+            for row in cursor.fetchall():
+                media.append({
+                    'media_id': row[0],
+                    'file_id': row[1],
+                    'file_type': row[2],
+                    'file_name': row[3],
+                    'file_size': row[4],
+                    'added_at': row[5]
+                })
+            return media
     except Exception as e:
         logger.error(f"Error getting task media: {e}")
-        conn.close()
         return []
 
 
 def remove_task_media(media_id):
     """Remove a media file from a task."""
-    conn = _get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute("SELECT task_id FROM task_media WHERE media_id = %s", (media_id,))
-        row = cursor.fetchone()
+        with _cursor(commit=True) as cursor:
+            cursor.execute("SELECT task_id FROM task_media WHERE media_id = %s", (media_id,))
+            row = cursor.fetchone()
         
-        if not row:
-            conn.close()
-            return False
+            if not row:
+                return False
         
-        task_id = row[0]
+            task_id = row[0]
         
-        cursor.execute("DELETE FROM task_media WHERE media_id = %s", (media_id,))
+            cursor.execute("DELETE FROM task_media WHERE media_id = %s", (media_id,))
         
-        # If no more media, update has_media flag
-        cursor.execute("SELECT COUNT(*) FROM task_media WHERE task_id = %s", (task_id,))
-        if cursor.fetchone()[0] == 0:
-            cursor.execute("UPDATE tasks SET has_media = 0 WHERE task_id = %s", (task_id,))
+            # If no more media, update has_media flag
+            cursor.execute(
+                """UPDATE tasks SET has_media = 0
+                   WHERE task_id = %s AND NOT EXISTS (SELECT 1 FROM task_media WHERE task_id = %s)""",
+                (task_id, task_id)
+            )
         
-        conn.commit()
-        conn.close()
-        logger.info(f"Removed media {media_id}")
-        return True
+            logger.debug("Removed media %s", media_id)
+            return True
     except Exception as e:
         logger.error(f"Error removing task media: {e}")
-        conn.close()
         return False
 
 
 def create_registration_request(user_id, name, username=None):
     """Create a new registration request."""
-    conn = None
-    try:
-        conn = _get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO registration_requests (user_id, name, username, status)
-            VALUES (%s, %s, %s, 'pending')
-        ''', (user_id, name, username))
-        conn.commit()
-        logger.info(f"Registration request created for user {user_id}")
-        return True
+    try:
+        with _cursor(commit=True) as cursor:
+            cursor.execute('''
+                INSERT INTO registration_requests (user_id, name, username, status)
+                VALUES (%s, %s, %s, 'pending')
+            ''', (user_id, name, username))
+            logger.info("Registration request created for user %s", user_id)
+            return True
     except Exception as e:
         error_msg = str(e)
         if "unique constraint" in error_msg.lower():
@@ -2227,147 +2243,153 @@ def create_registration_request(user_id, name, username=None):
         else:
             logger.error(f"Error creating registration request: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
 
 
 def get_pending_registration_requests():
     """Get all pending registration requests."""
     try:
-        conn = _get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT request_id, user_id, name, username, status, requested_at, reviewed_by, reviewed_at
-            FROM registration_requests 
-            WHERE status = 'pending' 
-            ORDER BY requested_at DESC
-        ''')
-        rows = cursor.fetchall()
-        requests = []
-        for row in rows:
-            requests.append({
-                'request_id': row[0],
-                'user_id': row[1],
-                'name': row[2],
-                'username': row[3],
-                'status': row[4],
-                'requested_at': row[5],
-                'reviewed_by': row[6],
-                'reviewed_at': row[7]
-            })
-        conn.close()
-        return requests
+        with _cursor() as cursor:
+            cursor.execute('''
+                SELECT request_id, user_id, name, username, status, requested_at, reviewed_by, reviewed_at
+                FROM registration_requests 
+                WHERE status = 'pending' 
+                ORDER BY requested_at DESC
+            ''')
+            rows = cursor.fetchall()
+            requests = []
+            for row in rows:
+                requests.append({
+                    'request_id': row[0],
+                    'user_id': row[1],
+                    'name': row[2],
+                    'username': row[3],
+                    'status': row[4],
+                    'requested_at': row[5],
+                    'reviewed_by': row[6],
+                    'reviewed_at': row[7]
+                })
+            return requests
     except Exception as e:
         logger.error(f"Error getting registration requests: {e}")
-        if conn:
-            conn.close()
         return []
 
 
 def approve_registration_request(request_id, reviewer_id):
     """Approve a registration request and create user."""
     try:
-        conn = _get_db_connection()
-        cursor = conn.cursor()
+        with _cursor(commit=True) as cursor:
+            # Get request details
+            cursor.execute("SELECT user_id, name FROM registration_requests WHERE request_id = %s", (request_id,))
+            row = cursor.fetchone()
+            if not row:
+                return False
         
-        # Get request details
-        cursor.execute("SELECT user_id, name FROM registration_requests WHERE request_id = %s", (request_id,))
-        row = cursor.fetchone()
-        if not row:
-            conn.close()
-            return False
+            user_id, name = row
         
-        user_id, name = row
-        
-        # Get username from request
-        cursor.execute("SELECT username FROM registration_requests WHERE request_id = %s", (request_id,))
-        username_row = cursor.fetchone()
-        username = username_row[0] if username_row else None
-        
-        # Update request status
-        cursor.execute('''
-            UPDATE registration_requests 
-            SET status = 'approved', reviewed_by = %s, reviewed_at = CURRENT_TIMESTAMP
-            WHERE request_id = %s
-        ''', (reviewer_id, request_id))
-        
-        # Upsert user in users table - update if exists, insert if not
-        cursor.execute('''
-            INSERT INTO users (user_id, name, username, registered)
-            VALUES (%s, %s, %s, 1)
-            ON CONFLICT (user_id) DO UPDATE 
-            SET name = COALESCE(EXCLUDED.name, users.name),
-                username = COALESCE(EXCLUDED.username, users.username),
-                registered = 1
-        ''', (user_id, name, username))
+            # Get username from request
+            cursor.execute("SELECT username FROM registration_requests WHERE request_id = %s", (request_id,))
+            username_row = cursor.fetchone()
+            username = username_row[0] if username_row else None
         
-        conn.commit()
-        conn.close()
-        logger.info(f"Approved registration request {request_id} for user {user_id} (username: {username})")
-        return True
+            # Update request status
+            cursor.execute('''
+                UPDATE registration_requests 
+                SET status = 'approved', reviewed_by = %s, reviewed_at = CURRENT_TIMESTAMP
+                WHERE request_id = %s
+            ''', (reviewer_id, request_id))
+        
+            # Upsert user in users table - update if exists, insert if not
+            cursor.execute('''
+                INSERT INTO users (user_id, name, username, registered)
+                VALUES (%s, %s, %s, 1)
+                ON CONFLICT (user_id) DO UPDATE 
+                SET name = COALESCE(EXCLUDED.name, users.name),
+                    username = COALESCE(EXCLUDED.username, users.username),
+                    registered = 1
+            ''', (user_id, name, username))
+        
+            # Invalidate cache
+            from simple_cache import get_cache
+            get_cache().invalidate("all_users")
+            get_cache().invalidate(f"user_{user_id}")
+            logger.info("Approved registration request %s for user %s (username: %s)", request_id, user_id, username)
+            return True
     except Exception as e:
         logger.error(f"Error approving registration request: {e}")
-        conn.close()
         return False
 
 
 def reject_registration_request(request_id, reviewer_id):
     """Reject a registration request."""
     try:
-        conn = _get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE registration_requests 
-            SET status = 'rejected', reviewed_by = %s, reviewed_at = CURRENT_TIMESTAMP
-            WHERE request_id = %s
-        ''', (reviewer_id, request_id))
-        conn.commit()
-        conn.close()
-        logger.info(f"Rejected registration request {request_id}")
-        return True
+        with _cursor(commit=True) as cursor:
+            cursor.execute('''
+                UPDATE registration_requests 
+                SET status = 'rejected', reviewed_by = %s, reviewed_at = CURRENT_TIMESTAMP
+                WHERE request_id = %s
+            ''', (reviewer_id, request_id))
+            logger.info("Rejected registration request %s", request_id)
+            return True
     except Exception as e:
         logger.error(f"Error rejecting registration request: {e}")
-        conn.close()
         return False
 
 
 def get_registration_request_by_user_id(user_id):
     """Get registration request for a specific user."""
     try:
-        conn = _get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT request_id, user_id, name, username, status, requested_at, reviewed_by, reviewed_at
-            FROM registration_requests 
-            WHERE user_id = %s 
-            ORDER BY requested_at DESC 
-            LIMIT 1
-        ''', (user_id,))
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return {
-                'request_id': row[0],
-                'user_id': row[1],
-                'name': row[2],
-                'username': row[3],
-                'status': row[4],
-                'requested_at': row[5],
-                'reviewed_by': row[6],
-                'reviewed_at': row[7]
-            }
-        return None
+        with _cursor() as cursor:
+            cursor.execute('''
+                SELECT request_id, user_id, name, username, status, requested_at, reviewed_by, reviewed_at
+                FROM registration_requests 
+                WHERE user_id = %s 
+                ORDER BY requested_at DESC 
+                LIMIT 1
+            ''', (user_id,))
+            row = cursor.fetchone()
+        
+            if row:
+                return {
+                    'request_id': row[0],
+                    'user_id': row[1],
+                    'name': row[2],
+                    'username': row[3],
+                    'status': row[4],
+                    'requested_at': row[5],
+                    'reviewed_by': row[6],
+                    'reviewed_at': row[7]
+                }
+            return None
     except Exception as e:
         logger.error(f"Error getting registration request: {e}")
-        if conn:
-            conn.close()
         return None
 
 
 # ========== TASK ASSIGNEE STATUS FUNCTIONS ==========
 
+def _ensure_users(cursor, user_ids):
+    """Insert placeholder rows for any user_ids not in users yet, in one statement."""
+    inserted = execute_values(
+        cursor,
+        "INSERT INTO users (user_id, name) VALUES %s ON CONFLICT (user_id) DO NOTHING RETURNING user_id",
+        [(user_id, f"User_{user_id}") for user_id in user_ids],
+        fetch=True
+    )
+    if inserted:
+        from simple_cache import get_cache
+        get_cache().invalidate("all_users")
+        logger.debug("Created placeholder users: %s", [row[0] for row in inserted])
+
+
+def _insert_task_assignees(cursor, task_id, user_ids, status):
+    """Insert all assignee rows for a task in one statement."""
+    execute_values(
+        cursor,
+        "INSERT INTO task_assignees (task_id, user_id, status) VALUES %s",
+        [(task_id, user_id, status) for user_id in user_ids]
+    )
+
+
 def add_task_assignees(task_id, user_ids, initial_status='pending'):
     """
     Add assignees to a task with an initial status.
@@ -2383,28 +2405,16 @@ def add_task_assignees(task_id, user_ids, initial_status='pending'):
     if not user_ids:
         return True
     
-    # Ensure all user_ids exist in users table
-    for user_id in user_ids:
-        if not user_exists(user_id):
-            add_user(user_id, f"User_{user_id}", None)
-        
     try:
-        conn = _get_db_connection()
-        cursor = conn.cursor()
-        
-        for user_id in user_ids:
-            cursor.execute('''
-                INSERT INTO task_assignees (task_id, user_id, status)
-                VALUES (%s, %s, %s)
-            ''', (task_id, user_id, initial_status))
+        with _cursor(commit=True) as cursor:
+            # Ensure all user_ids exist in users table
+            _ensure_users(cursor, user_ids)
+            _insert_task_assignees(cursor, task_id, user_ids, initial_status)
         
-        conn.commit()
-        conn.close()
-        logger.info(f"Added {len(user_ids)} assignees to task {task_id} with status '{initial_status}'")
-        return True
+            logger.debug("Added %s assignees to task %s with status '%s'", len(user_ids), task_id, initial_status)
+            return True
     except Exception as e:
         logger.error(f"Error adding task assignees: {e}")
-        conn.close()
         return False
 
 
@@ -2419,25 +2429,58 @@ def get_task_assignee_statuses(task_id):
         dict: {user_id: status} mapping
     """
     try:
-        conn = _get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT user_id, status 
-            FROM task_assignees 
-            WHERE task_id = %s
-        ''', (task_id,))
+        with _cursor() as cursor:
+            cursor.execute('''
+                SELECT user_id, status 
+                FROM task_assignees 
+                WHERE task_id = %s
+            ''', (task_id,))
         
-        rows = cursor.fetchall()
-        conn.close()
+            rows = cursor.fetchall()
         
-        return {row[0]: row[1] for row in rows}
+            return {row[0]: row[1] for row in rows}
     except Exception as e:
         logger.error(f"Error getting task assignee statuses: {e}")
-        conn.close()
         return {}
 
 
+def get_pending_assignees(task_id, exclude_user_id=None):
+    """
+    Get assignees who have not yet finished their part of a task.
+    
+    Assignees whose own status is 'completed' or 'cancelled' are skipped, so
+    reminders only go to people who still have something to do.
+    
+    Args:
+        task_id: Task ID
+        exclude_user_id: Optional user ID to leave out (e.g. the actor)
+    
+    Returns:
+        list: User IDs in assigned_to_list order
+    """
+    try:
+        with _cursor() as cursor:
+            cursor.execute('''
+                SELECT assignee.user_id::bigint
+                FROM tasks t
+                CROSS JOIN LATERAL jsonb_array_elements_text(t.assigned_to_list::jsonb)
+                    WITH ORDINALITY AS assignee(user_id, position)
+                LEFT JOIN task_assignees ta
+                    ON ta.task_id = t.task_id AND ta.user_id = assignee.user_id::bigint
+                WHERE t.task_id = %s
+                  AND (ta.status IS NULL OR ta.status NOT IN ('completed', 'cancelled'))
+                  AND assignee.user_id::bigint IS DISTINCT FROM %s
+                ORDER BY assignee.position
+            ''', (task_id, exclude_user_id))
+        
+            rows = cursor.fetchall()
+        
+            return [row[0] for row in rows]
+    except Exception as e:
+        logger.error(f"Error getting pending assignees for task {task_id}: {e}")
+        return []
+
+
 def get_assignee_status(task_id, user_id):
     """
     Get the status of a specific assignee for a task.
@@ -2450,22 +2493,18 @@ def get_assignee_status(task_id, user_id):
         str: Status ('pending', 'in_progress', 'completed', 'cancelled') or None
     """
     try:
-        conn = _get_db_connection()
-        cursor = conn.cursor()
+        with _cursor() as cursor:
+            cursor.execute('''
+                SELECT status 
+                FROM task_assignees 
+                WHERE task_id = %s AND user_id = %s
+            ''', (task_id, user_id))
         
-        cursor.execute('''
-            SELECT status 
-            FROM task_assignees 
-            WHERE task_id = %s AND user_id = %s
-        ''', (task_id, user_id))
+            row = cursor.fetchone()
         
-        row = cursor.fetchone()
-        conn.close()
-        
-        return row[0] if row else None
+            return row[0] if row else None
     except Exception as e:
         logger.error(f"Error getting assignee status: {e}")
-        conn.close()
         return None
 
 
@@ -2487,41 +2526,136 @@ def update_assignee_status(task_id, user_id, new_status):
         return False
         
     try:
-        conn = _get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE task_assignees 
-            SET status = %s, status_updated_at = CURRENT_TIMESTAMP
-            WHERE task_id = %s AND user_id = %s
-        ''', (new_status, task_id, user_id))
+        with _cursor(commit=True) as cursor:
+            cursor.execute('''
+                UPDATE task_assignees 
+                SET status = %s, status_updated_at = CURRENT_TIMESTAMP
+                WHERE task_id = %s AND user_id = %s
+            ''', (new_status, task_id, user_id))
         
-        if cursor.rowcount == 0:
-            logger.warning(f"No assignee found for task {task_id}, user {user_id}")
-            conn.close()
-            return False
+            if cursor.rowcount == 0:
+                logger.warning(f"No assignee found for task {task_id}, user {user_id}")
+                return False
         
-        conn.commit()
         
-        # Calculate and update aggregate task status
-        aggregate_status = calculate_task_status(task_id)
-        cursor.execute('''
-            UPDATE tasks 
-            SET status = %s, updated_at = CURRENT_TIMESTAMP
-            WHERE task_id = %s
-        ''', (aggregate_status, task_id))
+            # Calculate and update aggregate task status
+            aggregate_status = _calculate_task_status(cursor, task_id)
+            cursor.execute('''
+                UPDATE tasks 
+                SET status = %s, updated_at = CURRENT_TIMESTAMP
+                WHERE task_id = %s
+            ''', (aggregate_status, task_id))
         
-        conn.commit()
-        conn.close()
         
-        logger.info(f"Updated task {task_id} assignee {user_id} status to '{new_status}', aggregate status: '{aggregate_status}'")
-        return True
+            logger.debug("Updated task %s assignee %s status to '%s', aggregate status: '%s'", task_id, user_id, new_status, aggregate_status)
+            return True
     except Exception as e:
         logger.error(f"Error updating assignee status: {e}")
-        conn.close()
         return False
 
 
+def change_assignee_status(task_id, user_id, new_status):
+    """
+    Atomically change an assignee's status and recompute the aggregate task status.
+    
+    Unlike get_assignee_status() + update_assignee_status() + calculate_task_status(),
+    this reads the previous status in the same statement that updates it and
+    recomputes the task status in SQL, using a single pooled connection.
+    
+    Args:
+        task_id: Task ID
+        user_id: User ID
+        new_status: New status value
+    
+    Returns:
+        dict: {'old_status': str, 'task_status': str} on success,
+              None if the user is not an assignee of the task,
+              False on invalid status or database error
+    """
+    valid_statuses = ['pending', 'in_progress', 'completed', 'cancelled']
+    if new_status not in valid_statuses:
+        logger.error(f"Invalid status: {new_status}")
+        return False
+    
+    try:
+        with _cursor(commit=True) as cursor:
+            cursor.execute('''
+                UPDATE task_assignees ta
+                SET status = %s, status_updated_at = CURRENT_TIMESTAMP
+                FROM (
+                    SELECT id, status FROM task_assignees
+                    WHERE task_id = %s AND user_id = %s
+                    FOR UPDATE
+                ) old
+                WHERE ta.id = old.id
+                RETURNING old.status
+            ''', (new_status, task_id, user_id))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            old_status = row[0]
+        
+            # Same rules as calculate_task_status(), evaluated in the database
+            cursor.execute('''
+                UPDATE tasks t
+                SET status = agg.status, updated_at = CURRENT_TIMESTAMP
+                FROM (
+                    SELECT CASE
+                        WHEN COUNT(*) = 0 THEN 'pending'
+                        WHEN COUNT(*) FILTER (WHERE status = 'completed') = COUNT(*) THEN 'completed'
+                        WHEN COUNT(*) FILTER (WHERE status = 'in_progress') > 0 THEN 'in_progress'
+                        WHEN COUNT(*) FILTER (WHERE status = 'cancelled') = COUNT(*) THEN 'cancelled'
+                        ELSE 'pending'
+                    END AS status
+                    FROM task_assignees
+                    WHERE task_id = %s
+                ) agg
+                WHERE t.task_id = %s
+                RETURNING t.status
+            ''', (task_id, task_id))
+            row = cursor.fetchone()
+            task_status = row[0] if row else new_status
+        
+            logger.debug("Updated task %s assignee %s status '%s' -> '%s', aggregate status: '%s'", task_id, user_id, old_status, new_status, task_status)
+            return {'old_status': old_status, 'task_status': task_status}
+    except Exception as e:
+        logger.error(f"Error changing assignee status: {e}")
+        return False
+
+
+def _calculate_task_status(cursor, task_id):
+    """Aggregate task status on the caller's cursor, so it sees the caller's uncommitted changes."""
+    cursor.execute('''
+        SELECT status, COUNT(*) as count
+        FROM task_assignees 
+        WHERE task_id = %s
+        GROUP BY status
+    ''', (task_id,))
+    
+    rows = cursor.fetchall()
+    
+    if not rows:
+        return 'pending'  # Default if no assignees
+    
+    status_counts = {row[0]: row[1] for row in rows}
+    total_assignees = sum(status_counts.values())
+    
+    # All completed → completed
+    if status_counts.get('completed', 0) == total_assignees:
+        return 'completed'
+    
+    # At least one in_progress → in_progress
+    if status_counts.get('in_progress', 0) > 0:
+        return 'in_progress'
+    
+    # All cancelled → cancelled
+    if status_counts.get('cancelled', 0) == total_assignees:
+        return 'cancelled'
+    
+    # Default: pending (if mix of pending/cancelled or all pending)
+    return 'pending'
+
+
 def calculate_task_status(task_id):
     """
     Calculate aggregate task status based on all assignee statuses.
@@ -2540,43 +2674,10 @@ def calculate_task_status(task_id):
         str: Aggregate status
     """
     try:
-        conn = _get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT status, COUNT(*) as count
-            FROM task_assignees 
-            WHERE task_id = %s
-            GROUP BY status
-        ''', (task_id,))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        if not rows:
-            return 'pending'  # Default if no assignees
-        
-        status_counts = {row[0]: row[1] for row in rows}
-        total_assignees = sum(status_counts.values())
-        
-        # All completed → completed
-        if status_counts.get('completed', 0) == total_assignees:
-            return 'completed'
-        
-        # At least one in_progress → in_progress
-        if status_counts.get('in_progress', 0) > 0:
-            return 'in_progress'
-        
-        # All cancelled → cancelled
-        if status_counts.get('cancelled', 0) == total_assignees:
-            return 'cancelled'
-        
-        # Default: pending (if mix of pending/cancelled or all pending)
-        return 'pending'
-        
+        with _cursor() as cursor:
+            return _calculate_task_status(cursor, task_id)
     except Exception as e:
         logger.error(f"Error calculating task status: {e}")
-        conn.close()
         return 'pending'
 
 
@@ -2592,32 +2693,26 @@ def remove_task_assignee(task_id, user_id):
         bool: Success status
     """
     try:
-        conn = _get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            DELETE FROM task_assignees 
-            WHERE task_id = %s AND user_id = %s
-        ''', (task_id, user_id))
+        with _cursor(commit=True) as cursor:
+            cursor.execute('''
+                DELETE FROM task_assignees 
+                WHERE task_id = %s AND user_id = %s
+            ''', (task_id, user_id))
         
-        conn.commit()
         
-        # Recalculate aggregate status
-        if cursor.rowcount > 0:
-            aggregate_status = calculate_task_status(task_id)
-            cursor.execute('''
-                UPDATE tasks 
-                SET status = %s, updated_at = CURRENT_TIMESTAMP
-                WHERE task_id = %s
-            ''', (aggregate_status, task_id))
-            conn.commit()
+            # Recalculate aggregate status
+            if cursor.rowcount > 0:
+                aggregate_status = _calculate_task_status(cursor, task_id)
+                cursor.execute('''
+                    UPDATE tasks 
+                    SET status = %s, updated_at = CURRENT_TIMESTAMP
+                    WHERE task_id = %s
+                ''', (aggregate_status, task_id))
         
-        conn.close()
-        logger.info(f"Removed assignee {user_id} from task {task_id}")
-        return True
+            logger.debug("Removed assignee %s from task %s", user_id, task_id)
+            return True
     except Exception as e:
         logger.error(f"Error removing task assignee: {e}")
-        conn.close()
         return False
 
 
@@ -2647,65 +2742,55 @@ def get_notification_recipients(task_id, include_assignees=True):
         dict: Dictionary with recipient information
     """
     import json
-    import os
-    from dotenv import load_dotenv
+    from config import Config
     
-    # Load super admin IDs from environment
-    load_dotenv()
-    super_admin_ids_str = os.getenv("SUPER_ADMIN_ID", "0")
-    super_admin_ids = [
-        int(id.strip()) for id in super_admin_ids_str.split(",") if id.strip()
-    ]
-    
-    conn = _get_db_connection()
-    cursor = conn.cursor()
+    # Super admin IDs are parsed once at import in Config
+    super_admin_ids = list(Config.SUPER_ADMIN_IDS)
     
     try:
-        # Get task info (creator, group_id, assigned_to_list)
-        cursor.execute(
-            """SELECT created_by, group_id, assigned_to_list 
-               FROM tasks WHERE task_id = %s""",
-            (task_id,)
-        )
-        result = cursor.fetchone()
+        with _cursor() as cursor:
+            # Get task info (creator, group_id, assigned_to_list)
+            cursor.execute(
+                """SELECT created_by, group_id, assigned_to_list 
+                   FROM tasks WHERE task_id = %s""",
+                (task_id,)
+            )
+            result = cursor.fetchone()
         
-        if not result:
-            conn.close()
-            return {
-                'creator': None,
-                'assignees': [],
-                'admins': [],
-                'super_admin_ids': super_admin_ids
-            }
+            if not result:
+                return {
+                    'creator': None,
+                    'assignees': [],
+                    'admins': [],
+                    'super_admin_ids': super_admin_ids
+                }
         
-        creator_id, group_id, assigned_to_json = result
+            creator_id, group_id, assigned_to_json = result
         
-        # Parse assigned_to_list
-        assignees = []
-        if include_assignees and assigned_to_json:
-            try:
-                assignees = json.loads(assigned_to_json)
-            except json.JSONDecodeError:
-                assignees = []
+            # Parse assigned_to_list
+            assignees = []
+            if include_assignees and assigned_to_json:
+                try:
+                    assignees = json.loads(assigned_to_json)
+                except json.JSONDecodeError:
+                    assignees = []
         
-        # Get group admins for this task's group
-        cursor.execute(
-            """SELECT admin_id FROM group_admins WHERE group_id = %s""",
-            (group_id,)
-        )
-        group_admins = [row[0] for row in cursor.fetchall()]
+            # Get group admins for this task's group
+            cursor.execute(
+                """SELECT admin_id FROM group_admins WHERE group_id = %s""",
+                (group_id,)
+            )
+            group_admins = [row[0] for row in cursor.fetchall()]
         
-        conn.close()
         
-        return {
-            'creator': creator_id,
-            'assignees': assignees,
-            'admins': group_admins,
-            'super_admin_ids': super_admin_ids
-        }
+            return {
+                'creator': creator_id,
+                'assignees': assignees,
+                'admins': group_admins,
+                'super_admin_ids': super_admin_ids
+            }
     except Exception as e:
         logger.error(f"Error getting notification recipients for task {task_id}: {e}")
-        conn.close()
         return {
             'creator': None,
             'assignees': [],
@@ -2714,6 +2799,83 @@ def get_notification_recipients(task_id, include_assignees=True):
         }
 
 
+# ============================================================================
+# Notification Retry Queue
+# ============================================================================
+
+def queue_notification_retry(chat_id, text, reply_markup, next_try):
+    """
+    Store a notification that failed to send so the retry job can deliver it later.
+    
+    Args:
+        chat_id (int): Recipient chat ID
+        text (str): Message text
+        reply_markup (str): Keyboard serialized as JSON, or None
+        next_try (datetime): Earliest time to try again
+        
+    Returns:
+        bool: True if the notification was queued
+    """
+    try:
+        with _cursor(commit=True) as cursor:
+            cursor.execute(
+                """INSERT INTO notification_retries (chat_id, text, reply_markup, next_try)
+                   VALUES (%s, %s, %s, %s)""",
+                (chat_id, text, reply_markup, next_try)
+            )
+            return True
+    except Exception as e:
+        logger.error(f"Error queueing notification retry for {chat_id}: {e}")
+        return False
+
+
+def get_due_notification_retries(now, limit=100):
+    """Get queued notifications whose next_try has passed, oldest first."""
+    try:
+        with _cursor() as cursor:
+            cursor.execute(
+                """SELECT retry_id, chat_id, text, reply_markup, attempts
+                   FROM notification_retries
+                   WHERE next_try <= %s
+                   ORDER BY next_try
+                   LIMIT %s""",
+                (now, limit)
+            )
+            retries = []
+            for row in cursor.fetchall():
+                retries.append({
+                    'retry_id': row[0],
+                    'chat_id': row[1],
+                    'text': row[2],
+                    'reply_markup': row[3],
+                    'attempts': row[4]
+                })
+            return retries
+    except Exception as e:
+        logger.error(f"Error getting due notification retries: {e}")
+        return []
+
 
+def reschedule_notification_retry(retry_id, next_try):
+    """Count a failed retry and push the notification's next attempt to next_try."""
+    try:
+        with _cursor(commit=True) as cursor:
+            cursor.execute(
+                "UPDATE notification_retries SET attempts = attempts + 1, next_try = %s WHERE retry_id = %s",
+                (next_try, retry_id)
+            )
+            return True
+    except Exception as e:
+        logger.error(f"Error rescheduling notification retry {retry_id}: {e}")
+        return False
 
 
+def delete_notification_retry(retry_id):
+    """Remove a queued notification (delivered or given up)."""
+    try:
+        with _cursor(commit=True) as cursor:
+            cursor.execute("DELETE FROM notification_retries WHERE retry_id = %s", (retry_id,))
+            return True
+    except Exception as e:
+        logger.error(f"Error deleting notification retry {retry_id}: {e}")
+        return False
@@ -1,19 +1,30 @@
 """
 Async wrapper for database operations.
-Wraps synchronous DB calls in asyncio.to_thread() to prevent blocking event loop.
+Runs synchronous DB calls on a bounded worker pool to prevent blocking event loop.
 Used by async handlers in bot.py and webhook mode.
 """
 import asyncio
 import logging
-from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
 from typing import Any, Callable
 
 logger = logging.getLogger(__name__)
 
+# Kept below the connection pool's maxconn (20) so DB worker threads can never
+# exhaust it, whatever the host's CPU count
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="db")
+
+
+async def run_db(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run a synchronous database function on DB_EXECUTOR."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DB_EXECUTOR, partial(func, *args, **kwargs))
+
 
 def async_db_operation(func: Callable) -> Callable:
     """
-    Decorator to wrap synchronous database operations in asyncio.to_thread().
+    Decorator to wrap synchronous database operations in run_db().
     Prevents blocking the event loop during webhook processing.
     
     Usage:
@@ -27,7 +38,7 @@ def async_db_operation(func: Callable) -> Callable:
     @wraps(func)
     async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
         try:
-            return await asyncio.to_thread(func, *args, **kwargs)
+            return await run_db(func, *args, **kwargs)
         except Exception as e:
             logger.error(f"Database operation {func.__name__} failed: {e}")
             raise
@@ -42,73 +53,133 @@ def async_db_operation(func: Callable) -> Callable:
 async def async_get_user_groups(user_id: int) -> list:
     """Non-blocking version of get_user_groups()."""
     import database
-    return await asyncio.to_thread(database.get_user_groups, user_id)
+    return await run_db(database.get_user_groups, user_id)
 
 
 async def async_get_group_tasks(group_id: int) -> list:
     """Non-blocking version of get_group_tasks()."""
     import database
-    return await asyncio.to_thread(database.get_group_tasks, group_id)
+    return await run_db(database.get_group_tasks, group_id)
 
 
 async def async_get_user_tasks(user_id: int) -> list:
     """Non-blocking version of get_user_tasks()."""
     import database
-    return await asyncio.to_thread(database.get_user_tasks, user_id)
+    return await run_db(database.get_user_tasks, user_id)
 
 
 async def async_get_task_by_id(task_id: int) -> dict:
     """Non-blocking version of get_task_by_id()."""
     import database
-    return await asyncio.to_thread(database.get_task_by_id, task_id)
+    return await run_db(database.get_task_by_id, task_id)
 
 
 async def async_get_group_users(group_id: int) -> list:
     """Non-blocking version of get_group_users()."""
     import database
-    return await asyncio.to_thread(database.get_group_users, group_id)
+    return await run_db(database.get_group_users, group_id)
 
 
 async def async_get_all_groups() -> list:
     """Non-blocking version of get_all_groups()."""
     import database
-    return await asyncio.to_thread(database.get_all_groups)
+    return await run_db(database.get_all_groups)
 
 
 async def async_get_user_by_id(user_id: int) -> dict:
     """Non-blocking version of get_user_by_id()."""
     import database
-    return await asyncio.to_thread(database.get_user_by_id, user_id)
+    return await run_db(database.get_user_by_id, user_id)
+
+
+async def async_get_bot_blocked_ids() -> frozenset:
+    """Non-blocking version of get_bot_blocked_ids()."""
+    import database
+    return await run_db(database.get_bot_blocked_ids)
 
 
 async def async_get_group(group_id: int) -> dict:
     """Non-blocking version of get_group()."""
     import database
-    return await asyncio.to_thread(database.get_group, group_id)
+    return await run_db(database.get_group, group_id)
 
 
 async def async_get_task_media(task_id: int) -> list:
     """Non-blocking version of get_task_media()."""
     import database
-    return await asyncio.to_thread(database.get_task_media, task_id)
+    return await run_db(database.get_task_media, task_id)
+
+
+async def async_get_tasks_created_by_user(user_id: int) -> list:
+    """Non-blocking version of get_tasks_created_by_user()."""
+    import database
+    return await run_db(database.get_tasks_created_by_user, user_id)
+
+
+async def async_get_archived_tasks_created_by_user_page(user_id: int, page: int = 0, page_size: int = 10) -> tuple:
+    """Non-blocking version of get_archived_tasks_created_by_user_page()."""
+    import database
+    return await run_db(database.get_archived_tasks_created_by_user_page, user_id, page, page_size)
+
+
+async def async_get_user_archived_tasks_page(user_id: int, page: int = 0, page_size: int = 10) -> tuple:
+    """Non-blocking version of get_user_archived_tasks_page()."""
+    import database
+    return await run_db(database.get_user_archived_tasks_page, user_id, page, page_size)
+
+
+async def async_get_all_tasks() -> list:
+    """Non-blocking version of get_all_tasks()."""
+    import database
+    return await run_db(database.get_all_tasks)
+
+
+async def async_get_group_assignee_task_counts(group_id: int) -> dict:
+    """Non-blocking version of get_group_assignee_task_counts()."""
+    import database
+    return await run_db(database.get_group_assignee_task_counts, group_id)
+
+
+async def async_get_overdue_tasks(now) -> list:
+    """Non-blocking version of get_overdue_tasks()."""
+    import database
+    return await run_db(database.get_overdue_tasks, now)
+
+
+async def async_get_next_reminder_time(now):
+    """Non-blocking version of get_next_reminder_time()."""
+    import database
+    return await run_db(database.get_next_reminder_time, now)
 
 
 async def async_get_multiple_groups_tasks(group_ids: list) -> list:
     """Non-blocking version of get_multiple_groups_tasks()."""
     import database
-    return await asyncio.to_thread(database.get_multiple_groups_tasks, group_ids)
+    return await run_db(database.get_multiple_groups_tasks, group_ids)
 
 
 async def async_get_admin_groups(admin_id: int) -> list:
     """Non-blocking version of get_admin_groups()."""
     import database
-    return await asyncio.to_thread(database.get_admin_groups, admin_id)
+    return await run_db(database.get_admin_groups, admin_id)
 
 
 async def async_get_group_admins(group_id: int) -> list:
     """Non-blocking version of get_group_admins()."""
     import database
-    return await asyncio.to_thread(database.get_group_admins, group_id)
+    return await run_db(database.get_group_admins, group_id)
+
+
+async def async_get_notification_recipients(task_id: int, include_assignees: bool = True) -> dict:
+    """Non-blocking version of get_notification_recipients()."""
+    import database
+    return await run_db(database.get_notification_recipients, task_id, include_assignees)
+
+
+async def async_get_pending_assignees(task_id: int, exclude_user_id: int = None) -> list:
+    """Non-blocking version of get_pending_assignees()."""
+    import database
+    return await run_db(database.get_pending_assignees, task_id, exclude_user_id)
 
 
 # ============================================================================
@@ -118,67 +189,97 @@ async def async_get_group_admins(group_id: int) -> list:
 async def async_add_user(user_id: int, name: str, username: str = None) -> bool:
     """Non-blocking version of add_user()."""
     import database
-    return await asyncio.to_thread(database.add_user, user_id, name, username)
+    return await run_db(database.add_user, user_id, name, username)
 
 
 async def async_create_task(title: str, date: str, time: str, description: str, 
                            group_id: int, assigned_to_list: str, created_by: int) -> int:
     """Non-blocking version of create_task()."""
     import database
-    return await asyncio.to_thread(
+    return await run_db(
         database.create_task, title, date, time, description, group_id, assigned_to_list, created_by
     )
 
 
+async def async_set_bot_blocked(user_id: int, blocked: bool) -> bool:
+    """Non-blocking version of set_bot_blocked()."""
+    import database
+    return await run_db(database.set_bot_blocked, user_id, blocked)
+
+
 async def async_update_task_status(task_id: int, new_status: str) -> bool:
     """Non-blocking version of update_task_status()."""
     import database
-    return await asyncio.to_thread(database.update_task_status, task_id, new_status)
+    return await run_db(database.update_task_status, task_id, new_status)
 
 
 async def async_update_task_field(task_id: int, field_name: str, value: Any) -> bool:
     """Non-blocking version of update_task_field()."""
     import database
-    return await asyncio.to_thread(database.update_task_field, task_id, field_name, value)
+    return await run_db(database.update_task_field, task_id, field_name, value)
 
 
 async def async_delete_task(task_id: int) -> bool:
     """Non-blocking version of delete_task()."""
     import database
-    return await asyncio.to_thread(database.delete_task, task_id)
+    return await run_db(database.delete_task, task_id)
 
 
 async def async_create_group(name: str, admin_id: int) -> int:
     """Non-blocking version of create_group()."""
     import database
-    return await asyncio.to_thread(database.create_group, name, admin_id)
+    return await run_db(database.create_group, name, admin_id)
 
 
 async def async_rename_group(group_id: int, new_name: str) -> bool:
     """Non-blocking version of rename_group()."""
     import database
-    return await asyncio.to_thread(database.rename_group, group_id, new_name)
+    return await run_db(database.rename_group, group_id, new_name)
 
 
 async def async_delete_group(group_id: int) -> bool:
     """Non-blocking version of delete_group()."""
     import database
-    return await asyncio.to_thread(database.delete_group, group_id)
+    return await run_db(database.delete_group, group_id)
 
 
 async def async_add_user_to_group(user_id: int, group_id: int) -> bool:
     """Non-blocking version of add_user_to_group()."""
     import database
-    return await asyncio.to_thread(database.add_user_to_group, user_id, group_id)
+    return await run_db(database.add_user_to_group, user_id, group_id)
 
 
 async def async_remove_user_from_group(user_id: int, group_id: int) -> bool:
     """Non-blocking version of remove_user_from_group()."""
     import database
-    return await asyncio.to_thread(database.remove_user_from_group, user_id, group_id)
+    return await run_db(database.remove_user_from_group, user_id, group_id)
 
 
 async def async_update_assignee_status(task_id: int, user_id: int, new_status: str) -> bool:
     """Non-blocking version of update_assignee_status()."""
     import database
-    return await asyncio.to_thread(database.update_assignee_status, task_id, user_id, new_status)
+    return await run_db(database.update_assignee_status, task_id, user_id, new_status)
+
+
+async def async_queue_notification_retry(chat_id: int, text: str, reply_markup: str, next_try) -> bool:
+    """Non-blocking version of queue_notification_retry()."""
+    import database
+    return await run_db(database.queue_notification_retry, chat_id, text, reply_markup, next_try)
+
+
+async def async_get_due_notification_retries(now, limit: int = 100) -> list:
+    """Non-blocking version of get_due_notification_retries()."""
+    import database
+    return await run_db(database.get_due_notification_retries, now, limit)
+
+
+async def async_reschedule_notification_retry(retry_id: int, next_try) -> bool:
+    """Non-blocking version of reschedule_notification_retry()."""
+    import database
+    return await run_db(database.reschedule_notification_retry, retry_id, next_try)
+
+
+async def async_delete_notification_retry(retry_id: int) -> bool:
+    """Non-blocking version of delete_notification_retry()."""
+    import database
+    return await run_db(database.delete_notification_retry, retry_id)
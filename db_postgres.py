@@ -6,11 +6,16 @@ import os
 import logging
 from typing import Optional
 from psycopg2 import connect, extensions
-from psycopg2.pool import SimpleConnectionPool
+from psycopg2.pool import ThreadedConnectionPool
 from psycopg2.extras import RealDictCursor
 
 logger = logging.getLogger(__name__)
 
+# Session settings sent with each pooled connection's startup packet, so they cost nothing per query:
+# no JIT compilation for the bot's short OLTP queries, and commits don't wait for the WAL flush
+# (a server crash can lose the last fraction of a second of commits, never corrupt data)
+DEFAULT_SESSION_OPTIONS = "-c jit=off -c synchronous_commit=off"
+
 
 class PostgreSQLConnection:
     """PostgreSQL database connection handler with connection pooling."""
@@ -72,7 +77,13 @@ class PostgreSQLConnection:
                 # Create pool with 5-20 connections
                 # minconn=5: keep 5 connections always open
                 # maxconn=20: allow up to 20 concurrent connections
-                self.pool = SimpleConnectionPool(5, 20, self.connection_string)
+                # TCP keepalives stop idle pooled connections from being silently dropped
+                # Threaded pool: handlers reach the DB from asyncio.to_thread workers
+                self.pool = ThreadedConnectionPool(
+                    5, 20, self.connection_string,
+                    keepalives=1, keepalives_idle=60, keepalives_interval=10, keepalives_count=5,
+                    options=os.getenv("DB_SESSION_OPTIONS", DEFAULT_SESSION_OPTIONS)
+                )
                 logger.info("✅ PostgreSQL connection pool initialized (5-20 connections)")
             except Exception as e:
                 logger.error(f"Failed to create connection pool: {e}")
@@ -101,8 +112,9 @@ class PostgreSQLConnection:
             elif elapsed > 0.1:
                 logger.debug(f"🐌 DB POOL GET: {elapsed:.3f}s (reusing connection)")
             
-            # Use AUTOCOMMIT mode for auto-commit
-            conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            # Use AUTOCOMMIT mode for auto-commit (only once per pooled connection)
+            if not conn.autocommit:
+                conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
             return conn
         except Exception as e:
             logger.error(f"Failed to get connection from pool: {e}")
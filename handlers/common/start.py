@@ -2,139 +2,141 @@
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 
-from database import user_exists, has_user_group, get_admin_groups, get_user_by_id
+from database import has_user_group, get_admin_groups
+from db_async import async_get_user_by_id, async_set_bot_blocked, run_db
 from utils.permissions import is_super_admin, is_group_admin
 
-
-async def show_main_menu(user_id: int, user_name: str, update: Update, is_callback: bool = False) -> None:
+# Static help texts, built once at import instead of on every /help
+SUPER_ADMIN_HELP_TEXT = (
+    "🔐 *Super Admin Commands:*\n"
+    "/start - Show main menu\n"
+    "/help - Show this help\n\n"
+    "Actions via inline buttons:\n"
+    "• Manage group administrators\n"
+    "• Manage all users\n"
+    "• View and edit all tasks\n"
+)
+
+GROUP_ADMIN_HELP_TEXT = (
+    "👔 *Group Admin Commands:*\n"
+    "/start - Show main menu\n"
+    "/help - Show this help\n\n"
+    "Actions via inline buttons:\n"
+    "• Create tasks (with media)\n"
+    "• View group tasks\n"
+    "• Manage group users\n"
+)
+
+USER_HELP_TEXT = (
+    "👷 *user Commands:*\n"
+    "/start - Show main menu\n"
+    "/help - Show this help\n\n"
+    "Actions via inline buttons:\n"
+    "• View your tasks\n"
+    "• Update task status\n"
+    "• View your statistics\n"
+)
+
+# Static role menus, built once at import instead of on every /start or "back to menu"
+SUPER_ADMIN_MENU_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📋 Задачи", callback_data="view_tasks_menu")],
+    [InlineKeyboardButton("👥 Отделы", callback_data="super_manage_groups")],
+    [InlineKeyboardButton("👤 Сотрудники", callback_data="super_manage_users")],
+])
+
+GROUP_ADMIN_MENU_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📋 Задачи", callback_data="view_tasks_menu")],
+    [InlineKeyboardButton("👥 Сотрудники", callback_data="admin_manage_users")],
+])
+
+USER_MENU_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📋 Задачи", callback_data="view_tasks_menu")],
+    [InlineKeyboardButton("🆕 Создать задачу", callback_data="create_task")],
+])
+
+REGISTRATION_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("Зарегистрироваться", callback_data="start_registration")],
+])
+
+
+def _build_main_menu(user_id: int, user_name: str) -> tuple:
     """
-    Show role-specific main menu.
+    Pick the role-specific menu text and keyboard (blocking DB lookups; run via run_db).
 
-    Args:
-        user_id: Telegram user ID
-        user_name: User's first name
-        update: Update object (can be message or callback query)
-        is_callback: True if called from callback query, False if from /start command
+    Returns:
+        tuple: (text, reply_markup or None)
     """
     from database import get_registration_request_by_user_id
 
     # Check if user is Super Admin
     if is_super_admin(user_id):
         # Super Admin Menu
-        keyboard = [
-            [InlineKeyboardButton(
-                "📋 Задачи", callback_data="view_tasks_menu")],
-            [InlineKeyboardButton(
-                "👥 Отделы", callback_data="super_manage_groups")],
-            [InlineKeyboardButton(
-                "👤 Сотрудники", callback_data="super_manage_users")],
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        text = f"🔐 Приветствую, {user_name}!\n\nГлавное меню:"
-
-        if is_callback and update.callback_query:
-            await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
-        elif update.message:
-            await update.message.reply_text(text, reply_markup=reply_markup)
+        return f"🔐 Приветствую, {user_name}!\n\nГлавное меню:", SUPER_ADMIN_MENU_MARKUP
 
     # Check if user is Group Admin
-    elif is_group_admin(user_id):
+    if is_group_admin(user_id):
         # Group Admin Menu
         admin_groups = get_admin_groups(user_id)
         group_names = ", ".join(
             [g['name'] for g in admin_groups]) if admin_groups else "Нет"
-
-        keyboard = [
-            [InlineKeyboardButton(
-                "📋 Задачи", callback_data="view_tasks_menu")],
-            [InlineKeyboardButton(
-                "👥 Сотрудники", callback_data="admin_manage_users")],
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
         text = f"👋 Приветствую, {user_name}!\nОтделы: {group_names}\n\nГлавное меню:"
+        return text, GROUP_ADMIN_MENU_MARKUP
 
-        if is_callback and update.callback_query:
-            await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
-        elif update.message:
-            await update.message.reply_text(text, reply_markup=reply_markup)
+    # Regular user/worker: check registration request status
+    reg_request = get_registration_request_by_user_id(user_id)
 
-    # Regular user/worker
-    else:
-        # Check registration request status
-        reg_request = get_registration_request_by_user_id(user_id)
-
-        if not reg_request:
-            # No registration request at all - show registration prompt
-            keyboard = [[InlineKeyboardButton(
-                "Зарегистрироваться", callback_data="start_registration")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            text = f"Вы не зарегистрированы. Нажмите ниже, чтобы подать заявку на регистрацию:"
-
-            if is_callback and update.callback_query:
-                await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
-            elif update.message:
-                await update.message.reply_text(text, reply_markup=reply_markup)
-
-        elif reg_request['status'] == 'pending':
-            # Pending registration request
-            text = (
-                f"⌛ Ваш запрос на регистрацию ожидает рассмотрения администратором.\n\n"
-                f"Пожалуйста, дождитесь одобрения."
-            )
+    if not reg_request:
+        # No registration request at all - show registration prompt
+        text = f"Вы не зарегистрированы. Нажмите ниже, чтобы подать заявку на регистрацию:"
+        return text, REGISTRATION_MARKUP
 
-            if is_callback and update.callback_query:
-                await update.callback_query.edit_message_text(text)
-            elif update.message:
-                await update.message.reply_text(text)
+    if reg_request['status'] == 'pending':
+        # Pending registration request
+        text = (
+            f"⌛ Ваш запрос на регистрацию ожидает рассмотрения администратором.\n\n"
+            f"Пожалуйста, дождитесь одобрения."
+        )
+        return text, None
 
-        elif reg_request['status'] == 'rejected':
-            # Rejected registration request
+    if reg_request['status'] == 'rejected':
+        # Rejected registration request
+        text = (
+            f"❌ Ваш запрос на регистрацию был отклонен.\n\n"
+            f"Пожалуйста, свяжитесь с администратором для уточнения деталей."
+        )
+        return text, None
+
+    if reg_request['status'] == 'approved':
+        # Approved but unassigned to group
+        if not has_user_group(user_id):
             text = (
-                f"❌ Ваш запрос на регистрацию был отклонен.\n\n"
-                f"Пожалуйста, свяжитесь с администратором для уточнения деталей."
+                f"✅ Вы одобрены, но еще не назначены ни в один отдел.\n\n"
+                f"Пожалуйста, свяжитесь с администратором, чтобы вас добавили в отдел."
             )
+            return text, None
+        # Approved and assigned to group - show tasks
+        return f"Приветствую, {user_name}!\n\nГлавное меню:", USER_MENU_MARKUP
 
-            if is_callback and update.callback_query:
-                await update.callback_query.edit_message_text(text)
-            elif update.message:
-                await update.message.reply_text(text)
-
-        elif reg_request['status'] == 'approved':
-            # Approved but unassigned to group
-            if not has_user_group(user_id):
-                text = (
-                    f"✅ Вы одобрены, но еще не назначены ни в один отдел.\n\n"
-                    f"Пожалуйста, свяжитесь с администратором, чтобы вас добавили в отдел."
-                )
-
-                if is_callback and update.callback_query:
-                    await update.callback_query.edit_message_text(text)
-                elif update.message:
-                    await update.message.reply_text(text)
-            else:
-                # Approved and assigned to group - show tasks
-                keyboard = [
-                    [InlineKeyboardButton(
-                        "📋 Задачи", callback_data="view_tasks_menu")],
-                    [InlineKeyboardButton(
-                        "🆕 Создать задачу", callback_data="create_task")],
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                text = f"Приветствую, {user_name}!\n\nГлавное меню:"
-
-                if is_callback and update.callback_query:
-                    await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
-                elif update.message:
-                    await update.message.reply_text(text, reply_markup=reply_markup)
-
-        else:
-            # Fallback for unknown status
-            text = "Статус вашей регистрации неизвестен. Свяжитесь с администратором."
-
-            if is_callback and update.callback_query:
-                await update.callback_query.edit_message_text(text)
-            elif update.message:
-                await update.message.reply_text(text)
+    # Fallback for unknown status
+    return "Статус вашей регистрации неизвестен. Свяжитесь с администратором.", None
+
+
+async def show_main_menu(user_id: int, user_name: str, update: Update, is_callback: bool = False) -> None:
+    """
+    Show role-specific main menu.
+
+    Args:
+        user_id: Telegram user ID
+        user_name: User's first name
+        update: Update object (can be message or callback query)
+        is_callback: True if called from callback query, False if from /start command
+    """
+    text, reply_markup = await run_db(_build_main_menu, user_id, user_name)
+
+    if is_callback and update.callback_query:
+        await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
+    elif update.message:
+        await update.message.reply_text(text, reply_markup=reply_markup)
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -145,24 +147,24 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_name = update.effective_user.first_name or "User"
     user_username = update.effective_user.username
 
-    # Check if user has a registration request
-    from database import get_registration_request_by_user_id
-    reg_request = get_registration_request_by_user_id(user_id)
+    # One lookup serves both the existence check and the display name
+    user = await async_get_user_by_id(user_id)
 
-    # If user has a pending request, don't add them to users table yet
     # If user doesn't exist in database, show registration options
-    if not user_exists(user_id):
-        # Check if they have a pending registration request
+    if not user:
+        # Registration request is only relevant for unknown users
+        from database import get_registration_request_by_user_id
+        reg_request = await run_db(get_registration_request_by_user_id, user_id)
         if not reg_request or reg_request['status'] != 'approved':
             # No approved registration, show registration prompt
             await show_main_menu(user_id, user_name, update, is_callback=False)
             return
-        else:
-            # They have an approved request, add them to users table (already done in approve_registration_request)
-            pass
+
+    # Writing to us again means they unblocked the bot; resume notifications
+    if user and user.get('bot_blocked'):
+        await async_set_bot_blocked(user_id, False)
 
     # Get user's name from database (or use Telegram first name as fallback)
-    user = get_user_by_id(user_id)
     user_name = user['name'] if user else user_name
 
     await show_main_menu(user_id, user_name, update, is_callback=False)
@@ -175,35 +177,11 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     user_id = update.effective_user.id
 
     if is_super_admin(user_id):
-        help_text = (
-            "🔐 *Super Admin Commands:*\n"
-            "/start - Show main menu\n"
-            "/help - Show this help\n\n"
-            "Actions via inline buttons:\n"
-            "• Manage group administrators\n"
-            "• Manage all users\n"
-            "• View and edit all tasks\n"
-        )
-    elif is_group_admin(user_id):
-        help_text = (
-            "👔 *Group Admin Commands:*\n"
-            "/start - Show main menu\n"
-            "/help - Show this help\n\n"
-            "Actions via inline buttons:\n"
-            "• Create tasks (with media)\n"
-            "• View group tasks\n"
-            "• Manage group users\n"
-        )
+        help_text = SUPER_ADMIN_HELP_TEXT
+    elif await run_db(is_group_admin, user_id):
+        help_text = GROUP_ADMIN_HELP_TEXT
     else:
-        help_text = (
-            "👷 *user Commands:*\n"
-            "/start - Show main menu\n"
-            "/help - Show this help\n\n"
-            "Actions via inline buttons:\n"
-            "• View your tasks\n"
-            "• Update task status\n"
-            "• View your statistics\n"
-        )
+        help_text = USER_HELP_TEXT
 
     if update.message:
         await update.message.reply_text(help_text, parse_mode="Markdown")
@@ -6,6 +6,7 @@ from telegram.ext import ContextTypes
 
 from database import get_group_users, get_admin_groups
 from utils.permissions import get_user_group_id
+from db_async import run_db
 
 # Import filter handlers to reuse for backwards compatibility
 from handlers.tasks.filters import filter_tasks_select_group, filter_tasks_group, filter_tasks_all
@@ -21,7 +22,7 @@ async def admin_view_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     # Set task view source to admin_view_tasks (for proper back navigation from task details)
     context.user_data['task_view_source'] = 'admin_view_tasks'
     
-    admin_groups = get_admin_groups(user_id)
+    admin_groups = await run_db(get_admin_groups, user_id)
     
     if len(admin_groups) == 1:
         # Single group - show tasks directly by setting temp_group_id and calling filter_tasks_group
@@ -46,12 +47,12 @@ async def admin_manage_users(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
     
     user_id = query.from_user.id
-    group_id = get_user_group_id(user_id)
-    users = get_group_users(group_id)
+    group_id = await run_db(get_user_group_id, user_id)
+    users = await run_db(get_group_users, group_id)
     
-    user_list = f"👥 работников в отделе ({len(users)}):\n\n"
-    for u in users:
-        user_list += f"• {u['name']}\n"
+    user_list = "".join(
+        [f"👥 работников в отделе ({len(users)}):\n\n"] + [f"• {u['name']}\n" for u in users]
+    )
     
     keyboard = [
         [InlineKeyboardButton("🆕 Добавить работника", callback_data="admin_add_user")],
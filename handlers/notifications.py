@@ -1,18 +1,208 @@
 """Notification handlers for bot"""
+import asyncio
+import json
 import logging
+from functools import lru_cache
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
 from telegram.ext import ContextTypes
 from datetime import datetime, timedelta
-from database import (
-    get_all_groups, get_group_tasks, get_task_by_id, 
-    get_notification_recipients, get_user_by_id
+from db_async import (
+    async_get_bot_blocked_ids, async_set_bot_blocked, async_get_next_reminder_time, async_get_notification_recipients, async_get_overdue_tasks,
+    async_queue_notification_retry, async_get_due_notification_retries,
+    async_reschedule_notification_retry, async_delete_notification_retry
 )
+from config import Config
 from utils.helpers import format_task_status
-import json
 
 logger = logging.getLogger(__name__)
 
 
+class AsyncTokenBucket:
+    """Token bucket that paces outgoing messages below Telegram's global limit."""
+
+    def __init__(self, rate: float = 30, capacity: int = 30):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it."""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# Shared by every broadcast so concurrent fan-outs never exceed ~30 msg/s
+BROADCAST_LIMITER = AsyncTokenBucket(rate=30, capacity=30)
+
+
+@lru_cache(maxsize=256)
+def _view_task_markup(task_id: int) -> InlineKeyboardMarkup:
+    """Build (once per task) the "view task" keyboard shared by every recipient."""
+    return InlineKeyboardMarkup([[InlineKeyboardButton("📋 Просмотреть задание", callback_data=f"view_task_{task_id}")]])
+
+
+# Caps in-flight notification sends so a large fan-out can't occupy the whole HTTP pool
+SEND_SLOTS = asyncio.Semaphore(Config.NOTIFY_CONCURRENCY)
+
+# How many times a send is retried after Telegram answers 429 (RetryAfter)
+SEND_RETRIES = 2
+
+
+# Queued retries: first one a minute after the failure, doubling up to an hour, then dropped
+RETRY_BASE_DELAY = timedelta(minutes=1)
+RETRY_MAX_DELAY = timedelta(hours=1)
+RETRY_MAX_ATTEMPTS = 8
+
+
+def _is_transient(error: Exception) -> bool:
+    """Rate limits, timeouts and connection errors; not blocked bots or bad chats."""
+    return isinstance(error, NetworkError) and not isinstance(error, BadRequest) or isinstance(error, RetryAfter)
+
+
+async def _send_now(context: ContextTypes.DEFAULT_TYPE, chat_id: int, text: str, reply_markup=None):
+    """Send a message within the concurrency cap and rate limit, waiting out 429s."""
+    async with SEND_SLOTS:
+        for attempt in range(SEND_RETRIES + 1):
+            await BROADCAST_LIMITER.acquire()
+            try:
+                return await context.bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup)
+            except RetryAfter as e:
+                if attempt == SEND_RETRIES:
+                    raise
+                logger.warning(f"Rate limited sending to {chat_id}, retrying in {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
+
+
+async def _paced_send(context: ContextTypes.DEFAULT_TYPE, chat_id: int, text: str, reply_markup=None):
+    """Send a notification; if it fails transiently, queue it in the DB for the retry job."""
+    try:
+        return await _send_now(context, chat_id, text, reply_markup)
+    except Exception as e:
+        if _is_transient(e):
+            await async_queue_notification_retry(
+                chat_id, text, reply_markup.to_json() if reply_markup else None,
+                datetime.now() + RETRY_BASE_DELAY
+            )
+        raise
+
+
+async def _handle_send_error(chat_id: int, error: Exception, what: str) -> None:
+    """Act on a failed send by error type instead of just logging it."""
+    if isinstance(error, Forbidden):
+        # Blocked the bot: skip them in broadcasts until they /start again
+        logger.info(f"User {chat_id} blocked the bot, pausing their notifications")
+        await async_set_bot_blocked(chat_id, True)
+    elif _is_transient(error):
+        logger.warning(f"Failed to send {what} to user {chat_id}, queued for retry: {error}")
+    else:
+        logger.error(f"Failed to send {what} to user {chat_id}: {error}")
+
+
+async def _fan_out(context: ContextTypes.DEFAULT_TYPE, sends: list, what: str) -> int:
+    """
+    Send messages concurrently, skipping users who blocked the bot.
+    
+    Args:
+        context: Bot context
+        sends: List of (chat_id, text, reply_markup) tuples
+        what: Notification kind, for log messages
+    
+    Returns:
+        Number of messages delivered
+    """
+    blocked = await async_get_bot_blocked_ids()
+    sends = [send for send in sends if send[0] not in blocked]
+    results = await asyncio.gather(*(
+        _paced_send(context, chat_id, text, reply_markup)
+        for chat_id, text, reply_markup in sends
+    ), return_exceptions=True)
+    
+    delivered = 0
+    for (chat_id, _, _), result in zip(sends, results):
+        if isinstance(result, Exception):
+            await _handle_send_error(chat_id, result, what)
+        else:
+            delivered += 1
+    return delivered
+
+
+async def retry_failed_notifications(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Job: resend queued notifications that are due, with exponential backoff."""
+    now = datetime.now()
+    retries = await async_get_due_notification_retries(now)
+    if not retries:
+        return
+    
+    async def _retry(item):
+        reply_markup = (
+            InlineKeyboardMarkup.de_json(json.loads(item['reply_markup']), context.bot)
+            if item['reply_markup'] else None
+        )
+        try:
+            await _send_now(context, item['chat_id'], item['text'], reply_markup)
+        except Exception as e:
+            attempts = item['attempts'] + 1
+            if _is_transient(e) and attempts < RETRY_MAX_ATTEMPTS:
+                delay = min(RETRY_BASE_DELAY * 2 ** attempts, RETRY_MAX_DELAY)
+                await async_reschedule_notification_retry(item['retry_id'], now + delay)
+                return
+            logger.error(f"Giving up on notification to {item['chat_id']} after {attempts} retries: {e}")
+        await async_delete_notification_retry(item['retry_id'])
+    
+    await asyncio.gather(*(_retry(item) for item in retries))
+
+
+# New-task notification text per recipient role; only the task fields vary
+ASSIGNMENT_TEMPLATES = {
+    "assignee": (
+        "📋 Новое задание!\n\n"
+        "Вам назначено новое задание:\n\n"
+        "📝 {description}\n\n"
+        "📅 Дедлайн: {deadline} в {time}\n\n"
+        "Просмотрите детали в меню 'Мои задания'."
+    ),
+    "admin": (
+        "📋 Новое задание в вашем отделе!\n\n"
+        "В отделе создано новое задание:\n\n"
+        "📝 {description}\n\n"
+        "📅 Дедлайн: {deadline} в {time}\n\n"
+        "Просмотрите детали в меню 'Мои задания'."
+    ),
+    "super_admin": (
+        "📋 Новое задание в системе!\n\n"
+        "Создано новое задание:\n\n"
+        "📝 {description}\n\n"
+        "📅 Дедлайн: {deadline} в {time}\n\n"
+        "Просмотрите детали в меню 'Мои задания'."
+    ),
+}
+
+STATUS_CHANGE_TEMPLATE = (
+    "🔔 Обновление статуса задания\n\n"
+    "📝 Задание: {description}...\n\n"
+    "Статус изменен с {old_status} на {new_status}\n\n"
+    "👤 Изменил: {changed_by}"
+)
+
+
+def _assignment_message(role: str, task_description: str, deadline: str, time: str) -> str:
+    """Fill the new-task template for the recipient's role."""
+    template = ASSIGNMENT_TEMPLATES.get(role, ASSIGNMENT_TEMPLATES["super_admin"])
+    return template.format(description=task_description, deadline=deadline, time=time)
+
+
 async def send_task_assignment_notification(
     context: ContextTypes.DEFAULT_TYPE, 
     user_id: int, 
@@ -21,7 +211,7 @@ async def send_task_assignment_notification(
     deadline: str, 
     time: str,
     role: str = "assignee"
-) -> None:
+) -> bool:
     """
     Send notification to user about new task assignment.
     
@@ -33,38 +223,13 @@ async def send_task_assignment_notification(
         deadline: Date string
         time: Time string
         role: "assignee" for regular assignees, "admin" for admins receiving as creators
+
+    Returns:
+        True if the message was delivered, False otherwise
     """
-    try:
-        if role == "assignee":
-            message = (
-                f"📋 Новое задание!\n\n"
-                f"Вам назначено новое задание:\n\n"
-                f"📝 {task_description}\n\n"
-                f"📅 Дедлайн: {deadline} в {time}\n\n"
-                f"Просмотрите детали в меню 'Мои задания'."
-            )
-        elif role == "admin":
-            message = (
-                f"📋 Новое задание в вашем отделе!\n\n"
-                f"В отделе создано новое задание:\n\n"
-                f"📝 {task_description}\n\n"
-                f"📅 Дедлайн: {deadline} в {time}\n\n"
-                f"Просмотрите детали в меню 'Мои задания'."
-            )
-        else:  # "super_admin"
-            message = (
-                f"📋 Новое задание в системе!\n\n"
-                f"Создано новое задание:\n\n"
-                f"📝 {task_description}\n\n"
-                f"📅 Дедлайн: {deadline} в {time}\n\n"
-                f"Просмотрите детали в меню 'Мои задания'."
-            )
-        
-        keyboard = [[InlineKeyboardButton("📋 Просмотреть задание", callback_data=f"view_task_{task_id}")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await context.bot.send_message(chat_id=user_id, text=message, reply_markup=reply_markup)
-    except Exception as e:
-        logger.error(f"Failed to send assignment notification to user {user_id}: {e}")
+    message = _assignment_message(role, task_description, deadline, time)
+    sends = [(user_id, message, _view_task_markup(task_id))]
+    return await _fan_out(context, sends, "assignment notification") == 1
 
 
 async def send_task_notification_to_admins(
@@ -73,7 +238,7 @@ async def send_task_notification_to_admins(
     task_description: str,
     deadline: str,
     time: str
-) -> None:
+) -> int:
     """
     Send notification about new task to super admin and group admins.
     
@@ -83,41 +248,42 @@ async def send_task_notification_to_admins(
         task_description: Task title/description
         deadline: Date string
         time: Time string
+
+    Returns:
+        Number of admins the notification was delivered to
     """
     try:
-        recipients = get_notification_recipients(task_id, include_assignees=False)
-        
-        seen_admins = set()
+        recipients = await async_get_notification_recipients(task_id, include_assignees=False)
         
-        # Send to super admins
+        # Super admins first, then group admins (avoid duplicates)
+        targets = {}
         for super_admin_id in recipients['super_admin_ids']:
-            if super_admin_id not in seen_admins:
-                await send_task_assignment_notification(
-                    context,
-                    super_admin_id,
-                    task_id,
-                    task_description,
-                    deadline,
-                    time,
-                    role="super_admin"
-                )
-                seen_admins.add(super_admin_id)
-        
-        # Send to group admins (avoid duplicates)
+            targets.setdefault(super_admin_id, "super_admin")
         for admin_id in recipients['admins']:
-            if admin_id not in seen_admins:
-                await send_task_assignment_notification(
-                    context,
-                    admin_id,
-                    task_id,
-                    task_description,
-                    deadline,
-                    time,
-                    role="admin"
-                )
-                seen_admins.add(admin_id)
+            targets.setdefault(admin_id, "admin")
+        if not targets:
+            return 0
+        
+        # Fan out concurrently instead of awaiting each round-trip in turn
+        reply_markup = _view_task_markup(task_id)
+        sends = [
+            (admin_id, _assignment_message(role, task_description, deadline, time), reply_markup)
+            for admin_id, role in targets.items()
+        ]
+        return await _fan_out(context, sends, "new task notification")
     except Exception as e:
         logger.error(f"Error sending admin notifications for task {task_id}: {e}")
+        return 0
+
+
+def _status_change_message(task_description: str, old_status: str, new_status: str, changed_by_name: str) -> str:
+    """Fill the status change template."""
+    return STATUS_CHANGE_TEMPLATE.format(
+        description=task_description[:50],
+        old_status=format_task_status(old_status),
+        new_status=format_task_status(new_status),
+        changed_by=changed_by_name,
+    )
 
 
 async def send_status_change_notification(
@@ -130,24 +296,12 @@ async def send_status_change_notification(
     changed_by_name: str
 ) -> None:
     """Send notification to admin about task status change."""
-    try:
-        logger.info(f"Sending status change notification to admin {admin_id} for task {task_id}: {old_status} -> {new_status}")
-        
-        old_status_text = format_task_status(old_status)
-        new_status_text = format_task_status(new_status)
-        
-        message = (
-            f"🔔 Обновление статуса задания\n\n"
-            f"📝 Задание: {task_description[:50]}...\n\n"
-            f"Статус изменен с {old_status_text} на {new_status_text}\n\n"
-            f"👤 Изменил: {changed_by_name}"
-        )
-        keyboard = [[InlineKeyboardButton("📋 Просмотреть задание", callback_data=f"view_task_{task_id}")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await context.bot.send_message(chat_id=admin_id, text=message, reply_markup=reply_markup)
+    logger.info(f"Sending status change notification to admin {admin_id} for task {task_id}: {old_status} -> {new_status}")
+    
+    message = _status_change_message(task_description, old_status, new_status, changed_by_name)
+    sends = [(admin_id, message, _view_task_markup(task_id))]
+    if await _fan_out(context, sends, "status notification"):
         logger.info(f"Status change notification sent successfully to admin {admin_id}")
-    except Exception as e:
-        logger.error(f"Failed to send status notification to admin {admin_id}: {e}")
 
 
 async def send_status_change_notification_to_all_admins(
@@ -172,130 +326,132 @@ async def send_status_change_notification_to_all_admins(
         task_creator_id: ID of task creator (task.created_by)
     """
     try:
-        recipients = get_notification_recipients(task_id, include_assignees=False)
-        
-        seen_admins = set()
+        recipients = await async_get_notification_recipients(task_id, include_assignees=False)
         
-        # Send to task creator first (if not already notified as admin)
-        if task_creator_id and task_creator_id not in recipients['super_admin_ids'] and task_creator_id not in recipients['admins']:
-            await send_status_change_notification(
-                context, task_creator_id, task_id, task_description,
-                old_status, new_status, changed_by_name
-            )
-            seen_admins.add(task_creator_id)
-        
-        # Send to super admins
-        for super_admin_id in recipients['super_admin_ids']:
-            if super_admin_id not in seen_admins:
-                await send_status_change_notification(
-                    context, super_admin_id, task_id, task_description,
-                    old_status, new_status, changed_by_name
-                )
-                seen_admins.add(super_admin_id)
+        # Task creator first, then super admins and group admins (avoid duplicates)
+        targets = []
+        if task_creator_id:
+            targets.append(task_creator_id)
+        for admin_id in recipients['super_admin_ids'] + recipients['admins']:
+            if admin_id not in targets:
+                targets.append(admin_id)
         
-        # Send to group admins (avoid duplicates)
-        for admin_id in recipients['admins']:
-            if admin_id not in seen_admins:
-                await send_status_change_notification(
-                    context, admin_id, task_id, task_description,
-                    old_status, new_status, changed_by_name
-                )
-                seen_admins.add(admin_id)
+        # Same text for everyone; one grouped send
+        message = _status_change_message(task_description, old_status, new_status, changed_by_name)
+        reply_markup = _view_task_markup(task_id)
+        await _fan_out(context, [(admin_id, message, reply_markup) for admin_id in targets], "status notification")
     except Exception as e:
         logger.error(f"Error sending status notifications for task {task_id}: {e}")
 
 
+# Overdue tasks listed per combined reminder message (keeps text well under 4096 chars)
+OVERDUE_TASKS_PER_MESSAGE = 10
+
+
+def _build_overdue_reminder(items: list) -> tuple:
+    """
+    Build one reminder message for a recipient's overdue tasks.
+    
+    Args:
+        items: List of (task, hours_overdue) tuples
+    
+    Returns:
+        tuple: (message text, reply markup)
+    """
+    if len(items) == 1:
+        task, hours_overdue = items[0]
+        message = (
+            f"🚨 ПРОСРОЧЕННЫЙ ДЕДЛАЙН!\n\n"
+            f"📋 Задание: {task['description'][:100]}...\n\n"
+            f"📅 Дедлайн был: {task['date']} в {task['time']}\n"
+            f"⏰ Просрочено на: {int(hours_overdue)} час.\n"
+            f"📊 Статус: {format_task_status(task['status'])}\n\n"
+            f"Задание требует внимания!"
+        )
+        return message, _view_task_markup(task['task_id'])
+    
+    parts = [f"🚨 ПРОСРОЧЕННЫЕ ДЕДЛАЙНЫ ({len(items)})!\n\n"]
+    keyboard = []
+    for task, hours_overdue in items:
+        parts.append(
+            f"📋 #{task['task_id']}: {task['description'][:100]}...\n"
+            f"📅 {task['date']} в {task['time']} · ⏰ {int(hours_overdue)} час. · "
+            f"📊 {format_task_status(task['status'])}\n\n"
+        )
+        keyboard.append([InlineKeyboardButton(
+            f"📋 Задание #{task['task_id']}", callback_data=f"view_task_{task['task_id']}"
+        )])
+    parts.append("Задания требуют внимания!")
+    return "".join(parts), InlineKeyboardMarkup(keyboard)
+
+
+# Longest the reminder job sleeps, so tasks created in the meantime are still picked up
+REMINDER_MAX_SLEEP = timedelta(minutes=30)
+
+
+def schedule_deadline_reminder(job_queue, when, last_check: datetime = None) -> None:
+    """Schedule the next deadline reminder run; each run schedules its successor."""
+    job_queue.run_once(send_deadline_reminder, when=when, data=last_check, name="deadline_reminder")
+
+
+async def _schedule_next_deadline_reminder(context: ContextTypes.DEFAULT_TYPE, now: datetime) -> None:
+    """Sleep until the next deadline (or day-overdue mark), capped at REMINDER_MAX_SLEEP."""
+    delay = REMINDER_MAX_SLEEP
+    try:
+        next_due = await async_get_next_reminder_time(now)
+        if next_due is not None:
+            delay = min(max(next_due - datetime.now(), timedelta(seconds=1)), REMINDER_MAX_SLEEP)
+    except Exception as e:
+        logger.error(f"Error computing next reminder time: {e}")
+    schedule_deadline_reminder(context.job_queue, delay, last_check=now)
+
+
 async def send_deadline_reminder(context: ContextTypes.DEFAULT_TYPE) -> None:
     """Check and send deadline reminders for tasks."""
+    now = datetime.now()
+    # First run after a restart looks back one hour, like the old polling window
+    last_check = (context.job.data if context.job else None) or now - timedelta(hours=1)
     try:
-        now = datetime.now()
+        # One query for every overdue active task, instead of scanning each group's tasks
+        tasks = await async_get_overdue_tasks(now)
         
-        # Get all groups and their tasks
-        groups = get_all_groups()
-        for group in groups:
-            tasks = get_group_tasks(group['group_id'])
+        # Collect reminders per recipient so each chat gets one combined message
+        # instead of one message per overdue task
+        pending = {}  # recipient_id -> [(task, hours_overdue), ...]
+        super_admin_ids = list(Config.SUPER_ADMIN_IDS)
+        for task in tasks:
+            hours_overdue = (now - task['deadline']).total_seconds() / 3600
+            previous_hours = (last_check - task['deadline']).total_seconds() / 3600
             
-            for task in tasks:
-                # Skip completed or cancelled tasks
-                if task['status'] in ['completed', 'cancelled']:
-                    continue
-                
-                # Parse deadline
-                try:
-                    # Handle 24:00 (midnight of next day)
-                    time_str = task['time']
-                    date_str = task['date']
-                    
-                    if time_str == "24:00":
-                        # Convert 24:00 to 00:00 of next day
-                        deadline = datetime.strptime(date_str, "%Y-%m-%d")
-                        deadline = deadline.replace(hour=0, minute=0) + timedelta(days=1)
-                    else:
-                        deadline_str = f"{date_str} {time_str}"
-                        deadline = datetime.strptime(deadline_str, "%Y-%m-%d %H:%M")
-                except Exception as e:
-                    logger.error(f"Error parsing deadline for task {task['task_id']}: {e}")
-                    continue
-                
-                # Check if overdue
-                if deadline < now:
-                    hours_overdue = (now - deadline).total_seconds() / 3600
-                    
-                    # Send reminder only once per day (check if hours_overdue is close to a multiple of 24)
-                    if hours_overdue % 24 < 1:  # Within first hour of each day overdue
-                        admin_id = task.get('created_by')
-                        assigned_ids = json.loads(task.get('assigned_to_list') or '[]')
-                        
-                        status_text = format_task_status(task['status'])
-                        
-                        message = (
-                            f"🚨 ПРОСРОЧЕННЫЙ ДЕДЛАЙН!\n\n"
-                            f"📋 Задание: {task['description'][:100]}...\n\n"
-                            f"📅 Дедлайн был: {task['date']} в {task['time']}\n"
-                            f"⏰ Просрочено на: {int(hours_overdue)} час.\n"
-                            f"📊 Статус: {status_text}\n\n"
-                            f"Задание требует внимания!"
-                        )
-                        keyboard = [[InlineKeyboardButton("📋 Просмотреть задание", callback_data=f"view_task_{task['task_id']}")]]
-                        reply_markup = InlineKeyboardMarkup(keyboard)
-                        
-                        # Get all notification recipients (creator, assigned, super admin, group admins)
-                        recipients = get_notification_recipients(task['task_id'], include_assignees=True)
-                        
-                        seen_ids = set()
-                        
-                        # Send to assigned users (виконавці)
-                        for user_id in recipients['assignees']:
-                            try:
-                                await context.bot.send_message(chat_id=user_id, text=message, reply_markup=reply_markup)
-                                seen_ids.add(user_id)
-                            except Exception as e:
-                                logger.error(f"Failed to send overdue notification to user {user_id} for task {task['task_id']}: {e}")
-                        
-                        # Send to task creator if not in assigned list
-                        if admin_id and admin_id not in seen_ids:
-                            try:
-                                await context.bot.send_message(chat_id=admin_id, text=message, reply_markup=reply_markup)
-                                seen_ids.add(admin_id)
-                            except Exception as e:
-                                logger.error(f"Failed to send overdue notification to creator {admin_id} for task {task['task_id']}: {e}")
-                        
-                        # Send to super admins if not already sent
-                        for super_admin_id in recipients['super_admin_ids']:
-                            if super_admin_id not in seen_ids:
-                                try:
-                                    await context.bot.send_message(chat_id=super_admin_id, text=message, reply_markup=reply_markup)
-                                    seen_ids.add(super_admin_id)
-                                except Exception as e:
-                                    logger.error(f"Failed to send overdue notification to super admin {super_admin_id} for task {task['task_id']}: {e}")
-                        
-                        # Send to group admins if not already sent
-                        for admin_id in recipients['admins']:
-                            if admin_id not in seen_ids:
-                                try:
-                                    await context.bot.send_message(chat_id=admin_id, text=message, reply_markup=reply_markup)
-                                    seen_ids.add(admin_id)
-                                except Exception as e:
-                                    logger.error(f"Failed to send overdue notification to group admin {admin_id} for task {task['task_id']}: {e}")
+            # Send reminder once per day: only if the deadline or another full day
+            # overdue was crossed since the previous check
+            if previous_hours >= 0 and previous_hours // 24 == hours_overdue // 24:
+                continue
+            
+            admin_id = task.get('created_by')
+            
+            # Pending assignees (those who already finished their part are skipped), creator,
+            # super admins, group admins (avoid duplicates); all loaded with the task
+            targets = list(task['pending_assignees'])
+            for recipient_id in [admin_id] + super_admin_ids + task['admins']:
+                if recipient_id and recipient_id not in targets:
+                    targets.append(recipient_id)
+            
+            for recipient_id in targets:
+                pending.setdefault(recipient_id, []).append((task, hours_overdue))
+        
+        # Nobody to remind; don't build any messages or keyboards
+        if not pending:
+            return
+        
+        sends = []
+        for recipient_id, items in pending.items():
+            for start in range(0, len(items), OVERDUE_TASKS_PER_MESSAGE):
+                message, reply_markup = _build_overdue_reminder(items[start:start + OVERDUE_TASKS_PER_MESSAGE])
+                sends.append((recipient_id, message, reply_markup))
+        
+        await _fan_out(context, sends, "overdue notification")
     except Exception as e:
         logger.error(f"Error in deadline reminder job: {e}")
+    finally:
+        await _schedule_next_deadline_reminder(context, now)
@@ -8,6 +8,7 @@ from database import (
     create_registration_request,
     get_registration_request_by_user_id
 )
+from db_async import run_db
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,7 @@ async def start_registration(update: Update, context: ContextTypes.DEFAULT_TYPE)
     username = query.from_user.username
     
     # Check if request already exists
-    existing_request = get_registration_request_by_user_id(user_id)
+    existing_request = await run_db(get_registration_request_by_user_id, user_id)
     if existing_request:
         if existing_request['status'] == 'pending':
             await query.edit_message_text(
@@ -37,7 +38,7 @@ async def start_registration(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return ConversationHandler.END
     
     # Create registration request
-    if create_registration_request(user_id, user_name, username):
+    if await run_db(create_registration_request, user_id, user_name, username):
         await query.edit_message_text(
             f"✅ Запрос на регистрацию отправлен!\n\n"
             f"Ожидайте одобрения от администратора.\n"
@@ -22,6 +22,7 @@ from database import (
     add_group_admin,
     reassign_user_tasks_to_group,
 )
+from db_async import run_db
 
 logger = logging.getLogger(__name__)
 
@@ -35,8 +36,8 @@ SUPER_EDIT_GROUP_MEMBERS = 103
 async def super_manage_groups(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show list of groups for admin management."""
     query = update.callback_query
-    await query.answer()
-    groups = get_all_groups()
+    await query.answer(cache_time=1)
+    groups = await run_db(get_all_groups)
     keyboard = []
     if not groups:
         keyboard = [
@@ -51,7 +52,7 @@ async def super_manage_groups(update: Update, context: ContextTypes.DEFAULT_TYPE
             # Get admin name if admin exists
             admin_name = "Не назначен"
             if group['admin_id']:
-                admin = get_user_by_id(group['admin_id'])
+                admin = await run_db(get_user_by_id, group['admin_id'])
                 if admin:
                     admin_name = admin.get('name', 'Неизвестно')
             
@@ -104,7 +105,7 @@ async def super_add_group_confirm(update: Update, context: ContextTypes.DEFAULT_
         await query.edit_message_text("❌ Название отдела не указано.", reply_markup=reply_markup)
         return
 
-    group_id = create_group(group_name)
+    group_id = await run_db(create_group, group_name)
     if group_id:
         await query.edit_message_text(f"✅ Отдел '{group_name}' создан (ID: {group_id}).", reply_markup=reply_markup)
     else:
@@ -124,7 +125,7 @@ async def super_rename_group(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await query.edit_message_text("❌ Ошибка: группа не выбрана.")
         return ConversationHandler.END
     
-    group = get_group(group_id)
+    group = await run_db(get_group, group_id)
     
     if not group:
         await query.edit_message_text("❌ Ошибка: группа не найдена.")
@@ -147,7 +148,7 @@ async def super_rename_group_input(update: Update, context: ContextTypes.DEFAULT
     keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="super_admin_group_edit")]]
     reply_markup = InlineKeyboardMarkup(keyboard)
     
-    if update_group_name(group_id, new_name):
+    if await run_db(update_group_name, group_id, new_name):
         await update.message.reply_text(
             f"✅ Название отдела изменено на '{new_name}'",
             reply_markup=reply_markup
@@ -173,7 +174,7 @@ async def super_delete_group(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await query.edit_message_text("❌ Помилка: група не вибрана.")
         return
     
-    group = get_group(group_id)
+    group = await run_db(get_group, group_id)
     
     if not group:
         await query.edit_message_text("❌ Помилка: група не знайдена.")
@@ -198,13 +199,13 @@ async def super_delete_group_confirm(update: Update, context: ContextTypes.DEFAU
     await query.answer()
     
     group_id = context.user_data.get("selected_group_id")
-    group = get_group(group_id)
+    group = await run_db(get_group, group_id)
     group_name = group['name'] if group else "Unknown"
     
     keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="super_manage_groups")]]
     reply_markup = InlineKeyboardMarkup(keyboard)
     
-    if delete_group(group_id):
+    if await run_db(delete_group, group_id):
         await query.edit_message_text(
             f"✅ Отдел '{group_name}' успешно удален",
             reply_markup=reply_markup
@@ -226,7 +227,7 @@ async def super_admin_select(update: Update, context: ContextTypes.DEFAULT_TYPE)
     group_id = int(query.data.split("_")[-1])
     context.user_data["selected_group_id"] = group_id
     
-    group = get_group(group_id)
+    group = await run_db(get_group, group_id)
     
     if not group:
         await query.edit_message_text("❌ Помилка: група не знайдена.")
@@ -235,7 +236,7 @@ async def super_admin_select(update: Update, context: ContextTypes.DEFAULT_TYPE)
     # Get admin name if admin exists
     admin_info = "Не призначено"
     if group.get('admin_id'):
-        admin = get_user_by_id(group['admin_id'])
+        admin = await run_db(get_user_by_id, group['admin_id'])
         if admin:
             admin_info = f"{admin.get('name', 'Невідомо')}"
     
@@ -264,7 +265,7 @@ async def super_admin_group_edit(update: Update, context: ContextTypes.DEFAULT_T
         await query.edit_message_text("❌ Помилка: група не вибрана.")
         return
     
-    group = get_group(group_id)
+    group = await run_db(get_group, group_id)
     
     if not group:
         await query.edit_message_text("❌ Помилка: група не знайдена.")
@@ -273,7 +274,7 @@ async def super_admin_group_edit(update: Update, context: ContextTypes.DEFAULT_T
     # Get admin name if admin exists
     admin_info = "Не призначено"
     if group.get('admin_id'):
-        admin = get_user_by_id(group['admin_id'])
+        admin = await run_db(get_user_by_id, group['admin_id'])
         if admin:
             admin_info = f"{admin.get('name', 'Невідомо')}"
     
@@ -296,7 +297,7 @@ async def super_change_admin(update: Update, context: ContextTypes.DEFAULT_TYPE)
     query = update.callback_query
     await query.answer()
     keyboard = []
-    users = get_all_users()
+    users = await run_db(get_all_users)
     if not users:
         keyboard.append([InlineKeyboardButton("⬅️ Назад", callback_data="super_back_to_group")])
     
@@ -341,10 +342,10 @@ async def super_select_new_admin(update: Update, context: ContextTypes.DEFAULT_T
     # Use many-to-many admin assignment to allow a user to be admin in multiple groups
     # Also set the legacy `groups.admin_id` to the selected admin so the UI
     # (which displays the primary admin) reflects the change.
-    if add_group_admin(group_id, new_admin_id):
+    if await run_db(add_group_admin, group_id, new_admin_id):
         # Promote the selected admin to primary admin for display purposes
         try:
-            update_group_admin(group_id, new_admin_id)
+            await run_db(update_group_admin, group_id, new_admin_id)
         except Exception:
             # Non-fatal: even if updating legacy field fails, the many-to-many assignment succeeded
             logger.exception("Failed to update legacy groups.admin_id after add_group_admin")
@@ -373,7 +374,7 @@ async def super_back_to_group(update: Update, context: ContextTypes.DEFAULT_TYPE
         await query.edit_message_text("❌ Помилка: група не вибрана.")
         return
     
-    group = get_group(group_id)
+    group = await run_db(get_group, group_id)
     
     if not group:
         await query.edit_message_text("❌ Помилка: група не знайдена.")
@@ -388,7 +389,7 @@ async def super_back_to_group(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     admin_name = "Не назначен"
     if group.get('admin_id'):
-        admin = get_user_by_id(group['admin_id'])
+        admin = await run_db(get_user_by_id, group['admin_id'])
         if admin:
             admin_name = admin.get('name', 'Неизвестно')
     
@@ -409,9 +410,9 @@ async def super_edit_group_members(update: Update, context: ContextTypes.DEFAULT
         return ConversationHandler.END
 
     # Load all users and build selection map (include group_id from DB)
-    all_users = get_all_users()
+    all_users = await run_db(get_all_users)
     # Build current membership map
-    current_members = {u['user_id']: True for u in get_group_users(group_id)}
+    current_members = {u['user_id']: True for u in await run_db(get_group_users, group_id)}
 
     # Save original membership for potential rollback
     context.user_data['edit_members_original'] = {u['user_id']: (u['user_id'] in current_members) for u in all_users}
@@ -480,7 +481,7 @@ async def super_edit_members_confirm(update: Update, context: ContextTypes.DEFAU
     if to_add:
         preview_lines.append("Добавить в эту группу:")
         for uid in to_add:
-            u = get_user_by_id(uid)
+            u = await run_db(get_user_by_id, uid)
             preview_lines.append(f"• {u['name']}")
     else:
         preview_lines.append("Добавить в эту группу: нет")
@@ -488,7 +489,7 @@ async def super_edit_members_confirm(update: Update, context: ContextTypes.DEFAU
     if to_remove:
         preview_lines.append("\nУдалить из этой группы:")
         for uid in to_remove:
-            u = get_user_by_id(uid)
+            u = await run_db(get_user_by_id, uid)
             preview_lines.append(f"• {u['name']}")
     else:
         preview_lines.append("\nУдалить из этой группы: нет")
@@ -535,13 +536,13 @@ async def super_edit_members_apply(update: Update, context: ContextTypes.DEFAULT
     for uid, old_val, new_val in changes:
         if new_val and not old_val:
             # Add to this group (doesn't remove from other groups)
-            if add_user_to_group(uid, group_id):
+            if await run_db(add_user_to_group, uid, group_id):
                 # Also reassign tasks where this user is an assignee to this group
-                reassign_user_tasks_to_group(uid, group_id)
+                await run_db(reassign_user_tasks_to_group, uid, group_id)
                 applied += 1
         elif old_val and not new_val:
             # Remove from this group only
-            if remove_user_from_group(uid, group_id):
+            if await run_db(remove_user_from_group, uid, group_id):
                 applied += 1
 
     # Clear edit context
@@ -572,7 +573,7 @@ async def _render_edit_members_page(query, context, group_id, page=0, page_size=
     """Helper: render a specific page of the edit-members UI.
     Now shows all groups user belongs to (since users can be in multiple groups)."""
     # all_users is cached in context
-    all_users = context.user_data.get('edit_members_all_users') or get_all_users()
+    all_users = context.user_data.get('edit_members_all_users') or await run_db(get_all_users)
     selection = context.user_data.get('edit_members_selection', {})
 
     total = len(all_users)
@@ -589,7 +590,7 @@ async def _render_edit_members_page(query, context, group_id, page=0, page_size=
     for user in page_users:
         uid = user['user_id']
         # Get all groups this user belongs to
-        user_groups = get_user_groups(uid)
+        user_groups = await run_db(get_user_groups, uid)
         if user_groups:
             group_names = ', '.join([g['name'] for g in user_groups])
         else:
@@ -637,7 +638,7 @@ async def super_view_group_users(update: Update, context: ContextTypes.DEFAULT_T
     await query.answer()
     
     group_id = context.user_data.get("selected_group_id")
-    users = get_group_users(group_id)
+    users = await run_db(get_group_users, group_id)
     
     if not users:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="super_manage_users")]]
@@ -645,16 +646,16 @@ async def super_view_group_users(update: Update, context: ContextTypes.DEFAULT_T
         return
 
     keyboard = []
-    text = f"Сотрудники в отделе:\n\n"
+    text_parts = ["Сотрудники в отделе:\n\n"]
     for u in users:
         keyboard.append([InlineKeyboardButton(f"{u['name']}", callback_data=f"super_user_{u['user_id']}")])
-        text += f"• {u['name']}\n"
+        text_parts.append(f"• {u['name']}\n")
     # Add Edit list button (open checkbox editor)
     keyboard.append([InlineKeyboardButton("✏️ Редактировать список", callback_data="super_edit_group_members")])
     keyboard.append([InlineKeyboardButton("⬅️ Назад", callback_data="super_back_to_group")])
     reply_markup = InlineKeyboardMarkup(keyboard)
     
-    await query.edit_message_text(text, reply_markup=reply_markup)
+    await query.edit_message_text("".join(text_parts), reply_markup=reply_markup)
 
 
 # Export all functions and constants
@@ -7,6 +7,7 @@ from database import (
     get_pending_registration_requests,
     approve_registration_request, reject_registration_request
 )
+from db_async import run_db
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +24,7 @@ async def super_view_registration_requests(update: Update, context: ContextTypes
     query = update.callback_query
     await query.answer()
     
-    requests = get_pending_registration_requests()
+    requests = await run_db(get_pending_registration_requests)
     
     if not requests:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="super_manage_users")]]
@@ -33,12 +34,12 @@ async def super_view_registration_requests(update: Update, context: ContextTypes
         )
         return
     
-    text = f"🔔 Запросы на регистрацию ({len(requests)}):\n\n"
+    text_parts = [f"🔔 Запросы на регистрацию ({len(requests)}):\n\n"]
     keyboard = []
     
     for req in requests:
         username_info = f"@{req['username']}" if req['username'] else "нет username"
-        text += f"• {req['name']} ({username_info})\n"
+        text_parts.append(f"• {req['name']} ({username_info})\n")
         keyboard.append([
             InlineKeyboardButton(
                 f"👤 {req['name']}",
@@ -47,7 +48,7 @@ async def super_view_registration_requests(update: Update, context: ContextTypes
         ])
     
     keyboard.append([InlineKeyboardButton("⬅️ Назад", callback_data="super_manage_users")])
-    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+    await query.edit_message_text("".join(text_parts), reply_markup=InlineKeyboardMarkup(keyboard))
 
 
 async def super_review_registration_request(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -56,7 +57,7 @@ async def super_review_registration_request(update: Update, context: ContextType
     await query.answer()
     
     request_id = int(query.data.split("_")[-1])
-    requests = get_pending_registration_requests()
+    requests = await run_db(get_pending_registration_requests)
     request = next((r for r in requests if r['request_id'] == request_id), None)
     
     if not request:
@@ -91,14 +92,14 @@ async def super_approve_registration_request_handler(update: Update, context: Co
     reviewer_id = query.from_user.id
     
     # Get request details before approval to notify user
-    requests = get_pending_registration_requests()
+    requests = await run_db(get_pending_registration_requests)
     request = next((r for r in requests if r['request_id'] == request_id), None)
     
     if not request:
         await query.edit_message_text("❌ Запрос не найден или уже обработан.")
         return
     
-    if approve_registration_request(request_id, reviewer_id):
+    if await run_db(approve_registration_request, request_id, reviewer_id):
         # Notify user about approval
         try:
             await context.bot.send_message(
@@ -131,14 +132,14 @@ async def super_reject_registration_request_handler(update: Update, context: Con
     reviewer_id = query.from_user.id
     
     # Get request details before rejection to notify user
-    requests = get_pending_registration_requests()
+    requests = await run_db(get_pending_registration_requests)
     request = next((r for r in requests if r['request_id'] == request_id), None)
     
     if not request:
         await query.edit_message_text("❌ Запрос не найден или уже обработан.")
         return
     
-    if reject_registration_request(request_id, reviewer_id):
+    if await run_db(reject_registration_request, request_id, reviewer_id):
         # Notify user about rejection
         try:
             await context.bot.send_message(
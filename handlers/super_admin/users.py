@@ -9,6 +9,7 @@ from database import (
     add_user_to_group, remove_user_from_group, set_user_name, cancel_user_tasks, 
     get_pending_registration_requests, get_group_users, remove_user_from_all_groups,
 )
+from db_async import run_db
 
 logger = logging.getLogger(__name__)
 
@@ -54,7 +55,7 @@ __all__ = [
 async def super_manage_users(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show departments (groups) with counts and users without group."""
     query = update.callback_query
-    await query.answer()
+    await query.answer(cache_time=1)
     # Show paginated list of all employees (name, department or 'вільний').
     # This replaces the previous groups/counts view and provides immediate access
     # to every employee from the "Працівники" menu.
@@ -64,7 +65,7 @@ async def super_manage_users(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def _render_all_employees_page(query, context, page=0, page_size=10):
     """Render a paginated list of all employees (name, department or 'вільний')."""
     await query.answer()
-    all_users = get_all_users() or []
+    all_users = await run_db(get_all_users) or []
     total = len(all_users)
     max_page = max(0, (total - 1) // page_size)
     page = max(0, min(page, max_page))
@@ -80,7 +81,7 @@ async def _render_all_employees_page(query, context, page=0, page_size=10):
         uid = u['user_id']
         name = u.get('name') or u.get('username', 'Неизвестно')
         # Get all groups this user belongs to
-        user_groups = get_user_groups(uid)
+        user_groups = await run_db(get_user_groups, uid)
         if user_groups:
             group_label = ', '.join([g['name'] for g in user_groups])
         else:
@@ -102,7 +103,7 @@ async def _render_all_employees_page(query, context, page=0, page_size=10):
         keyboard.append(nav)
 
     # Back to main
-    requests = get_pending_registration_requests()
+    requests = await run_db(get_pending_registration_requests)
     requests_text = f"🔔 Запросы на регистрацию ({len(requests)})"
     keyboard.append([InlineKeyboardButton(requests_text, callback_data="super_view_registration_requests")])
     keyboard.append([InlineKeyboardButton("⬅️ Назад", callback_data="start_menu")])
@@ -113,7 +114,7 @@ async def _render_all_employees_page(query, context, page=0, page_size=10):
 async def super_all_employees_page(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle pagination callbacks for all-employees view."""
     query = update.callback_query
-    await query.answer()
+    await query.answer(cache_time=1)
     parts = query.data.split("_")
     try:
         page = int(parts[-1])
@@ -130,41 +131,41 @@ async def super_list_group_users(update: Update, context: ContextTypes.DEFAULT_T
     await query.answer()
     data = query.data
     group_id = int(data.split("_")[-1])
-    users = get_group_users(group_id)
+    users = await run_db(get_group_users, group_id)
     if not users:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="super_manage_users")]]
         await query.edit_message_text("Нет сотрудников в этом отделе.", reply_markup=InlineKeyboardMarkup(keyboard))
         return
 
     keyboard = []
-    text = f"Сотрудники в отделе:\n\n"
+    text_parts = ["Сотрудники в отделе:\n\n"]
     for u in users:
         keyboard.append([InlineKeyboardButton(f"{u['name']}", callback_data=f"super_user_{u['user_id']}")])
-        text += f"• {u['name']}\n"
+        text_parts.append(f"• {u['name']}\n")
 
     # Add Edit list button
     keyboard.append([InlineKeyboardButton("✏️ Редактировать список", callback_data="super_edit_group_members")])
     keyboard.append([InlineKeyboardButton("⬅️ Назад", callback_data="super_manage_users")])
-    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+    await query.edit_message_text("".join(text_parts), reply_markup=InlineKeyboardMarkup(keyboard))
 
 
 async def super_list_no_group_users(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
     await query.answer()
-    users = get_users_without_group() #get_users_without_group()
+    users = await run_db(get_users_without_group) #get_users_without_group()
     if not users:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="super_manage_users")]]
         await query.edit_message_text("Нет работников без отдела.", reply_markup=InlineKeyboardMarkup(keyboard))
         return
 
     keyboard = []
-    text = "Работники без отдела:\n\n"
+    text_parts = ["Работники без отдела:\n\n"]
     for u in users:
         keyboard.append([InlineKeyboardButton(f"{u['name']}", callback_data=f"super_user_{u['user_id']}")])
-        text += f"• {u['name']}\n"
+        text_parts.append(f"• {u['name']}\n")
 
     keyboard.append([InlineKeyboardButton("⬅️ Назад", callback_data="super_manage_users")])
-    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+    await query.edit_message_text("".join(text_parts), reply_markup=InlineKeyboardMarkup(keyboard))
 
 
 async def super_user_action_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -172,13 +173,13 @@ async def super_user_action_menu(update: Update, context: ContextTypes.DEFAULT_T
     await query.answer()
     data = query.data
     user_id = int(data.split("_")[-1])
-    user = get_user_by_id(user_id)
+    user = await run_db(get_user_by_id, user_id)
     if not user:
         await query.edit_message_text("Работник не найден.")
         return
 
     # Get all groups this user belongs to
-    user_groups = get_user_groups(user_id)
+    user_groups = await run_db(get_user_groups, user_id)
     if user_groups:
         groups_text = ', '.join([g['name'] for g in user_groups])
     else:
@@ -221,7 +222,7 @@ async def super_user_set_name_input(update: Update, context: ContextTypes.DEFAUL
         await update.message.reply_text("Работник не найден в контексте.")
         return ConversationHandler.END
     new_name = update.message.text.strip()
-    if set_user_name(user_id, new_name):
+    if await run_db(set_user_name, user_id, new_name):
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="super_manage_users")]]
         await update.message.reply_text("Имя обновлено.", reply_markup=InlineKeyboardMarkup(keyboard))
     else:
@@ -240,8 +241,8 @@ async def super_user_edit_groups(update: Update, context: ContextTypes.DEFAULT_T
     context.user_data['edit_user_groups_id'] = user_id
     
     # Get all groups and user's current groups
-    all_groups = get_all_groups()
-    user_groups = get_user_groups(user_id)
+    all_groups = await run_db(get_all_groups)
+    user_groups = await run_db(get_user_groups, user_id)
     user_group_ids = {g['group_id'] for g in user_groups}
     
     # Store original selection for rollback
@@ -256,10 +257,10 @@ async def super_user_edit_groups(update: Update, context: ContextTypes.DEFAULT_T
 async def _render_user_groups_checklist(query, context, user_id, all_groups=None):
     """Render checklist of groups for a specific user."""
     if all_groups is None:
-        all_groups = get_all_groups()
+        all_groups = await run_db(get_all_groups)
     
     selection = context.user_data.get('edit_user_groups_selection', set())
-    user = get_user_by_id(user_id)
+    user = await run_db(get_user_by_id, user_id)
     user_name = user['name'] if user else 'Неизвестно'
     
     keyboard = []
@@ -320,10 +321,10 @@ async def super_user_groups_confirm(update: Update, context: ContextTypes.DEFAUL
     
     # Apply changes
     for gid in to_add:
-        add_user_to_group(user_id, gid)
+        await run_db(add_user_to_group, user_id, gid)
     
     for gid in to_remove:
-        remove_user_from_group(user_id, gid)
+        await run_db(remove_user_from_group, user_id, gid)
     
     # Clear context
     context.user_data.pop('edit_user_groups_id', None)
@@ -357,17 +358,17 @@ async def super_user_ban(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     await query.answer()
     user_id = int(query.data.split("_")[-1])
     
-    user = get_user_by_id(user_id)
+    user = await run_db(get_user_by_id, user_id)
     if not user:
         await query.edit_message_text("Работник не найден.")
         return
     
     # Ban user
-    if ban_user(user_id):
+    if await run_db(ban_user, user_id):
         # Remove from all groups
-        remove_user_from_all_groups(user_id)
+        await run_db(remove_user_from_all_groups, user_id)
         # Cancel/update tasks
-        result = cancel_user_tasks(user_id)
+        result = await run_db(cancel_user_tasks, user_id)
         
         message = f"⛔ Работник {user['name']} заблокирован.\n\n"
         message += f"Отменено задач: {result['cancelled']}\n"
@@ -385,12 +386,12 @@ async def super_user_unban(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     await query.answer()
     user_id = int(query.data.split("_")[-1])
     
-    user = get_user_by_id(user_id)
+    user = await run_db(get_user_by_id, user_id)
     if not user:
         await query.edit_message_text("Работник не найден.")
         return
     
-    if unban_user(user_id):
+    if await run_db(unban_user, user_id):
         message = f"✅ Работник {user['name']} разблокирован."
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="super_manage_users")]]
         await query.edit_message_text(message, reply_markup=InlineKeyboardMarkup(keyboard))
@@ -404,7 +405,7 @@ async def super_user_delete(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
     user_id = int(query.data.split("_")[-1])
     
-    user = get_user_by_id(user_id)
+    user = await run_db(get_user_by_id, user_id)
     if not user:
         await query.edit_message_text("Работник не найден.")
         return
@@ -424,16 +425,16 @@ async def super_user_delete_confirm(update: Update, context: ContextTypes.DEFAUL
     await query.answer()
     user_id = int(query.data.split("_")[-1])
     
-    user = get_user_by_id(user_id)
+    user = await run_db(get_user_by_id, user_id)
     if not user:
         await query.edit_message_text("Работник не найден.")
         return
     
     # Cancel/update tasks first
-    result = cancel_user_tasks(user_id)
+    result = await run_db(cancel_user_tasks, user_id)
     
     # Delete user (bans and removes from groups)
-    if delete_user(user_id):
+    if await run_db(delete_user, user_id):
         message = f"🗑️ Работник {user['name']} удален.\n\n"
         message += f"Отменено задач: {result['cancelled']}\n"
         message += f"Обновлено задач: {result['updated']}"
@@ -451,7 +452,7 @@ async def super_add_user(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     query = update.callback_query
     await query.answer()
     
-    groups = get_all_groups()
+    groups = await run_db(get_all_groups)
     if not groups:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="super_manage_users")]]
         await query.edit_message_text(
@@ -540,7 +541,7 @@ async def super_confirm_user(update: Update, context: ContextTypes.DEFAULT_TYPE)
     keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="start_menu")]]
     reply_markup = InlineKeyboardMarkup(keyboard)
     
-    if add_user_to_group(user_id, user_name, group_id):
+    if await run_db(add_user, user_id, user_name) and await run_db(add_user_to_group, user_id, group_id):
         await query.edit_message_text(
             f"✅ Работник успешно добавлен!",
             reply_markup=reply_markup
@@ -578,8 +579,8 @@ async def super_my_groups(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     user_id = query.from_user.id
     
     # Get all groups and user's current groups
-    all_groups = get_all_groups()
-    user_groups = get_user_groups(user_id)
+    all_groups = await run_db(get_all_groups)
+    user_groups = await run_db(get_user_groups, user_id)
     user_group_ids = {g['group_id'] for g in user_groups}
     
     # Store original selection for rollback
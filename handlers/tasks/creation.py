@@ -1,8 +1,10 @@
 ﻿"""Task creation handlers - conversation flow for creating tasks."""
 
+import asyncio
 import logging
-import re
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 
@@ -11,10 +13,13 @@ from database import (
     add_task_media, get_users_for_task_assignment, get_admin_groups, create_task as db_create_task
 )
 from utils.permissions import is_super_admin, is_group_admin, get_user_group_id
-from utils.helpers import generate_calendar, UKR_MONTHS, TIME_OPTIONS
+from utils.helpers import (
+    generate_calendar, validate_time_format, is_message_not_modified, UKR_MONTHS, TIME_OPTIONS
+)
 from handlers.notifications import (
     send_task_assignment_notification, send_task_notification_to_admins
 )
+from db_async import run_db
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +32,29 @@ TASK_STEP_TIME = 3  # Was 4
 TASK_STEP_USERS = 4  # Was 5
 
 
+@dataclass(slots=True)
+class TaskDraft:
+    """Task being built across creation steps, kept in context.user_data["task_data"]."""
+    admin_id: int  # Creator of the task
+    group_id: Optional[int] = None
+    title: str = ""
+    description: str = ""
+    date: str = ""
+    time: str = ""
+    assigned_users: list = field(default_factory=list)
+    media_files: list = field(default_factory=list)
+    # Users the creator may assign, loaded once so checkbox toggles don't re-query
+    assignable_users: Optional[list] = None
+    # Checkbox rows for assignable_users (same order); a toggle replaces only its own row
+    user_rows: Optional[list] = None
+    # Steps already shown (enables the "forward" navigation buttons)
+    description_visited: bool = False
+    description_skipped: bool = False
+    date_visited: bool = False
+    time_visited: bool = False
+    users_visited: bool = False
+
+
 async def show_title_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is_query: bool = True) -> None:
     """Display step 1: title input with navigation buttons."""
     task_data = context.user_data["task_data"]
@@ -35,7 +63,7 @@ async def show_title_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is
     nav_buttons = []
     
     # Show Forward button if user visited step 2
-    if task_data.get("description_visited"):
+    if task_data.description_visited:
         nav_buttons.append(InlineKeyboardButton("➡️ Вперед", callback_data="task_forward_to_description"))
     
     nav_buttons.append(InlineKeyboardButton("❌ Отменить", callback_data="cancel_task_creation"))
@@ -43,7 +71,7 @@ async def show_title_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is
     keyboard = [nav_buttons]
     reply_markup = InlineKeyboardMarkup(keyboard)
     
-    current_title = task_data.get("title", "")
+    current_title = task_data.title
     text = f"📝 Шаг 1/5: Введите название задания:\n\n"
     if current_title:
         text += f"Текущее название: {current_title}"
@@ -62,24 +90,17 @@ async def create_task(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
     user_id = query.from_user.id
     
     # Check if user is registered or is a super admin
-    if not user_exists(user_id) and not is_super_admin(user_id):
+    if not is_super_admin(user_id) and not await run_db(user_exists, user_id):
         await query.edit_message_text("⚠️ Вы не зарегистрированы в системе.")
         return ConversationHandler.END
     
     # Get user's group (if they have one)
-    user_group_id = None
-    if is_group_admin(user_id):
-        user_group_id = get_user_group_id(user_id)
-    else:
-        user = get_user_by_id(user_id)
-        if user and user.get('group_id'):
-            user_group_id = user['group_id']
+    user_group_id = await run_db(_get_creator_group_id, user_id)
     
-    context.user_data["task_data"] = {
-        "admin_id": user_id,  # Creator of the task
-        "group_id": user_group_id,  # Default group (can be changed)
-        "media_files": [],
-    }
+    context.user_data["task_data"] = TaskDraft(
+        admin_id=user_id,  # Creator of the task
+        group_id=user_group_id,  # Default group (can be changed)
+    )
     
     await show_title_step(update, context, is_query=True)
     return TASK_STEP_TITLE
@@ -88,7 +109,7 @@ async def create_task(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
 async def show_description_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is_query: bool = True) -> None:
     """Display step 2: description input with navigation buttons."""
     task_data = context.user_data["task_data"]
-    task_data["description_visited"] = True
+    task_data.description_visited = True
     
     # Build keyboard with navigation
     keyboard = []
@@ -96,7 +117,7 @@ async def show_description_step(update: Update, context: ContextTypes.DEFAULT_TY
     nav_buttons = [InlineKeyboardButton("⬅️ Назад", callback_data="task_back_to_title")]
     
     # Show Forward button if user visited step 3 (date_visited)
-    if task_data.get("date_visited"):
+    if task_data.date_visited:
         nav_buttons.append(InlineKeyboardButton("➡️ Вперед", callback_data="task_forward_to_date"))
     else: 
         nav_buttons.append(InlineKeyboardButton("⏭️ Пропустить", callback_data="task_skip_description"))
@@ -106,7 +127,7 @@ async def show_description_step(update: Update, context: ContextTypes.DEFAULT_TY
     
     reply_markup = InlineKeyboardMarkup(keyboard)
     
-    title = task_data.get("title", "")
+    title = task_data.title
     text = f"✅ Название: {title}\n\n" \
            f"📝 Шаг 2/5: Введите описание задания (опционально).\n\n" \
            f"📷 Можете прикрепить фото к сообщению с описанием."
@@ -119,7 +140,7 @@ async def show_description_step(update: Update, context: ContextTypes.DEFAULT_TY
 
 async def task_title_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Store task name, ask for description."""
-    context.user_data["task_data"]["title"] = update.message.text
+    context.user_data["task_data"].title = update.message.text
     await show_description_step(update, context, is_query=False)
     return TASK_STEP_DESCRIPTION
 
@@ -171,7 +192,7 @@ async def task_title_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 async def show_date_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is_query: bool = True, year: int = None, month: int = None) -> None:
     """Display step 4: date selection with calendar and navigation buttons."""
     task_data = context.user_data["task_data"]
-    task_data["date_visited"] = True
+    task_data.date_visited = True
     
     # Use current date if not specified
     if year is None or month is None:
@@ -185,7 +206,7 @@ async def show_date_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is_
     nav_buttons = [InlineKeyboardButton("⬅️ Назад", callback_data="task_back_to_description")]
     
     # Show Forward if user visited step 4 (time_visited)
-    if task_data.get("time_visited"):
+    if task_data.time_visited:
         nav_buttons.append(InlineKeyboardButton("➡️ Вперед", callback_data="task_forward_to_time"))
     
     nav_buttons.append(InlineKeyboardButton("❌ Отменить", callback_data="cancel_task_creation"))
@@ -203,7 +224,7 @@ async def show_date_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is_
 async def show_time_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is_query: bool = True) -> None:
     """Display step 5: time selection with navigation buttons."""
     task_data = context.user_data["task_data"]
-    task_data["time_visited"] = True
+    task_data.time_visited = True
     
     # Show time picker
     keyboard = []
@@ -217,7 +238,7 @@ async def show_time_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is_
     nav_buttons = [InlineKeyboardButton("⬅️ Назад", callback_data="task_back_to_date")]
     
     # Show Forward if user visited step 5 (users_visited)
-    if task_data.get("users_visited"):
+    if task_data.users_visited:
         nav_buttons.append(InlineKeyboardButton("➡️ Вперед", callback_data="task_forward_to_users"))
     
     nav_buttons.append(InlineKeyboardButton("❌ Отменить", callback_data="cancel_task_creation"))
@@ -226,7 +247,7 @@ async def show_time_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is_
     reply_markup = InlineKeyboardMarkup(keyboard)
     
     # Get current selected date info
-    selected_date = task_data.get("date", "")
+    selected_date = task_data.date
     date_display = ""
     if selected_date:
         year, month, day = selected_date.split("-")
@@ -241,33 +262,56 @@ async def show_time_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is_
         await update.message.reply_text(text, reply_markup=reply_markup)
 
 
-async def show_users_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is_query: bool = True) -> None:
-    """Display step 5: user selection with navigation buttons."""
-    task_data = context.user_data["task_data"]
-    task_data["users_visited"] = True
+def _user_toggle_button(user: dict, checked: bool) -> InlineKeyboardButton:
+    """Checkbox button for one user in the step 6 assignee list."""
+    checkbox = "☑" if checked else "☐"
     
-    # Get creator ID and determine their permissions
-    creator_id = task_data.get("admin_id")
+    # Format: Name [@username]
+    username_part = f"@{user.get('username')}" if user.get('username') else ""
     
-    # Ensure creator user exists in database (required for proper task assignment queries)
-    if not user_exists(creator_id):
-        user_name = update.callback_query.from_user.first_name if hasattr(update, 'callback_query') and update.callback_query else "User"
-        add_user(creator_id, user_name, None)
+    return InlineKeyboardButton(
+        f"{checkbox} {user.get('name')} {username_part}",
+        callback_data=f"task_toggle_user_{user['user_id']}"
+    )
+
+
+def _get_creator_group_id(user_id: int):
+    """Group the new task belongs to: the first managed group for admins, else the user's own."""
+    if is_group_admin(user_id):
+        return get_user_group_id(user_id)
+    user = get_user_by_id(user_id)
+    return user.get('group_id') if user else None
+
+
+def load_assignable_users(user_id: int, user_name: str) -> list:
+    """
+    Users this user may assign tasks to (blocking DB lookups; run via run_db).
     
-    creator_is_super = is_super_admin(creator_id)
-    creator_is_admin = is_group_admin(creator_id)
+    Registers the user first if needed, since the assignment queries join on them.
+    """
+    if not user_exists(user_id):
+        add_user(user_id, user_name, None)
     
-    # Get available users based on creator's role
-    if creator_is_super:
-        all_users = get_all_users()
-    elif creator_is_admin:
+    if is_super_admin(user_id):
+        return get_all_users()
+    if is_group_admin(user_id):
         # Admin can assign to users in their managed groups
-        admin_groups = get_admin_groups(creator_id)
-        admin_group_ids = [g['group_id'] for g in admin_groups]
-        all_users = get_users_for_task_assignment(creator_id, False, True, admin_group_ids)
-    else:
-        # Regular worker: can assign to users in same groups + admins of those groups
-        all_users = get_users_for_task_assignment(creator_id, False, False)
+        admin_group_ids = [g['group_id'] for g in get_admin_groups(user_id)]
+        return get_users_for_task_assignment(user_id, False, True, admin_group_ids)
+    # Regular worker: can assign to users in same groups + admins of those groups
+    return get_users_for_task_assignment(user_id, False, False)
+
+
+async def show_users_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is_query: bool = True) -> None:
+    """Display step 5: user selection with navigation buttons."""
+    task_data = context.user_data["task_data"]
+    task_data.users_visited = True
+    
+    all_users = task_data.assignable_users
+    if all_users is None:
+        user_name = update.callback_query.from_user.first_name if hasattr(update, 'callback_query') and update.callback_query else "User"
+        all_users = await run_db(load_assignable_users, task_data.admin_id, user_name)
+        task_data.assignable_users = all_users
     
     if not all_users:
         text = "❌ Нет доступных сотрудников для назначения."
@@ -278,32 +322,11 @@ async def show_users_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is
         return
     
     # Get currently selected users
-    selected = task_data.get("assigned_users", [])
+    selected = task_data.assigned_users
     
-    keyboard = []
-    
-    # Display users with group name in brackets and username/ID
-    for user in all_users:
-        checkbox = "☑" if user['user_id'] in selected else "☐"
-        
-        # Format: Name [@username] [Groups or -]
-        username_part = f"@{user.get('username')}" if user.get('username') else ""
-        
-        # Show all groups or single group
-        all_groups = user.get('all_groups', '')
-        if all_groups:
-            group_part = all_groups  # Already comma-separated
-        else:
-            group_part = user.get('group_name', '-')
-        
-        display_name = f"{checkbox} {user.get('name')} {username_part}" #[{group_part}]"
-        
-        keyboard.append([
-            InlineKeyboardButton(
-                display_name,
-                callback_data=f"task_toggle_user_{user['user_id']}"
-            )
-        ])
+    if task_data.user_rows is None:
+        task_data.user_rows = [[_user_toggle_button(user, user['user_id'] in selected)] for user in all_users]
+    keyboard = list(task_data.user_rows)
     
     # Add navigation and action buttons
     nav_buttons = [
@@ -326,7 +349,7 @@ async def show_users_step(update: Update, context: ContextTypes.DEFAULT_TYPE, is
             await update.message.reply_text(message_text, reply_markup=reply_markup)
     except Exception as e:
         # If message is not modified (same content), just ignore the error
-        if "Message is not modified" not in str(e):
+        if not is_message_not_modified(e):
             logger.error(f"Error updating user selection: {e}")
             raise
 
@@ -366,7 +389,7 @@ async def task_date_selected(update: Update, context: ContextTypes.DEFAULT_TYPE)
     # Parse selected date
     _, _, year, month, day = query.data.split("_")
     selected_date = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-    context.user_data["task_data"]["date"] = selected_date
+    context.user_data["task_data"].date = selected_date
     
     await show_time_step(update, context, is_query=True)
     return TASK_STEP_TIME
@@ -379,7 +402,7 @@ async def task_time_selected(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     # Extract time from callback data
     _, _, time = query.data.split("_")
-    context.user_data["task_data"]["time"] = time
+    context.user_data["task_data"].time = time
     
     await show_users_step(update, context, is_query=True)
     return TASK_STEP_USERS
@@ -387,25 +410,16 @@ async def task_time_selected(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def task_time_manual_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle manual time input in format HH:MM - proceed to user selection."""
-    import re
+    # Validate and normalize time format HH:MM
+    is_valid, normalized_time = validate_time_format(update.message.text)
     
-    time_text = update.message.text.strip()
-    
-    # Validate time format HH:MM
-    time_pattern = re.compile(r'^([0-1]?[0-9]|2[0-4]):([0-5][0-9])$')
-    match = time_pattern.match(time_text)
-    
-    if not match:
+    if not is_valid:
         await update.message.reply_text(
             "❌ Неверный формат времени. Пожалуйста, введите время в формате 00:00 (например: 14:30, 09:00)"
         )
         return TASK_STEP_TIME
     
-    # Normalize time format (add leading zero if needed)
-    hour, minute = match.groups()
-    normalized_time = f"{int(hour):02d}:{minute}"
-    
-    context.user_data["task_data"]["time"] = normalized_time
+    context.user_data["task_data"].time = normalized_time
     
     await show_users_step(update, context, is_query=False)
     return TASK_STEP_USERS
@@ -425,19 +439,18 @@ async def task_description_input(update: Update, context: ContextTypes.DEFAULT_T
     
     # Store description
     if desc_text.strip():
-        context.user_data["task_data"]["description"] = desc_text.strip()
+        context.user_data["task_data"].description = desc_text.strip()
     
     # If photo attached, save it
     if has_photo:
         file_id = update.message.photo[-1].file_id
-        media_files = context.user_data["task_data"].get("media_files", [])
+        media_files = context.user_data["task_data"].media_files
         media_files.append({
             "file_id": file_id,
             "file_type": "photo",
             "file_name": f"photo_1.jpg",
             "file_size": update.message.photo[-1].file_size
         })
-        context.user_data["task_data"]["media_files"] = media_files
         
         await update.message.reply_text(
             f"✅ Описание и фото сохранены! Переходим к выбору даты..."
@@ -553,53 +566,102 @@ async def task_toggle_user(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     await query.answer()
     
     user_id = int(query.data.split("_")[-1])
-    selected = context.user_data["task_data"].get("assigned_users", [])
+    task_data = context.user_data["task_data"]
+    selected = task_data.assigned_users
     
     if user_id in selected:
         selected.remove(user_id)
     else:
         selected.append(user_id)
     
-    context.user_data["task_data"]["assigned_users"] = selected
+    # Rebuild only the toggled user's row of the cached keyboard
+    if task_data.user_rows is not None:
+        for row, user in enumerate(task_data.assignable_users):
+            if user['user_id'] == user_id:
+                task_data.user_rows[row] = [_user_toggle_button(user, user_id in selected)]
+                break
     
     await show_users_step(update, context, is_query=True)
     return TASK_STEP_USERS
 
 
+async def _broadcast_new_task(
+    context: ContextTypes.DEFAULT_TYPE,
+    chat_id: int,
+    message_id: int,
+    task_id: int,
+    task_desc: str,
+    date: str,
+    time: str,
+    assigned_users: list
+) -> None:
+    """Notify assignees and admins about a new task, then update the creator's summary."""
+    notification_count = 0
+    if assigned_users:
+        results = await asyncio.gather(*(
+            send_task_assignment_notification(
+                context, user_id, task_id, task_desc, date, time, role="assignee"
+            )
+            for user_id in assigned_users
+        ))
+        notification_count = sum(1 for delivered in results if delivered)
+    
+    # Send notifications to super admin and group admins
+    admin_count = await send_task_notification_to_admins(context, task_id, task_desc, date, time)
+    
+    keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="start_menu")]]
+    try:
+        await context.bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=message_id,
+            text=(
+                f"✅ Задание успешно создано!\nID задания: {task_id}\n"
+                f"Назначено исполнителей: {len(assigned_users)}\n"
+                f"Уведомлено администраторов: {admin_count}\n\n"
+                f"📧 Отправлено {notification_count + admin_count} уведомлений"
+            ),
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+    except Exception as e:
+        # The creator may have already navigated away from the summary message
+        logger.debug(f"Could not update summary for task {task_id}: {e}")
+
+
 async def task_confirm_users(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Confirm user selection and create task."""
     query = update.callback_query
     await query.answer()
     
     task_data = context.user_data["task_data"]
-    assigned_users = task_data.get("assigned_users", [])
+    assigned_users = task_data.assigned_users
     
     # Get title and description separately
-    title = task_data.get("title", "")
-    description = task_data.get("description", "")
+    title = task_data.title
+    description = task_data.description
     
     # Determine group_id for the task
     # If creator has a group, use it; otherwise use the first assigned user's group
-    group_id = task_data.get("group_id")
+    group_id = task_data.group_id
     if not group_id and assigned_users:
         # Get group from first assigned user
-        first_user = get_user_by_id(assigned_users[0])
+        first_user = await run_db(get_user_by_id, assigned_users[0])
         if first_user and first_user.get('group_id'):
             group_id = first_user['group_id']
     
     # If still no group, use first available group
     if not group_id:
-        groups = get_all_groups()
+        groups = await run_db(get_all_groups)
         if groups:
             group_id = groups[0]['group_id']
     
     # Create task using database function (avoid name collision with bot.create_task)
-    task_id = db_create_task(
-        date=task_data["date"],
-        time=task_data["time"],
+    task_id = await run_db(
+        db_create_task,
+        date=task_data.date,
+        time=task_data.time,
         description=description or "",  # Keep description separate from title
         group_id=group_id,
-        admin_id=task_data["admin_id"],
+        admin_id=task_data.admin_id,
         assigned_to_list=assigned_users,
         title=title
     )
@@ -609,8 +671,9 @@ async def task_confirm_users(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     if task_id:
         # Add media if any
-        for media_file in task_data.get("media_files", []):
-            add_task_media(
+        for media_file in task_data.media_files:
+            await run_db(
+                add_task_media,
                 task_id,
                 media_file["file_id"],
                 media_file["file_type"],
@@ -618,43 +681,27 @@ async def task_confirm_users(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 media_file.get("file_size")
             )
         
-        # Send notifications to assigned users
-        task_desc = title  # Use title for notification
-        notification_count = 0
-        
-        for user_id in assigned_users:
-            await send_task_assignment_notification(
-                context,
-                user_id,
-                task_id,
-                task_desc,
-                task_data["date"],
-                task_data["time"],
-                role="assignee"
-            )
-            notification_count += 1
-        
-        # Send notifications to super admin and group admins
-        await send_task_notification_to_admins(
-            context,
-            task_id,
-            task_desc,
-            task_data["date"],
-            task_data["time"]
-        )
-        
-        # Get admin recipients for count
-        from database import get_notification_recipients
-        recipients = get_notification_recipients(task_id, include_assignees=False)
-        admin_count = len(recipients['super_admin_ids']) + len(recipients['admins'])
-        
+        # Reply right away and fan out notifications in the background,
+        # so the creator doesn't wait for every recipient round-trip
         await query.edit_message_text(
             f"✅ Задание успешно создано!\nID задания: {task_id}\n"
-            f"Назначено исполнителей: {len(assigned_users)}\n"
-            f"Уведомлено администраторов: {admin_count}\n\n"
-            f"📧 Отправлено {notification_count + admin_count} уведомлений",
+            f"Назначено исполнителей: {len(assigned_users)}\n\n"
+            f"📧 Рассылка уведомлений...",
             reply_markup=reply_markup
         )
+        context.application.create_task(
+            _broadcast_new_task(
+                context,
+                query.message.chat_id,
+                query.message.message_id,
+                task_id,
+                title,  # Use title for notification
+                task_data.date,
+                task_data.time,
+                list(assigned_users)
+            ),
+            update=update
+        )
     else:
         await query.edit_message_text(
             "❌ Не удалось создать задание.",
@@ -670,7 +717,7 @@ async def task_skip_description(update: Update, context: ContextTypes.DEFAULT_TY
     query = update.callback_query
     await query.answer()
     
-    context.user_data["task_data"]["description_skipped"] = True
+    context.user_data["task_data"].description_skipped = True
     await show_date_step(update, context, is_query=True)
     return TASK_STEP_DATE
 
@@ -5,17 +5,18 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 
 from database import (
-    get_task_by_id, update_task_status, delete_task, get_user_by_id, user_exists, add_user,
-    get_task_media, remove_task_media, add_task_media, get_all_users,
-    get_users_for_task_assignment, get_admin_groups, update_task_field,
-    update_assignee_status, get_assignee_status, calculate_task_status,
-    get_task_assignee_statuses, get_group
+    update_task_status, delete_task, get_user_by_id,
+    get_task_media, remove_task_media, add_task_media, update_task_field,
+    get_assignee_status, change_assignee_status
 )
 from utils.permissions import can_edit_task, is_super_admin, is_group_admin
 from utils.helpers import format_task_status, get_status_emoji
 from handlers.notifications import (
     send_status_change_notification, send_status_change_notification_to_all_admins
 )
+from handlers.tasks.viewing import build_task_card
+from handlers.tasks.creation import load_assignable_users
+from db_async import async_get_task_by_id, run_db
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +35,7 @@ async def show_edit_task_menu(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
     
     task_id = context.user_data['editing_task_id']
-    task = get_task_by_id(task_id)
+    task = await async_get_task_by_id(task_id)
     
     if not task:
         text = "❌ Задание не найдено."
@@ -58,20 +59,19 @@ async def show_edit_task_menu(update: Update, context: ContextTypes.DEFAULT_TYPE
     status_emoji = get_status_emoji(status)
     status_text = format_task_status(status)
     
-    message_text = f"✏️ Редактирование задания #{task_id}\n\n"
-    message_text += f"📝 Название: {title}\n"
+    parts = [f"✏️ Редактирование задания #{task_id}\n\n", f"📝 Название: {title}\n"]
     if description:
-        message_text += f"📋 Описание: {description[:50]}{'...' if len(description) > 50 else ''}\n"
-    message_text += f"{status_emoji} Статус: {status_text}\n"
-    message_text += f"👥 Исполнителей: {len(assigned_users)}\n\n"
+        parts.append(f"📋 Описание: {description[:50]}{'...' if len(description) > 50 else ''}\n")
+    parts.append(f"{status_emoji} Статус: {status_text}\n")
+    parts.append(f"👥 Исполнителей: {len(assigned_users)}\n\n")
     
     if changes:
-        message_text += "📝 Внесены изменения:\n"
-        for key in changes:
-            message_text += f"  • {key}\n"
-        message_text += "\n"
+        parts.append("📝 Внесены изменения:\n")
+        parts.extend(f"  • {key}\n" for key in changes)
+        parts.append("\n")
     
-    message_text += "Выберите поле для редактирования:"
+    parts.append("Выберите поле для редактирования:")
+    message_text = "".join(parts)
     
     keyboard = [
         [InlineKeyboardButton("📝 Название", callback_data=f"edit_task_field_title_{task_id}")],
@@ -104,19 +104,20 @@ async def edit_task_handler(update: Update, context: ContextTypes.DEFAULT_TYPE)
     user_id = query.from_user.id
     
     # Get task info to check permissions
-    task = get_task_by_id(task_id)
+    task = await async_get_task_by_id(task_id)
     if not task:
         await query.edit_message_text("❌ Задание не найдено.")
         return ConversationHandler.END
     
     # Check permissions
-    if not can_edit_task(user_id, task):
+    if not await run_db(can_edit_task, user_id, task):
         await query.answer("❌ У вас нет прав для редактирования этого задания", show_alert=True)
         return ConversationHandler.END
     
     # Initialize editing session
     context.user_data['editing_task_id'] = task_id
     context.user_data['task_changes'] = {}
+    context.user_data.pop('task_assignable_users', None)
     
     await show_edit_task_menu(update, context, is_query=True)
     return EDIT_TASK_MENU
@@ -131,13 +132,13 @@ async def delete_task_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
     user_id = query.from_user.id
     
     # Get task info to check permissions
-    task = get_task_by_id(task_id)
+    task = await async_get_task_by_id(task_id)
     if not task:
         await query.edit_message_text("❌ Задание не найдено.")
         return
     
     # Check permissions
-    if not can_edit_task(user_id, task):
+    if not await run_db(can_edit_task, user_id, task):
         await query.answer("❌ У вас нет прав для удаления этого задания", show_alert=True)
         return
     
@@ -165,13 +166,13 @@ async def delete_task_confirm_handler(update: Update, context: ContextTypes.DEFA
     user_id = query.from_user.id
     
     # Get task info to check permissions again (security check)
-    task = get_task_by_id(task_id)
+    task = await async_get_task_by_id(task_id)
     if not task:
         await query.edit_message_text("❌ Задание не найдено.")
         return
     
     # Check permissions
-    if not can_edit_task(user_id, task):
+    if not await run_db(can_edit_task, user_id, task):
         await query.answer("❌ У вас нет прав для удаления этого задания", show_alert=True)
         return
     
@@ -181,7 +182,7 @@ async def delete_task_confirm_handler(update: Update, context: ContextTypes.DEFA
     
     logger.info(f"User {user_id} attempting to delete task {task_id}")
     try:
-        if delete_task(task_id):
+        if await run_db(delete_task, task_id):
             logger.info(f"Task {task_id} successfully deleted by user {user_id}")
             await query.edit_message_text(
                 f"✅ Задание #{task_id} успешно удалено.",
@@ -210,13 +211,13 @@ async def change_task_status_handler(update: Update, context: ContextTypes.DEFAU
     task_id = int(query.data.split("_")[-1])
     
     # Get current task
-    task = get_task_by_id(task_id)
+    task = await async_get_task_by_id(task_id)
     if not task:
         await query.edit_message_text("❌ Задание не найдено.")
         return
     
     # Get user's individual status
-    current_status = get_assignee_status(task_id, user_id)
+    current_status = await run_db(get_assignee_status, task_id, user_id)
     if current_status is None:
         # User is not an assignee, check if admin
         if user_id == task.get('created_by') or is_super_admin(user_id):
@@ -275,20 +276,20 @@ async def set_task_status_handler(update: Update, context: ContextTypes.DEFAULT_
     new_status = "_".join(parts[3].split("_")[1:])
     
     # Get task info before update for notification
-    task = get_task_by_id(task_id)
+    task = await async_get_task_by_id(task_id)
     if not task:
         await query.edit_message_text("❌ Задание не найдено.")
         return
     
-    # Get user's current status
-    old_status = get_assignee_status(task_id, user_id)
-    if old_status is None:
+    # Change the user's own status; the previous value is read in the same statement
+    result = await run_db(change_assignee_status, task_id, user_id, new_status)
+    if result is None:
         # User is not an assignee, fall back to checking if they're admin
         admin_id = task.get('created_by')
         if user_id == admin_id or is_super_admin(user_id):
             # Admin changing overall task status
             old_status = task['status']
-            if update_task_status(task_id, new_status):
+            if await run_db(update_task_status, task_id, new_status):
                 status_text = {
                     'pending': '⏳ Ожидает',
                     'in_progress': '🔄 В работе',
@@ -308,12 +309,10 @@ async def set_task_status_handler(update: Update, context: ContextTypes.DEFAULT_
     
     admin_id = task.get('created_by')  # Creator of the task (постановник)
     
-    logger.info(f"Task {task_id} user {user_id} status change: old_status={old_status}, new_status={new_status}")
-    
-    # Update assignee's individual status
-    if update_assignee_status(task_id, user_id, new_status):
-        # Get the new aggregate task status after update
-        aggregate_status = calculate_task_status(task_id)
+    if result:
+        old_status = result['old_status']
+        aggregate_status = result['task_status']
+        logger.info(f"Task {task_id} user {user_id} status change: old_status={old_status}, new_status={new_status}")
         
         status_text = {
             'pending': '⏳ Ожидает',
@@ -325,7 +324,7 @@ async def set_task_status_handler(update: Update, context: ContextTypes.DEFAULT_
         notification_sent = False
         if old_status != new_status and admin_id and admin_id != user_id:
             logger.info(f"Preparing to send notification: old_status={old_status} != new_status={new_status}, admin_id={admin_id} != user_id={user_id}")
-            user = get_user_by_id(user_id)
+            user = await run_db(get_user_by_id, user_id)
             user_name = user['name'] if user else 'Неизвестный сотрудник'
             task_desc = task.get('title') or task['description'].split('\n')[0]  # Use title or first line of description
             
@@ -461,7 +460,7 @@ async def show_status_edit_menu(update: Update, context: ContextTypes.DEFAULT_TY
     query = update.callback_query
     
     task_id = context.user_data.get('editing_task_id')
-    task = get_task_by_id(task_id)
+    task = await async_get_task_by_id(task_id)
     
     if not task:
         await query.edit_message_text("❌ Задание не найдено.")
@@ -516,7 +515,7 @@ async def show_media_edit_menu(update: Update, context: ContextTypes.DEFAULT_TYP
     query = update.callback_query
     
     task_id = context.user_data.get('editing_task_id')
-    media_files = get_task_media(task_id)
+    media_files = await run_db(get_task_media, task_id)
     
     keyboard = []
     
@@ -543,7 +542,7 @@ async def edit_media_delete(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
     
     task_id = context.user_data.get('editing_task_id')
-    media_files = get_task_media(task_id)
+    media_files = await run_db(get_task_media, task_id)
     
     if not media_files:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data=f"back_to_edit_menu_{task_id}")]]
@@ -583,7 +582,7 @@ async def delete_media_file(update: Update, context: ContextTypes.DEFAULT_TYPE)
     task_id = int(parts[3])
     media_id = int(parts[4])
     
-    if remove_task_media(media_id):
+    if await run_db(remove_task_media, media_id):
         await query.answer("✅ Файл удален", show_alert=True)
     else:
         await query.answer("❌ Ошибка при удалении", show_alert=True)
@@ -616,13 +615,13 @@ async def handle_edit_media_file(update: Update, context: ContextTypes.DEFAULT_T
     # Handle photo
     if update.message.photo:
         file_id = update.message.photo[-1].file_id
-        add_task_media(task_id, file_id, 'photo', f"photo_{task_id}.jpg", update.message.photo[-1].file_size)
+        await run_db(add_task_media, task_id, file_id, 'photo', f"photo_{task_id}.jpg", update.message.photo[-1].file_size)
         await update.message.reply_text("✅ Фото добавлено")
     
     # Handle video
     elif update.message.video:
         file_id = update.message.video.file_id
-        add_task_media(task_id, file_id, 'video', update.message.video.file_name or f"video_{task_id}.mp4", update.message.video.file_size)
+        await run_db(add_task_media, task_id, file_id, 'video', update.message.video.file_name or f"video_{task_id}.mp4", update.message.video.file_size)
         await update.message.reply_text("✅ Видео добавлено")
     
     else:
@@ -650,22 +649,13 @@ async def show_users_edit_menu(update: Update, context: ContextTypes.DEFAULT_TYP
     
     task_id = context.user_data.get('editing_task_id')
     user_id = query.from_user.id
-    task = get_task_by_id(task_id)
     
-    # Ensure user exists in database (required for proper task assignment queries)
-    if not user_exists(user_id):
+    # Assignable users are loaded once per editing session so checkbox toggles don't re-query
+    all_users = context.user_data.get('task_assignable_users')
+    if all_users is None:
         user_name = query.from_user.first_name if query.from_user.first_name else "User"
-        add_user(user_id, user_name, None)
-    
-    # Get available users based on creator's role
-    if is_super_admin(user_id):
-        all_users = get_all_users()
-    elif is_group_admin(user_id):
-        admin_groups = get_admin_groups(user_id)
-        admin_group_ids = [g['group_id'] for g in admin_groups]
-        all_users = get_users_for_task_assignment(user_id, False, True, admin_group_ids)
-    else:
-        all_users = get_users_for_task_assignment(user_id, False, False)
+        all_users = await run_db(load_assignable_users, user_id, user_name)
+        context.user_data['task_assignable_users'] = all_users
     
     if not all_users:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data=f"back_to_edit_menu_{task_id}")]]
@@ -681,6 +671,7 @@ async def show_users_edit_menu(update: Update, context: ContextTypes.DEFAULT_TYP
     if 'task_selected_users' in context.user_data:
         selected = context.user_data['task_selected_users']
     else:
+        task = await async_get_task_by_id(task_id)
         selected = context.user_data.get('task_changes', {}).get('assigned_users', json.loads(task.get('assigned_to_list', '[]')))
         context.user_data['task_selected_users'] = selected.copy()
     
@@ -780,69 +771,23 @@ async def exit_task_editing(update: Update, context: ContextTypes.DEFAULT_TYPE)
     context.user_data.pop('editing_task_id', None)
     context.user_data.pop('task_changes', None)
     context.user_data.pop('task_selected_users', None)
+    context.user_data.pop('task_assignable_users', None)
     context.user_data.pop('adding_media_to_task', None)
     context.user_data.pop('editing_field', None)
     
     # Show task view
     if task_id:
         try:
-            task = get_task_by_id(task_id)
+            task = await async_get_task_by_id(task_id)
             if task:
                 user_id = query.from_user.id
-                group = get_group(task['group_id'])
-                group_name = group['name'] if group else 'Неизвестно'
-                
-                creator = get_user_by_id(task.get('created_by')) if task.get('created_by') else None
-                creator_name = creator['name'] if creator else 'Неизвестно'
-                
-                assigned_ids = json.loads(task.get('assigned_to_list') or '[]')
-                assignee_statuses = get_task_assignee_statuses(task_id)
-                
-                assigned_users = []
-                for uid in assigned_ids:
-                    u = get_user_by_id(uid)
-                    if u:
-                        user_status = assignee_statuses.get(uid, 'pending')
-                        status_emoji = get_status_emoji(user_status)
-                        assigned_users.append(f"{status_emoji} {u['name']}")
-                
-                status_text = format_task_status(task['status'])
-                task_info = f"📋 ЗАДАНИЕ #{task['task_id']}\n\n"
-                
-                title = task.get('title', '').strip()
-                if title:
-                    task_info += f"📝 Название:\n{title}\n\n"
-                
-                task_info += (
-                    f"📅 Дата: {task['date']}\n"
-                    f"🕐 Дедлайн: {task['time']}\n"
-                    f"📍 Отдел: {group_name}\n"
-                    f"📊 Общий статус: {status_text}\n"
-                    f"👤 Постановщик: {creator_name}\n\n"
-                )
-                
-                description = task.get('description', '').strip()
-                if description:
-                    task_info += f"📋 Описание:\n{description}\n\n"
-                
-                if assigned_users:
-                    task_info += f"👥 Исполнители ({len(assigned_users)}):\n"
-                    for name_with_status in assigned_users[:5]:
-                        task_info += f"  {name_with_status}\n"
-                    if len(assigned_users) > 5:
-                        task_info += f"  ... и еще {len(assigned_users) - 5}\n"
-                else:
-                    task_info += "👥 Никто не назначен\n"
-                
-                media_files = get_task_media(task_id) if task.get('has_media') else []
-                if media_files:
-                    task_info += f"\n📎 Медиа файлов: {len(media_files)}\n"
+                task_info, assigned_ids, media_files = await run_db(build_task_card, task)
                 
                 keyboard = []
                 if media_files:
                     keyboard.append([InlineKeyboardButton("📷 Просмотреть медиа", callback_data=f"view_task_media_{task_id}")])
                 
-                can_edit = can_edit_task(user_id, task)
+                can_edit = await run_db(can_edit_task, user_id, task)
                 is_assigned = user_id in assigned_ids
                 
                 if can_edit:
@@ -859,7 +804,7 @@ async def exit_task_editing(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 if is_super_admin(user_id):
                     back_callback = 'super_manage_tasks'
                     back_text = "⬅️ К списку заданий"
-                elif is_group_admin(user_id) and not is_assigned:
+                elif not is_assigned and await run_db(is_group_admin, user_id):
                     back_callback = 'admin_view_tasks'
                     back_text = "⬅️ К списку заданий"
                 
@@ -1,12 +1,15 @@
 """Task filtering and viewing handlers."""
 
+import asyncio
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
-from database import (
-    get_all_groups, get_group, get_group_tasks, get_user_tasks,
-    get_admin_groups, get_user_by_id, get_group_users
+from db_async import (
+    async_get_all_groups, async_get_group, async_get_group_tasks, async_get_user_tasks,
+    async_get_admin_groups, async_get_user_by_id, async_get_group_users,
+    async_get_group_assignee_task_counts, async_get_tasks_created_by_user, async_get_all_tasks,
+    async_get_archived_tasks_created_by_user_page, async_get_user_archived_tasks_page, run_db
 )
 from utils.permissions import is_super_admin, is_group_admin
 from utils.helpers import get_status_emoji, format_task_status, format_task_button
@@ -17,7 +20,7 @@ logger = logging.getLogger(__name__)
 async def view_tasks_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show unified tasks menu with filters based on user role."""
     query = update.callback_query
-    await query.answer()
+    await query.answer(cache_time=1)
     
     user_id = query.from_user.id
     keyboard = []
@@ -28,8 +31,8 @@ async def view_tasks_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     keyboard.append([InlineKeyboardButton("📦 Архив задач", callback_data="filter_tasks_archived")])
     
     # Admin-specific filters
-    if is_group_admin(user_id):
-        admin_groups = get_admin_groups(user_id)
+    if await run_db(is_group_admin, user_id):
+        admin_groups = await async_get_admin_groups(user_id)
         
         if len(admin_groups) > 1:
             # Multiple groups - show selection
@@ -61,8 +64,7 @@ async def filter_tasks_created(update: Update, context: ContextTypes.DEFAULT_TYP
     await query.answer()
     
     user_id = query.from_user.id
-    from database import get_tasks_created_by_user
-    tasks = get_tasks_created_by_user(user_id)
+    tasks = await async_get_tasks_created_by_user(user_id)
     
     if not tasks:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="view_tasks_menu")]]
@@ -89,7 +91,7 @@ async def filter_tasks_assigned(update: Update, context: ContextTypes.DEFAULT_TY
     await query.answer()
     
     user_id = query.from_user.id
-    tasks = get_user_tasks(user_id)
+    tasks = await async_get_user_tasks(user_id)
     
     if not tasks:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="view_tasks_menu")]]
@@ -119,9 +121,9 @@ async def filter_tasks_select_group(update: Update, context: ContextTypes.DEFAUL
     
     # Get groups based on user role
     if is_super_admin(user_id):
-        groups = get_all_groups()
+        groups = await async_get_all_groups()
     else:
-        groups = get_admin_groups(user_id)
+        groups = await async_get_admin_groups(user_id)
     
     if not groups:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="view_tasks_menu")]]
@@ -163,12 +165,15 @@ async def filter_tasks_group(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await query.edit_message_text("❌ Помилка: група не визначена.")
             return
     
-    group = get_group(group_id)
+    # Group, members, tasks and per-assignee counts are independent: fetch them concurrently
+    group, users, tasks, task_counts = await asyncio.gather(
+        async_get_group(group_id),
+        async_get_group_users(group_id),
+        async_get_group_tasks(group_id),
+        async_get_group_assignee_task_counts(group_id),
+    )
     group_name = group['name'] if group else "Неизвестно"
     
-    # Get users in this group
-    users = get_group_users(group_id)
-    
     if not users:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="filter_tasks_select_group")]]
         await query.edit_message_text(
@@ -181,7 +186,6 @@ async def filter_tasks_group(update: Update, context: ContextTypes.DEFAULT_TYPE)
     keyboard = []
     
     # Add "All tasks" button
-    tasks = get_group_tasks(group_id)
     keyboard.append([InlineKeyboardButton(
         f"📋 Все задачи ({len(tasks)})",
         callback_data=f"filter_group_all_tasks_{group_id}"
@@ -194,11 +198,7 @@ async def filter_tasks_group(update: Update, context: ContextTypes.DEFAULT_TYPE)
     for user in users:
         user_id = user['user_id']
         user_name = user.get('name') or user.get('username', 'Неизвестно')
-        
-        # Count tasks for this user in this group
-        user_tasks = get_user_tasks(user_id)
-        # Filter to only tasks in this group
-        group_tasks_count = len([t for t in user_tasks if t.get('group_id') == group_id])
+        group_tasks_count = task_counts.get(user_id, 0)
         
         keyboard.append([InlineKeyboardButton(
             f"👤 {user_name} ({group_tasks_count})",
@@ -220,8 +220,7 @@ async def filter_group_all_tasks(update: Update, context: ContextTypes.DEFAULT_T
     
     group_id = int(query.data.split("_")[-1])
     
-    tasks = get_group_tasks(group_id)
-    group = get_group(group_id)
+    tasks, group = await asyncio.gather(async_get_group_tasks(group_id), async_get_group(group_id))
     group_name = group['name'] if group else "Неизвестно"
     
     if not tasks:
@@ -254,15 +253,13 @@ async def filter_tasks_by_assignee(update: Update, context: ContextTypes.DEFAULT
     assignee_id = int(parts[-1])
     
     # Get all tasks for this user
-    all_user_tasks = get_user_tasks(assignee_id)
+    all_user_tasks = await async_get_user_tasks(assignee_id)
     
     # Filter to only tasks in this group
     tasks = [t for t in all_user_tasks if t.get('group_id') == group_id]
     
-    group = get_group(group_id)
+    group, assignee = await asyncio.gather(async_get_group(group_id), async_get_user_by_id(assignee_id))
     group_name = group['name'] if group else "Неизвестно"
-    
-    assignee = get_user_by_id(assignee_id)
     assignee_name = assignee.get('name') or assignee.get('username', 'Неизвестно') if assignee else "Неизвестно"
     
     if not tasks:
@@ -296,8 +293,7 @@ async def filter_tasks_all(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         await query.answer("У вас нет доступа к этой функции", show_alert=True)
         return
     
-    from database import get_all_tasks
-    tasks = get_all_tasks()
+    tasks = await async_get_all_tasks()
     
     if not tasks:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="view_tasks_menu")]]
@@ -307,23 +303,25 @@ async def filter_tasks_all(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         )
         return
     
-    # Group by status for statistics
-    tasks_by_status = {
-        'pending': [],
-        'in_progress': [],
-        'completed': []
+    # Count by status for statistics (single pass, no per-status task lists)
+    status_counts = {
+        'pending': 0,
+        'in_progress': 0,
+        'completed': 0
     }
     
     for task in tasks:
         status = task.get('status', 'pending')
-        if status in tasks_by_status:
-            tasks_by_status[status].append(task)
-    
-    message_text = f"🌐 Все задачи ({len(tasks)}):\n\n"
-    message_text += f"⏳ Ожидают: {len(tasks_by_status['pending'])}\n"
-    message_text += f"🔄 В работе: {len(tasks_by_status['in_progress'])}\n"
-    message_text += f"✅ Завершены: {len(tasks_by_status['completed'])}\n\n"
-    message_text += "Выберите задачу для просмотра:"
+        if status in status_counts:
+            status_counts[status] += 1
+    
+    message_text = (
+        f"🌐 Все задачи ({len(tasks)}):\n\n"
+        f"⏳ Ожидают: {status_counts['pending']}\n"
+        f"🔄 В работе: {status_counts['in_progress']}\n"
+        f"✅ Завершены: {status_counts['completed']}\n\n"
+        "Выберите задачу для просмотра:"
+    )
     
     keyboard = [
         [format_task_button(task)]
@@ -356,7 +354,7 @@ async def filter_tasks_archived(update: Update, context: ContextTypes.DEFAULT_TY
 async def filter_archived_created(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show archived tasks created by user with pagination."""
     query = update.callback_query
-    await query.answer()
+    await query.answer(cache_time=1)
     
     user_id = query.from_user.id
     
@@ -368,10 +366,10 @@ async def filter_archived_created(update: Update, context: ContextTypes.DEFAULT_
         except:
             page = 0
     
-    from database import get_archived_tasks_created_by_user
-    tasks = get_archived_tasks_created_by_user(user_id)
+    page_size = 10
+    page_tasks, total, page = await async_get_archived_tasks_created_by_user_page(user_id, page, page_size)
     
-    if not tasks:
+    if not page_tasks:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="filter_tasks_archived")]]
         await query.edit_message_text(
             "📤 Поручил (архив)\n\nНет завершенных задач.",
@@ -379,14 +377,8 @@ async def filter_archived_created(update: Update, context: ContextTypes.DEFAULT_
         )
         return
     
-    # Pagination
-    page_size = 10
-    total_pages = (len(tasks) + page_size - 1) // page_size
-    page = max(0, min(page, total_pages - 1))
-    
-    start_idx = page * page_size
-    end_idx = start_idx + page_size
-    page_tasks = tasks[start_idx:end_idx]
+    # Pagination (only this page was fetched; page is already clamped)
+    total_pages = (total + page_size - 1) // page_size
     
     keyboard = [
         [format_task_button(task)]
@@ -406,7 +398,7 @@ async def filter_archived_created(update: Update, context: ContextTypes.DEFAULT_
     keyboard.append([InlineKeyboardButton("⬅️ К архиву", callback_data="filter_tasks_archived")])
     
     await query.edit_message_text(
-        f"📤 Поручил (архив)\nСтраница {page + 1}/{total_pages}, всего: {len(tasks)}\n\nВыберите задачу:",
+        f"📤 Поручил (архив)\nСтраница {page + 1}/{total_pages}, всего: {total}\n\nВыберите задачу:",
         reply_markup=InlineKeyboardMarkup(keyboard)
     )
 
@@ -414,7 +406,7 @@ async def filter_archived_created(update: Update, context: ContextTypes.DEFAULT_
 async def filter_archived_assigned(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show archived tasks assigned to user with pagination."""
     query = update.callback_query
-    await query.answer()
+    await query.answer(cache_time=1)
     
     user_id = query.from_user.id
     
@@ -426,10 +418,10 @@ async def filter_archived_assigned(update: Update, context: ContextTypes.DEFAULT
         except:
             page = 0
     
-    from database import get_user_archived_tasks
-    tasks = get_user_archived_tasks(user_id)
+    page_size = 10
+    page_tasks, total, page = await async_get_user_archived_tasks_page(user_id, page, page_size)
     
-    if not tasks:
+    if not page_tasks:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="filter_tasks_archived")]]
         await query.edit_message_text(
             "📥 Выполнял (архив)\n\nНет завершенных задач.",
@@ -437,14 +429,8 @@ async def filter_archived_assigned(update: Update, context: ContextTypes.DEFAULT
         )
         return
     
-    # Pagination
-    page_size = 10
-    total_pages = (len(tasks) + page_size - 1) // page_size
-    page = max(0, min(page, total_pages - 1))
-    
-    start_idx = page * page_size
-    end_idx = start_idx + page_size
-    page_tasks = tasks[start_idx:end_idx]
+    # Pagination (only this page was fetched; page is already clamped)
+    total_pages = (total + page_size - 1) // page_size
     
     keyboard = [
         [format_task_button(task)]
@@ -464,7 +450,7 @@ async def filter_archived_assigned(update: Update, context: ContextTypes.DEFAULT
     keyboard.append([InlineKeyboardButton("⬅️ К архиву", callback_data="filter_tasks_archived")])
     
     await query.edit_message_text(
-        f"📥 Выполнял (архив)\nСтраница {page + 1}/{total_pages}, всего: {len(tasks)}\n\nВыберите задачу:",
+        f"📥 Выполнял (архив)\nСтраница {page + 1}/{total_pages}, всего: {total}\n\nВыберите задачу:",
         reply_markup=InlineKeyboardMarkup(keyboard)
     )
 
@@ -1,38 +1,30 @@
 ﻿"""Task viewing handlers."""
 import logging
 import json
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto, InputMediaVideo
 from telegram.ext import ContextTypes
 
-from database import get_task_by_id, get_group, get_user_by_id, get_task_media, get_task_assignee_statuses
+from database import get_group, get_user_by_id, get_task_media, get_task_assignee_statuses
+from db_async import async_get_task_by_id, run_db
 from utils.permissions import is_super_admin, is_group_admin, can_edit_task
+from utils.helpers import format_task_status, get_status_emoji
 
 logger = logging.getLogger(__name__)
 
-async def view_task_detail(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Show detailed task information with media and assigned users."""
-    query = update.callback_query
-    await query.answer()
-    
-    task_id = int(query.data.split("_")[-1])
-    user_id = query.from_user.id
-    
-    # Clear any editing state when viewing a task (cleanup from previous edits)
-    context.user_data.pop('editing_task_id', None)
-    context.user_data.pop('task_changes', None)
-    context.user_data.pop('task_selected_users', None)
-    context.user_data.pop('adding_media_to_task', None)
-    
-    # Track where user came from if not already set (for back navigation)
-    if 'task_view_source' not in context.user_data:
-        # Try to determine source based on callback history or default to 'user_my_tasks'
-        context.user_data['task_view_source'] = 'user_my_tasks'
+# Telegram accepts 2-10 photos/videos per send_media_group call
+MEDIA_GROUP_SIZE = 10
+
+_INPUT_MEDIA = {'photo': InputMediaPhoto, 'video': InputMediaVideo}
+
+
+def build_task_card(task: dict) -> tuple:
+    """
+    Format the task detail card shared by task view and edit exit.
     
-    # Get task details
-    task = get_task_by_id(task_id)
-    if not task:
-        await query.edit_message_text("❌ Задание не найдено.")
-        return
+    Returns:
+        tuple: (task_info text, assigned user IDs, media files)
+    """
+    task_id = task['task_id']
     
     # Get group info
     group = get_group(task['group_id'])
@@ -42,66 +34,82 @@ async def view_task_detail(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     creator = get_user_by_id(task.get('created_by')) if task.get('created_by') else None
     creator_name = creator['name'] if creator else 'Неизвестно'
     
-    # Get assigned users
-    import json
+    # Get assigned users with their individual statuses
     assigned_ids = json.loads(task.get('assigned_to_list') or '[]')
-    
-    # Get assignee statuses
     assignee_statuses = get_task_assignee_statuses(task_id)
     
     assigned_users = []
     for uid in assigned_ids:
         u = get_user_by_id(uid)
         if u:
-            # Get status emoji for this assignee
             user_status = assignee_statuses.get(uid, 'pending')
-            status_emoji = {
-                'pending': '⏳',
-                'in_progress': '🔄',
-                'completed': '✅',
-                'cancelled': '❌'
-            }.get(user_status, '❓')
-            assigned_users.append(f"{status_emoji} {u['name']}")
-    
-    # Format status
-    from utils.helpers import format_task_status
-    status_text = format_task_status(task['status'])
-    
-    # Build task info
-    task_info = f"📋 ЗАДАНИЕ #{task['task_id']}\n\n"
-    
-    # Add title if it exists and is different from description
-    title = task.get('title', '').strip()
+            assigned_users.append(f"{get_status_emoji(user_status)} {u['name']}")
+    
+    parts = [f"📋 ЗАДАНИЕ #{task_id}\n\n"]
+    
+    # Add title if it exists
+    title = (task.get('title') or '').strip()
     if title:
-        task_info += f"📝 Название:\n{title}\n\n"
+        parts.append(f"📝 Название:\n{title}\n\n")
     
     # Add metadata
-    task_info += (
+    parts.append(
         f"📅 Дата: {task['date']}\n"
         f"🕐 Дедлайн: {task['time']}\n"
         f"📍 Отдел: {group_name}\n"
-        f"📊 Общий статус: {status_text}\n"
+        f"📊 Общий статус: {format_task_status(task['status'])}\n"
         f"👤 Постановщик: {creator_name}\n\n"
     )
     
     # Add description if it exists
-    description = task.get('description', '').strip()
+    description = (task.get('description') or '').strip()
     if description:
-        task_info += f"📋 Описание:\n{description}\n\n"
+        parts.append(f"📋 Описание:\n{description}\n\n")
     
     if assigned_users:
-        task_info += f"👥 Исполнители ({len(assigned_users)}):\n"
+        parts.append(f"👥 Исполнители ({len(assigned_users)}):\n")
         for name_with_status in assigned_users[:5]:  # Show first 5
-            task_info += f"  {name_with_status}\n"
+            parts.append(f"  {name_with_status}\n")
         if len(assigned_users) > 5:
-            task_info += f"  ... и еще {len(assigned_users) - 5}\n"
+            parts.append(f"  ... и еще {len(assigned_users) - 5}\n")
     else:
-        task_info += "👥 Никто не назначен\n"
+        parts.append("👥 Никто не назначен\n")
     
     # Check if task has media
     media_files = get_task_media(task_id) if task.get('has_media') else []
     if media_files:
-        task_info += f"\n📎 Медиа файлов: {len(media_files)}\n"
+        parts.append(f"\n📎 Медиа файлов: {len(media_files)}\n")
+    
+    return "".join(parts), assigned_ids, media_files
+
+
+async def view_task_detail(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show detailed task information with media and assigned users."""
+    query = update.callback_query
+    await query.answer()
+    
+    task_id = int(query.data.split("_")[-1])
+    user_id = query.from_user.id
+    
+    # Clear any editing state when viewing a task (cleanup from previous edits)
+    context.user_data.pop('editing_task_id', None)
+    context.user_data.pop('task_changes', None)
+    context.user_data.pop('task_selected_users', None)
+    context.user_data.pop('task_assignable_users', None)
+    context.user_data.pop('adding_media_to_task', None)
+    
+    # Track where user came from if not already set (for back navigation)
+    if 'task_view_source' not in context.user_data:
+        # Try to determine source based on callback history or default to 'user_my_tasks'
+        context.user_data['task_view_source'] = 'user_my_tasks'
+    
+    # Get task details (off the event loop: the card needs several lookups)
+    task = await async_get_task_by_id(task_id)
+    if not task:
+        await query.edit_message_text("❌ Задание не найдено.")
+        return
+    
+    task_info, assigned_ids, media_files = await run_db(build_task_card, task)
     
     # Build keyboard based on user permissions
     keyboard = []
@@ -111,7 +119,7 @@ async def view_task_detail(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         keyboard.append([InlineKeyboardButton("📷 Просмотреть медиа", callback_data=f"view_task_media_{task_id}")])
     
     # Check if user can edit/delete this task
-    can_edit = can_edit_task(user_id, task)
+    can_edit = await run_db(can_edit_task, user_id, task)
     
     # Determine if user is assigned to this task
     is_assigned = user_id in assigned_ids
@@ -144,7 +152,7 @@ async def view_task_detail(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     elif is_super_admin(user_id):
         back_callback = 'super_manage_tasks'
         back_text = "⬅️ К списку заданий"
-    elif is_group_admin(user_id):
+    elif await run_db(is_group_admin, user_id):
         back_callback = 'admin_view_tasks'
         back_text = "⬅️ К списку заданий"
     else:
@@ -164,8 +172,11 @@ async def view_task_media(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     task_id = int(query.data.split("_")[-1])
     
-    # Get media files
-    media_files = get_task_media(task_id)
+    # Get media files (only photos and videos can be sent)
+    media_files = [
+        media for media in await run_db(get_task_media, task_id)
+        if media['file_type'] in _INPUT_MEDIA
+    ]
     
     if not media_files:
         await query.answer("❌ Медиа файлов не найдено", show_alert=True)
@@ -180,25 +191,32 @@ async def view_task_media(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     sent_count = 0
     failed_count = 0
     
-    for media in media_files:
+    # Albums of up to 10 files: one request per album instead of one per file, order preserved
+    caption = f"Задание #{task_id}"
+    for start in range(0, len(media_files), MEDIA_GROUP_SIZE):
+        batch = media_files[start:start + MEDIA_GROUP_SIZE]
         try:
-            if media['file_type'] == 'photo':
+            if len(batch) > 1:
+                await context.bot.send_media_group(
+                    chat_id=query.message.chat_id,
+                    media=[_INPUT_MEDIA[media['file_type']](media['file_id'], caption=caption) for media in batch]
+                )
+            elif batch[0]['file_type'] == 'photo':
                 await context.bot.send_photo(
                     chat_id=query.message.chat_id,
-                    photo=media['file_id'],
-                    caption=f"Задание #{task_id}"
+                    photo=batch[0]['file_id'],
+                    caption=caption
                 )
-                sent_count += 1
-            elif media['file_type'] == 'video':
+            else:
                 await context.bot.send_video(
                     chat_id=query.message.chat_id,
-                    video=media['file_id'],
-                    caption=f"Задание #{task_id}"
+                    video=batch[0]['file_id'],
+                    caption=caption
                 )
-                sent_count += 1
+            sent_count += len(batch)
         except Exception as e:
-            logger.error(f"Error sending media {media['media_id']}: {e}")
-            failed_count += 1
+            logger.error(f"Error sending media {[media['media_id'] for media in batch]}: {e}")
+            failed_count += len(batch)
     
     # Send duplicated message with buttons below media
     if sent_count > 0:
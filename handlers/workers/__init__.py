@@ -5,6 +5,7 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
 from database import get_user_by_id
+from db_async import run_db
 
 # Import filter handlers to reuse for backwards compatibility  
 from handlers.tasks.filters import filter_tasks_assigned
@@ -25,7 +26,7 @@ async def user_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
     await query.answer()
     
     user_id = query.from_user.id
-    user = get_user_by_id(user_id)
+    user = await run_db(get_user_by_id, user_id)
     
     if user:
         keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="start_menu")]]
@@ -2,6 +2,8 @@
 Simple in-memory cache for database query results.
 Reduces database hits for frequently accessed data.
 """
+import re
+import threading
 import time
 import logging
 from typing import Any, Callable, Optional, Dict
@@ -10,33 +12,41 @@ logger = logging.getLogger(__name__)
 
 
 class SimpleCache:
-    """Simple in-memory cache with TTL (time-to-live)."""
+    """
+    Simple in-memory cache with TTL (time-to-live).
+    
+    Thread-safe: DAL functions run concurrently on the DB executor threads.
+    """
     
     def __init__(self):
         self.cache: Dict[str, tuple] = {}  # {key: (value, expiry_time)}
         self.hits = 0
         self.misses = 0
+        self._lock = threading.Lock()
     
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache if it exists and hasn't expired."""
-        if key not in self.cache:
-            self.misses += 1
-            return None
-        
-        value, expiry = self.cache[key]
-        if time.time() > expiry:
-            # Expired
-            del self.cache[key]
-            self.misses += 1
-            return None
-        
-        self.hits += 1
-        return value
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, expiry = entry
+            if time.time() > expiry:
+                # Expired
+                self.cache.pop(key, None)
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            return value
     
     def set(self, key: str, value: Any, ttl: int = 300):
         """Set value in cache with TTL (default 5 minutes)."""
         expiry = time.time() + ttl
-        self.cache[key] = (value, expiry)
+        with self._lock:
+            self.cache[key] = (value, expiry)
     
     def get_or_fetch(self, key: str, fetch_fn: Callable, ttl: int = 300) -> Any:
         """Get from cache or fetch and cache if not found."""
@@ -46,33 +56,34 @@ class SimpleCache:
             return cached
         
         logger.debug(f"❌ Cache MISS: {key} - fetching...")
+        # Fetched outside the lock so a slow query doesn't block other lookups
         value = fetch_fn()
         self.set(key, value, ttl)
         return value
     
     def invalidate(self, key: str):
         """Invalidate a specific cache key."""
-        if key in self.cache:
-            del self.cache[key]
+        with self._lock:
+            removed = self.cache.pop(key, None)
+        if removed is not None:
             logger.debug(f"🗑️  Cache invalidated: {key}")
     
     def invalidate_pattern(self, pattern: str):
         """Invalidate all cache keys matching a pattern (e.g., 'user_groups_*')."""
-        keys_to_delete = []
-        for key in self.cache.keys():
-            # Simple pattern matching: replace * with .* for regex
-            import re
-            regex_pattern = pattern.replace('*', '.*')
-            if re.match(f"^{regex_pattern}$", key):
-                keys_to_delete.append(key)
+        # Simple pattern matching: replace * with .* for regex
+        regex = re.compile(f"^{pattern.replace('*', '.*')}$")
+        with self._lock:
+            keys_to_delete = [key for key in list(self.cache) if regex.match(key)]
+            for key in keys_to_delete:
+                self.cache.pop(key, None)
         
         for key in keys_to_delete:
-            del self.cache[key]
             logger.debug(f"🗑️  Cache invalidated (pattern): {key}")
     
     def clear(self):
         """Clear all cache."""
-        self.cache.clear()
+        with self._lock:
+            self.cache.clear()
     
     def stats(self) -> str:
         """Get cache statistics."""
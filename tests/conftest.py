@@ -89,6 +89,10 @@ def test_db(request):
         cursor.execute("TRUNCATE TABLE groups CASCADE")
         
         conn.close()
+        
+        # Drop cached query results from previous tests
+        from simple_cache import get_cache
+        get_cache().clear()
     
     yield TEST_DB_URL
 
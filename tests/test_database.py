@@ -1,12 +1,14 @@
 """Tests for database.py - Core database operations."""
 import pytest
 from database import (
-    add_user, get_user_by_id, get_all_users,
+    add_user, get_user_by_id, user_exists, get_all_users, get_bot_blocked_ids, set_bot_blocked,
     ban_user, unban_user, delete_user,
-    create_group, get_group, get_all_groups,
+    create_group, get_group, get_all_groups, update_group_name,
     add_user_to_group, remove_user_from_group, get_user_groups,
     has_user_group, get_users_without_group,
-    cancel_user_tasks, create_task,
+    cancel_user_tasks, create_task, get_task_by_id, get_group_tasks,
+    change_assignee_status, get_pending_assignees, get_group_assignee_task_counts, get_overdue_tasks, get_next_reminder_time,
+    update_task_status, get_archived_tasks_created_by_user_page,
 )
 
 
@@ -39,6 +41,25 @@ class TestUserManagement:
         assert user['name'] == "Test User"
         assert 'banned' in user
     
+    def test_prepared_lookups_repeat_on_pooled_connection(self, test_db):
+        """Test prepared hot-path queries keep working after the first call prepares them."""
+        add_user(100001, "Test User")
+        for _ in range(3):
+            assert get_user_by_id(100001)['name'] == "Test User"
+            assert user_exists(100001) is True
+        assert user_exists(100002) is False
+    
+    def test_write_block_rolls_back_on_error(self, test_db):
+        """Test a failing commit=True block leaves none of its writes behind."""
+        from database import _cursor
+        
+        with pytest.raises(RuntimeError):
+            with _cursor(commit=True) as cursor:
+                cursor.execute("INSERT INTO users (user_id, name) VALUES (%s, %s)", (100001, "Test User"))
+                raise RuntimeError("fail mid-transaction")
+        
+        assert get_user_by_id(100001) is None
+    
     def test_get_nonexistent_user(self, test_db):
         """Test retrieving non-existent user returns None."""
         user = get_user_by_id(999999)
@@ -67,6 +88,33 @@ class TestUserBanningAndDeletion:
         user = get_user_by_id(100001)
         assert user['banned'] == 1
     
+    def test_ban_user_refreshes_cached_user(self, test_db):
+        """Test a user row cached before a ban shows the ban afterwards."""
+        add_user(100001, "Test User")
+        assert get_user_by_id(100001)['banned'] == 0
+        
+        ban_user(100001)
+        assert get_user_by_id(100001)['banned'] == 1
+    
+    def test_concurrent_cached_user_reads(self, test_db):
+        """Test cached user reads stay consistent while other threads invalidate."""
+        from concurrent.futures import ThreadPoolExecutor
+        from simple_cache import get_cache
+        
+        cache = get_cache()
+        add_user(100001, "Test User")
+        
+        def read_and_invalidate(i):
+            user = get_user_by_id(100001)
+            cache.invalidate("user_100001")
+            cache.invalidate_pattern("user_*")
+            return user['name']
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            names = list(executor.map(read_and_invalidate, range(200)))
+        
+        assert names == ["Test User"] * 200
+    
     def test_unban_user(self, test_db):
         """Test unbanning a user."""
         add_user(100001, "Test User")
@@ -99,6 +147,18 @@ class TestUserBanningAndDeletion:
         user = get_user_by_id(100001)
         assert user is not None
         assert user['banned'] == 1
+    
+    def test_set_bot_blocked_updates_cached_ids(self, test_db):
+        """Test blocked users are listed until they are unmarked."""
+        add_user(100001, "Test User")
+        assert 100001 not in get_bot_blocked_ids()
+        
+        set_bot_blocked(100001, True)
+        assert 100001 in get_bot_blocked_ids()
+        assert get_user_by_id(100001)['bot_blocked'] == 1
+        
+        set_bot_blocked(100001, False)
+        assert 100001 not in get_bot_blocked_ids()
 
 
 class TestGroupManagement:
@@ -123,6 +183,14 @@ class TestGroupManagement:
         group_names = [g['name'] for g in groups]
         assert "Group 1" in group_names
         assert "Group 2" in group_names
+    
+    def test_get_group_cache_invalidated_on_rename(self, test_db):
+        """Test a cached group reflects a rename."""
+        group_id = create_group("Old Name")
+        assert get_group(group_id)['name'] == "Old Name"
+        
+        update_group_name(group_id, "New Name")
+        assert get_group(group_id)['name'] == "New Name"
 
 
 class TestMultiGroupMembership:
@@ -196,6 +264,22 @@ class TestMultiGroupMembership:
         assert 100002 in user_ids
 
 
+class TestTaskCreation:
+    """Test task creation."""
+    
+    def test_failed_assignee_insert_leaves_no_task(self, test_db):
+        """Test the task row is rolled back when its assignees cannot be inserted."""
+        add_user(100001, "Creator")
+        add_user(100002, "Assignee")
+        group_id = create_group("Test Group")
+        
+        # Duplicate assignee violates UNIQUE(task_id, user_id) in task_assignees
+        task_id = create_task("2025-12-10", "10:00", "Test Task", group_id, 100001, [100002, 100002])
+        
+        assert task_id is None
+        assert get_group_tasks(group_id) == []
+
+
 class TestTaskCancellation:
     """Test task cancellation when user is banned/deleted."""
     
@@ -247,5 +331,121 @@ class TestTaskCancellation:
         assert result['updated'] == 1
 
 
+
+class TestAssigneeStatusChange:
+    """Test atomic assignee status changes."""
+    
+    def test_change_assignee_status_returns_old_and_aggregate(self, test_db):
+        """Test old status and recomputed task status are returned."""
+        add_user(100001, "Creator")
+        add_user(100002, "Assignee 1")
+        add_user(100003, "Assignee 2")
+        group_id = create_group("Test Group")
+        task_id = create_task("2025-12-10", "10:00", "Test Task", group_id, 100001, [100002, 100003])
+        
+        result = change_assignee_status(task_id, 100002, 'in_progress')
+        assert result == {'old_status': 'pending', 'task_status': 'in_progress'}
+        assert get_task_by_id(task_id)['status'] == 'in_progress'
+        
+        change_assignee_status(task_id, 100002, 'completed')
+        result = change_assignee_status(task_id, 100003, 'completed')
+        assert result == {'old_status': 'pending', 'task_status': 'completed'}
+    
+    def test_change_assignee_status_non_assignee(self, test_db):
+        """Test non-assignee gets None and invalid status gets False."""
+        add_user(100001, "Creator")
+        add_user(100002, "Assignee")
+        group_id = create_group("Test Group")
+        task_id = create_task("2025-12-10", "10:00", "Test Task", group_id, 100001, [100002])
+        
+        assert change_assignee_status(task_id, 100001, 'completed') is None
+        assert change_assignee_status(task_id, 100002, 'bogus') is False
+    
+    def test_get_pending_assignees_skips_finished(self, test_db):
+        """Test assignees who completed their part are not pending."""
+        add_user(100001, "Creator")
+        add_user(100002, "Assignee 1")
+        add_user(100003, "Assignee 2")
+        group_id = create_group("Test Group")
+        task_id = create_task("2025-12-10", "10:00", "Test Task", group_id, 100001, [100002, 100003])
+        
+        assert get_pending_assignees(task_id) == [100002, 100003]
+        change_assignee_status(task_id, 100002, 'completed')
+        assert get_pending_assignees(task_id) == [100003]
+        assert get_pending_assignees(task_id, exclude_user_id=100003) == []
+
+
+class TestGroupTaskCounts:
+    """Test aggregated per-assignee task counts."""
+    
+    def test_get_group_assignee_task_counts(self, test_db):
+        """Test counts match active tasks per assignee in the group."""
+        add_user(100001, "Creator")
+        add_user(100002, "Assignee 1")
+        add_user(100003, "Assignee 2")
+        group_id = create_group("Test Group")
+        other_group_id = create_group("Other Group")
+        
+        create_task("2025-12-10", "10:00", "Task 1", group_id, 100001, [100002, 100003])
+        create_task("2025-12-11", "10:00", "Task 2", group_id, 100001, [100002])
+        create_task("2025-12-12", "10:00", "Task 3", other_group_id, 100001, [100003])
+        
+        counts = get_group_assignee_task_counts(group_id)
+        assert counts == {100002: 2, 100003: 1}
+
+
+class TestOverdueTasks:
+    """Test the batched overdue task query."""
+    
+    def test_get_overdue_tasks(self, test_db):
+        """Test only active tasks past their deadline are returned."""
+        from datetime import datetime
+        add_user(100001, "Creator")
+        add_user(100002, "Assignee")
+        group_id = create_group("Test Group")
+        
+        overdue_id = create_task("2025-12-10", "24:00", "Overdue", group_id, 100001, [100002])
+        create_task("2025-12-12", "10:00", "Future", group_id, 100001, [100002])
+        
+        tasks = get_overdue_tasks(datetime(2025, 12, 11, 9, 0))
+        assert [t['task_id'] for t in tasks] == [overdue_id]
+        assert tasks[0]['deadline'] == datetime(2025, 12, 11, 0, 0)
+        assert tasks[0]['created_by'] == 100001
+        assert tasks[0]['pending_assignees'] == [100002]
+        assert tasks[0]['admins'] == []
+    
+    def test_get_next_reminder_time(self, test_db):
+        """Test next reminder is the nearest deadline or overdue-day mark."""
+        from datetime import datetime
+        add_user(100001, "Creator")
+        group_id = create_group("Test Group")
+        
+        create_task("2025-12-10", "10:00", "Overdue", group_id, 100001, [])
+        create_task("2025-12-12", "10:00", "Future", group_id, 100001, [])
+        
+        # Overdue task's next full day (Dec 11 10:00) comes before the future deadline
+        assert get_next_reminder_time(datetime(2025, 12, 11, 9, 0)) == datetime(2025, 12, 11, 10, 0)
+        assert get_next_reminder_time(datetime(2025, 12, 11, 11, 0)) == datetime(2025, 12, 12, 10, 0)
+
+
+class TestArchivedTasks:
+    """Test paged archive queries."""
+    
+    def test_archived_page_clamps_to_last_page(self, test_db):
+        """Test only the requested page is returned and out-of-range pages are clamped."""
+        add_user(100001, "Creator")
+        group_id = create_group("Test Group")
+        
+        for i in range(3):
+            task_id = create_task("2025-12-10", "10:00", f"Task {i}", group_id, 100001, [])
+            update_task_status(task_id, "completed")
+        create_task("2025-12-10", "10:00", "Active", group_id, 100001, [])
+        
+        tasks, total, page = get_archived_tasks_created_by_user_page(100001, page=0, page_size=2)
+        assert (len(tasks), total, page) == (2, 3, 0)
+        
+        tasks, total, page = get_archived_tasks_created_by_user_page(100001, page=5, page_size=2)
+        assert (len(tasks), total, page) == (1, 3, 1)
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -117,6 +117,16 @@ class TestAsyncWrappersMock:
             assert result == mock_media
             assert len(result) == 2
     
+    @pytest.mark.asyncio
+    async def test_async_get_notification_recipients_mock(self):
+        """Test async_get_notification_recipients with mock."""
+        mock_recipients = {'creator': 1, 'assignees': [2], 'admins': [3], 'super_admin_ids': [4]}
+        
+        with patch('database.get_notification_recipients', return_value=mock_recipients) as mock_fn:
+            result = await db_async.async_get_notification_recipients(1, include_assignees=False)
+            assert result == mock_recipients
+            mock_fn.assert_called_once_with(1, False)
+    
     @pytest.mark.asyncio
     async def test_async_write_operation_mock(self):
         """Test async write operations with mock."""
@@ -231,6 +241,14 @@ class TestAsyncBehavior:
         assert result == "completed"
         assert elapsed >= 0.1  # Should have taken at least 0.1s
     
+    @pytest.mark.asyncio
+    async def test_run_db_uses_db_executor(self):
+        """Verify run_db executes on the bounded DB worker pool."""
+        import threading
+        
+        thread_name = await db_async.run_db(lambda: threading.current_thread().name)
+        assert thread_name.startswith("db")
+    
     @pytest.mark.asyncio
     async def test_multiple_concurrent_db_calls(self):
         """Test that multiple DB calls can run concurrently."""
@@ -4,7 +4,7 @@ import os
 from database import (
     add_user, create_group, add_user_to_group,
     is_group_admin, add_group_admin, remove_group_admin,
-    get_admin_groups, has_user_group
+    get_admin_groups, has_user_group, ban_user
 )
 
 
@@ -93,6 +93,17 @@ class TestGroupAdminPermissions:
         assert result is True
         assert is_group_admin(user_id, group_id) is False
     
+    def test_ban_user_clears_cached_admin_status(self, test_db):
+        """Test that banning an admin is visible through the cached admin check."""
+        user_id = 100001
+        add_user(user_id, "Admin User")
+        group_id = create_group("Test Group")
+        add_group_admin(group_id, user_id)
+        
+        assert is_group_admin(user_id) is True  # Warms the cache
+        ban_user(user_id)
+        assert is_group_admin(user_id) is False
+    
     def test_get_admin_groups(self, test_db):
         """Test getting all groups where user is admin."""
         user_id = 100001
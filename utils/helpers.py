@@ -2,7 +2,15 @@
 import re
 import calendar
 from datetime import datetime
+from functools import lru_cache
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
+
+# Manual time input HH:MM (compiled once at import)
+TIME_PATTERN = re.compile(r'^([0-1]?[0-9]|2[0-4]):([0-5][0-9])$')
+
+# Telegram's description for edits that would leave a message unchanged
+MESSAGE_NOT_MODIFIED = "Message is not modified"
 
 # Ukrainian month names
 UKR_MONTHS = [
@@ -83,32 +91,35 @@ def format_task_button(task: dict, show_date: bool = True) -> InlineKeyboardButt
     )
 
 
-def generate_calendar(year, month):
-    """Generate calendar keyboard for given year and month."""
-    keyboard = []
-    
+@lru_cache(maxsize=64)
+def _calendar_rows(year: int, month: int) -> tuple:
+    """Calendar button rows for a month; pure, so navigating back and forth reuses them."""
     # Header with month/year and navigation
-    keyboard.append([
+    header = (
         InlineKeyboardButton("◀️", callback_data=f"cal_prev_{year}_{month}"),
         InlineKeyboardButton(f"{UKR_MONTHS[month-1]} {year}", callback_data="cal_ignore"),
         InlineKeyboardButton("▶️", callback_data=f"cal_next_{year}_{month}")
-    ])
+    )
     
     # Days of week header
-    keyboard.append([InlineKeyboardButton(day, callback_data="cal_ignore") for day in UKR_DAYS_SHORT])
+    weekdays = tuple(InlineKeyboardButton(day, callback_data="cal_ignore") for day in UKR_DAYS_SHORT)
     
     # Calendar days
-    cal = calendar.monthcalendar(year, month)
-    for week in cal:
-        row = []
-        for day in week:
-            if day == 0:
-                row.append(InlineKeyboardButton(" ", callback_data="cal_ignore"))
-            else:
-                row.append(InlineKeyboardButton(str(day), callback_data=f"cal_select_{year}_{month}_{day}"))
-        keyboard.append(row)
+    weeks = tuple(
+        tuple(
+            InlineKeyboardButton(" ", callback_data="cal_ignore") if day == 0
+            else InlineKeyboardButton(str(day), callback_data=f"cal_select_{year}_{month}_{day}")
+            for day in week
+        )
+        for week in calendar.monthcalendar(year, month)
+    )
     
-    return keyboard
+    return (header, weekdays) + weeks
+
+
+def generate_calendar(year, month):
+    """Generate calendar keyboard for given year and month (a fresh list callers may append to)."""
+    return list(_calendar_rows(year, month))
 
 
 def validate_time_format(time_text: str) -> tuple[bool, str]:
@@ -116,8 +127,7 @@ def validate_time_format(time_text: str) -> tuple[bool, str]:
     Validate and normalize time format HH:MM.
     Returns (is_valid, normalized_time)
     """
-    time_pattern = re.compile(r'^([0-1]?[0-9]|2[0-4]):([0-5][0-9])$')
-    match = time_pattern.match(time_text.strip())
+    match = TIME_PATTERN.match(time_text.strip())
     
     if not match:
         return False, ""
@@ -129,6 +139,11 @@ def validate_time_format(time_text: str) -> tuple[bool, str]:
     return True, normalized_time
 
 
+def is_message_not_modified(error: Exception) -> bool:
+    """Check if an error is Telegram's "message is not modified" BadRequest."""
+    return isinstance(error, BadRequest) and error.message.startswith(MESSAGE_NOT_MODIFIED)
+
+
 def create_back_button(callback_data: str = "start_menu", text: str = "⬅️ Назад") -> InlineKeyboardMarkup:
     """Create a standard back button keyboard."""
     return InlineKeyboardMarkup([[InlineKeyboardButton(text, callback_data=callback_data)]])
@@ -1,15 +1,8 @@
 """Permission checking utilities"""
-import os
-from dotenv import load_dotenv
+from config import Config
 from database import get_admin_groups, get_task_by_id, get_user_by_id, is_group_admin as db_is_group_admin
 
-# Load environment variables
-load_dotenv()
-
-# Parse super admin IDs from environment
-SUPER_ADMIN_IDS = [
-    int(id.strip()) for id in os.getenv("SUPER_ADMIN_ID", "0").split(",") if id.strip()
-]
+SUPER_ADMIN_IDS = Config.SUPER_ADMIN_IDS
 
 
 def is_super_admin(user_id: int) -> bool: